@@ -13,24 +13,30 @@ if not hasattr(Image, "CUBIC"):
     Image.CUBIC = Image.BICUBIC
 import random
 import json  # Für Speichern/Laden der Einstellungen
-import requests
-import vlc
 import threading #
-import urllib.request #
-import io #
-import pandas as pd  # Zum Einlesen der CSV-Datei
-import asyncio #
-import aiohttp
 from PIL.Image import Resampling
 import os #
 import shutil #
 import time #
 import numpy as np
-import seaborn as sns
 import matplotlib.pyplot as plt
 from bs4 import BeautifulSoup
 import sys
 import math
+from collections import OrderedDict
+from audio_player import get_player
+from audio_store import get_audio_store
+from cache_manager import get_cache_manager
+from image_cache_worker import ImageCacheWorker
+from image_manifest import get_manifest
+from prefetch_queue import DEFAULT_DEPTH, PrefetchQueue
+from round_media import build_round_bundle, load_answer_image
+from sampling_policy import DEFAULT_AFFINITY, DEFAULT_MIN_NOVELTY, get_sampling_policy
+from sonogram_service import get_sonogram_service
+from spectrogram import DEFAULT_RANGE, FREQUENCY_RANGES
+from species_catalog import get_catalog
+from wiki_images import cache_species_images
+from xeno_canto import get_random_recording, get_service, is_known_empty, start_warm_up
 
 
 #Resource_path Code von: https://stackoverflow.com/questions/31836104/pyinstaller-and-onefile-how-to-include-an-image-in-the-exe-file
@@ -42,14 +48,10 @@ def resource_path(relative_path):
 
     return os.path.join(base_path, relative_path)
 
-# Globaler Cache für API-Antworten
-api_cache = {}
-
-
 # --- Funktion zum Nachschlagen der Arten in der CSV ---
-def lookup_species(species_input, species_df):
+def lookup_species(species_input):
     """
-    Sucht in species_df (CSV mit den Spalten 'Deutsch', 'Wissenschaftlich', 'Englisch')
+    Sucht im gemeinsamen Artenkatalog (CSV mit den Spalten 'Deutsch', 'Wissenschaftlich', 'Englisch')
     nach einem Eintrag, der dem normalisierten species_input entspricht.
 
     Gibt ein Dictionary zurück, z.B.:
@@ -57,219 +59,24 @@ def lookup_species(species_input, species_df):
      "display_language": "Deutsch"}
     oder None, falls kein Eintrag gefunden wurde.
     """
-    species_input_norm = species_input.strip().lower().replace("+", " ")
-    for idx, row in species_df.iterrows():
-        for col in ["Deutsch", "Wissenschaftlich", "Englisch"]:
-            val = str(row[col]).strip().lower().replace("+", " ")
-            if val == species_input_norm:
-                return {
-                    "Deutsch": row["Deutsch"],
-                    "Wissenschaftlich": row["Wissenschaftlich"],
-                    "Englisch": row["Englisch"],
-                    "display_language": col
-                }
-    return None
-
-
-# --- Funktionen für den Xenocanto-Abruf und Audio-Playback ---
-async def async_get_random_recording(species, record_type, sex_type, lifestage_type):
-    """
-    Führt die API-Abfrage asynchron durch und cached die Antwort.
-    """
-    key = (species, record_type)
-    if key in api_cache:
-        data = api_cache[key]
-    else:
-        record_type_final = record_type.lower()  # API erwartet Kleinbuchstaben
-        type_query = f'+type:"{record_type_final}"' if record_type_final else ""
-        sex_type_final = sex_type.lower()
-        sex_query = f'+sex:"{sex_type_final}"' if sex_type_final else ""
-        lifestage_type_final = lifestage_type.lower()
-        lifestage_query = f'+stage:"{lifestage_type_final}"' if lifestage_type_final else ""
-        url = f'https://www.xeno-canto.org/api/2/recordings?query={species}{type_query}{sex_query}{lifestage_query}'
-        async with aiohttp.ClientSession() as session:
-            async with session.get(url) as response:
-                data = await response.json()
-                api_cache[key] = data  # Cache die Antwort
-    recordings = data.get("recordings", [])
-    if not recordings:
-        return None
-    rec = random.choice(recordings)
-    audio_url = rec.get("file")
-    sonogram_data = rec.get("sono", {}).get("med")
-    sonogram_url = "https:" + sonogram_data if sonogram_data else None
-    rec_value = rec.get("rec")
-    lic_value = rec.get("lic")
-    combined_info = ""
-    if rec_value:
-        combined_info += f"Recorded by {rec_value}"
-    if lic_value:
-        if combined_info:
-            combined_info += " | "
-        combined_info += f" licensed under: https:{lic_value}"
-    return {"audio_url": audio_url, "sonogram_url": sonogram_url, "correct_species": species,  "copyright_info": combined_info}
-
-def get_random_recording(species, record_type, sex_type, lifestage_type):
-    """
-    Synchrone Wrapper-Funktion, die das asynchrone Gegenstück ausführt.
-    """
-    try:
-        return asyncio.run(async_get_random_recording(species, record_type, sex_type, lifestage_type))
-    except Exception as e:
-        print(f"Error in get_random_recording: {e}")
-        return None
+    return species_catalog.lookup(species_input)
 
-def cache_bird_images(species_list):
+
+# --- Xenocanto-Abruf: get_random_recording kommt aus xeno_canto.py (gemeinsame Loop + Session) ---
+
+def cache_bird_images(species_list, on_cached=None):
     """
-    For each species in species_list:
-      1) Skip caching if 'bird_cache/<latin_name>/metadata.json' exists.
-      2) Search English Wikipedia for a page title (list=search).
-      3) Use 'pageimages' to get the lead thumbnail (pithumbsize=300) + file name.
-      4) Query the file's license/author via 'imageinfo&extmetadata'.
-      5) Download the thumbnail as image_0.jpg.
-      6) Store metadata.json with: filename, license, author.
-
-    This downloads exactly ONE image per species. You can later load it
-    and display the license & author info as needed.
+    For each species in species_list that is not cached yet
+    (no entry in the image manifest, see image_manifest.py):
+      1) Resolve the scientific names to Wikipedia articles and their lead
+         thumbnail (pageimages, pithumbsize sized to the display, see display_resolution.py) – batched, 50 titles per request.
+      2) Query license/author of all image files in one batched imageinfo request.
+      3) Download each thumbnail as image_0.jpg and add it to the manifest with:
+         path, width, height, license, author (plain text).
+    Names that do not resolve directly fall back to the old full-text search.
+    See wiki_images.py. on_cached(species, ok) is called after each species.
     """
-    WIKIPEDIA_API = "https://en.wikipedia.org/w/api.php"
-    HEADERS = {"User-Agent": "WikiBirdBot/1.0 (+https://your-website.example)"}
-
-    # Ensure the main cache directory exists
-    os.makedirs("bird_cache", exist_ok=True)
-
-    for species in species_list:
-        # Create a folder name, e.g. "parus_major"
-        safe_name = species.replace("+", "_").replace(" ", "_").lower()
-        cache_dir = os.path.join("bird_cache", safe_name)
-        metadata_file = os.path.join(cache_dir, "metadata.json")
-        image_file = os.path.join(cache_dir, "image_0.jpg")
-
-        # If this species is already cached, skip
-        if os.path.exists(cache_dir) and os.path.exists(metadata_file):
-            print(f"Images for '{species}' are already cached. Skipping...")
-            continue
-
-        # Otherwise, ensure a clean directory
-        if os.path.exists(cache_dir):
-            shutil.rmtree(cache_dir)
-        os.makedirs(cache_dir, exist_ok=True)
-
-        print(f"[INFO] Caching the lead Wikipedia image for '{species}'...")
-
-        # 1) Search for the Wikipedia page
-        species_search_term = species.replace("+", " ").replace("_", " ").lower()
-        print(species_search_term)
-        search_params = {
-            "action": "query",
-            "list": "search",
-            "srsearch": f"{species_search_term} +bird -chimp -ape -Pan",
-            "format": "json"
-        }
-        try:
-            resp = requests.get(WIKIPEDIA_API, headers=HEADERS, params=search_params)
-            data = resp.json()
-        except Exception as e:
-            print(f"[ERROR] Searching '{species}': {e}")
-            continue
-
-        search_results = data.get("query", {}).get("search", [])
-        if not search_results:
-            print(f"[WARN] No Wikipedia page found for '{species}'.")
-            continue
-
-        page_title = search_results[0]["title"]
-        print(page_title)
-
-        # 2) Get the pageimage (thumbnail + file name)
-        image_params = {
-            "action": "query",
-            "prop": "pageimages",
-            "titles": page_title,
-            "piprop": "thumbnail|name",
-            "pithumbsize": 800,  # ~300 px wide
-            "format": "json"
-        }
-        try:
-            img_resp = requests.get(WIKIPEDIA_API, headers=HEADERS, params=image_params)
-            img_data = img_resp.json()
-        except Exception as e:
-            print(f"[ERROR] pageimages for '{page_title}': {e}")
-            continue
-
-        pages = img_data.get("query", {}).get("pages", {})
-        if not pages:
-            print(f"[WARN] No pages returned from pageimages for '{page_title}'.")
-            continue
-
-        thumbnail_url = None
-        file_name = None
-        for _, page_info in pages.items():
-            thumb = page_info.get("thumbnail")
-            page_img_name = page_info.get("pageimage")  # e.g. "BlueTit.jpg"
-            if thumb and page_img_name:
-                thumbnail_url = thumb.get("source")
-                file_name = "File:" + page_img_name
-                break
-
-        if not thumbnail_url or not file_name:
-            print(f"[WARN] No thumbnail or file name found for '{page_title}'.")
-            continue
-
-        # 3) Fetch license & author from the File:* page
-        file_params = {
-            "action": "query",
-            "titles": file_name,
-            "prop": "imageinfo",
-            "iiprop": "extmetadata",
-            "format": "json"
-        }
-        try:
-            file_resp = requests.get(WIKIPEDIA_API, headers=HEADERS, params=file_params)
-            file_json = file_resp.json()
-        except Exception as e:
-            print(f"[ERROR] Fetching file metadata for '{file_name}': {e}")
-            continue
-
-        file_pages = file_json.get("query", {}).get("pages", {})
-        license_str = ""
-        author_str = ""
-        for _, fpage_info in file_pages.items():
-            imageinfo_list = fpage_info.get("imageinfo", [])
-            if not imageinfo_list:
-                continue
-            extmetadata = imageinfo_list[0].get("extmetadata", {})
-            license_str = extmetadata.get("LicenseShortName", {}).get("value", "")
-            author_str = extmetadata.get("Artist", {}).get("value", "")
-            break
-
-        # 4) Download the thumbnail
-        try:
-            r = requests.get(thumbnail_url, headers=HEADERS)
-            if r.status_code != 200:
-                print(f"[ERROR] Could not download image from {thumbnail_url}, code={r.status_code}")
-                continue
-
-            with open(image_file, "wb") as f:
-                f.write(r.content)
-        except Exception as e:
-            print(f"[ERROR] Downloading thumbnail for '{species}': {e}")
-            continue
-
-        # 5) Write metadata.json
-        file_metadata = [{
-            "filename": os.path.basename(image_file),
-            "license": license_str,
-            "author": author_str
-        }]
-        try:
-            with open(metadata_file, "w", encoding="utf-8") as f:
-                json.dump(file_metadata, f, ensure_ascii=False, indent=2)
-            print(f"[OK] Cached image+metadata for '{species}': {image_file}")
-        except Exception as e:
-            print(f"[ERROR] Writing metadata.json for '{species}': {e}")
-            # In case of error, optionally remove partial cache
-            # shutil.rmtree(cache_dir)
+    cache_species_images(species_list, on_cached=on_cached)
 
 
 def clear_bird_cache(): #heruntergeladene Bilder werden gelöscht. Aktuell nicht genutzte Funktion
@@ -280,6 +87,7 @@ def clear_bird_cache(): #heruntergeladene Bilder werden gelöscht. Aktuell nicht
     cache_folder = "bird_cache"
     if os.path.exists(cache_folder):
         shutil.rmtree(cache_folder)
+        get_manifest().clear()
         print("Cleared the entire bird_cache folder.")
     else:
         print("No 'bird_cache' folder found to clear.")
@@ -288,7 +96,7 @@ def clear_bird_cache(): #heruntergeladene Bilder werden gelöscht. Aktuell nicht
 def fetch_bird_image_from_commons(latin_name):
     """
     Retrieves a Tkinter PhotoImage + license + author for 'latin_name'.
-    Loads the metadata.json in bird_cache/<latin_name>, picks one image randomly,
+    Looks up the image in the image manifest (in memory),
     loads it from disk, and returns:
         {
             "photo": <Tkinter PhotoImage>,
@@ -298,89 +106,98 @@ def fetch_bird_image_from_commons(latin_name):
     or returns None if no cached images exist.
     """
 
-    # Read the metadata filegame_window.image_label.configure
     print("FETCH RUNS")
-    safe_name = latin_name.replace("+", "_").replace(" ", "_").lower()
-    cache_dir = os.path.join("bird_cache", safe_name)
-    print(cache_dir)
-    metadata_file = os.path.join(cache_dir, "metadata.json")
-
-    if not os.path.exists(metadata_file):
-        print(f"No local cache found for {latin_name}.")
-        return None
-
     try:
-        with open(metadata_file, "r", encoding="utf-8") as f:
-            file_metadata = json.load(f)
+        image_data = load_answer_image(latin_name)  # Lesen + Skalieren, siehe round_media.py
     except Exception as e:
-        print(f"Error reading metadata.json for {latin_name}:", e)
+        print(f"Error opening local image for {latin_name}:", e)
         return None
 
-    if not file_metadata:
-        print(f"Empty metadata for {latin_name}.")
+    if image_data is None:
+        print(f"No local cache found for {latin_name}.")
         return None
+    return answer_photo(image_data)
 
-    # Randomly pick one image
-    chosen = random.choice(file_metadata)
-    local_path = os.path.join(cache_dir, chosen["filename"])
 
-    if not os.path.exists(local_path):
-        print(f"Local image file missing: {local_path}")
-        return None
+# Zuletzt gezeigte Artbilder als fertige Tk-PhotoImages (nur im Tk-Hauptthread benutzen)
+answer_photo_cache = OrderedDict()
+ANSWER_PHOTO_CACHE_SIZE = 16
 
-    # Load from disk with Pillow
-    try:
-        img_pil = Image.open(local_path)
 
-        # Berechne die neue Breite basierend auf der fixen Höhe von 300px
-        width, height = img_pil.size
-        new_height = 300
-        new_width = int((new_height / height) * width)  # Verhältnis beibehalten
-
-        # Skaliere das Bild mit .thumbnail(), das das Seitenverhältnis erhält
-        img_pil.thumbnail((new_width, new_height), Image.Resampling.LANCZOS)
+def answer_photo(image_data):
+    """Macht aus einem vorbereiteten Artbild (round_media.load_answer_image) das Dictionary mit Tk-PhotoImage."""
+    key = image_data.get("key")
+    photo = answer_photo_cache.get(key) if key else None
+    if photo is None:
+        photo = ImageTk.PhotoImage(image_data["image"])
+        if key:
+            answer_photo_cache[key] = photo
+            while len(answer_photo_cache) > ANSWER_PHOTO_CACHE_SIZE:
+                answer_photo_cache.popitem(last=False)
+    else:
+        answer_photo_cache.move_to_end(key)
+    return {
+        "photo": photo,
+        "license": image_data["license"],
+        "author": image_data["author"]
+    }
 
-        # In Tkinter-kompatibles Format umwandeln
-        photo = ImageTk.PhotoImage(img_pil)
+def play_audio(game_window, audio_url, replay=False):
+    """
+    Spielt audio_url im gemeinsamen VLC-Player ab (audio_player.py: eine Instanz, nur das
+    Medium wird getauscht; play() kehrt sofort zurück und blockiert das GUI nicht).
+    replay=True spielt die laufende Aufnahme erneut aus dem Speicher.
+    """
+    player = get_player()
+    if replay:
+        player.replay(audio_url)
+    else:
+        player.play(audio_url)
+    game_window.player = player
+    return player
 
-        return {
-            "photo": photo,
-            "license": chosen["license"],
-            "author": chosen["author"]
-        }
-    except Exception as e:
-        print(f"Error opening local image {local_path}:", e)
-        return None
 
-def play_audio(game_window, audio_url):
+def fetch_and_display_sonogram(recording, label):
     """
-    Startet den Audio-Player (VLC) in einem separaten Thread, um das GUI nicht zu blockieren.
+    Zeigt das Sonogramm der Runde im Label an. Liegt es fertig im Speicher, sofort; sonst
+    rechnen (aus dem lokalen Audio) bzw. laden die Worker von sonogram_service.py, und nur
+    das Anzeigen wird per after() zurück in den Tk-Thread geholt – das Fenster friert nicht ein.
     """
-    player = vlc.MediaPlayer(audio_url)
-    game_window.player = player
+    service = get_sonogram_service()
+    sonogram_url = recording["sonogram_url"]
+    label.sonogram_url = sonogram_url  # spätere Anfragen (nächste Runde) gewinnen
+    im = service.cached_image_for(recording)
+    if im is not None:
+        show_pil_image(label, im)
+        return
 
+    def done(future):
+        try:
+            im = future.result()
+        except Exception as e:
+            print(f"Error fetching sonogram: {e}")
+            return
 
-    def run_player():
-        player.play()
+        def swap():
+            if label.winfo_exists() and getattr(label, "sonogram_url", None) == sonogram_url:
+                show_pil_image(label, im)
+        try:
+            label.after(0, swap)
+        except (tk.TclError, RuntimeError):
+            pass  # Fenster wurde inzwischen geschlossen
 
-    threading.Thread(target=run_player, daemon=True).start()
-    return player
+    service.submit_for(recording).add_done_callback(done)
 
 
-def fetch_and_display_sonogram(sonogram_url, label):
-    """
-    Lädt das Sonogramm von der URL, wandelt es in ein PhotoImage um und zeigt es in dem übergebenen Label an.
-    """
-    try:
-        with urllib.request.urlopen(sonogram_url) as u:
-            raw_data = u.read()
-        im = Image.open(io.BytesIO(raw_data))
-        im = im.resize((400, 300))  # Bei Bedarf anpassen
-        photo = ImageTk.PhotoImage(im)
-        label.config(image=photo)
-        label.image = photo  # Referenz speichern
-    except Exception as e:
-        print(f"Error fetching sonogram: {e}")
+def forget_sonogram(label):
+    """Verwirft ein noch ausstehendes Sonogramm für das Label (z.B. weil jetzt das Artbild kommt)."""
+    label.sonogram_url = None
+
+def show_pil_image(label, im):
+    """Zeigt ein bereits dekodiertes und skaliertes PIL-Bild im Label an (ohne Netz- oder Dekodierarbeit)."""
+    photo = ImageTk.PhotoImage(im)
+    label.config(image=photo)
+    label.image = photo  # Referenz speichern
 
 def show_placeholder(label):
     # Erzeuge ein Placeholder-Bild von 400x300-Bild
@@ -433,6 +250,7 @@ def plot_final_stats_matrix(matrix, save_path=None):
     - X-axis stays on top
     - Option to save as PNG for GUI integration
     """
+    import seaborn as sns  # erst hier laden: seaborn zieht pandas nach (Start ohne pandas)
     # Create masks for diagonal and off-diagonal elements
     diag_mask = np.eye(len(matrix), dtype=bool)
     off_diag_mask = ~diag_mask
@@ -555,21 +373,16 @@ def open_fullscreen_image(image):
 
 
 def load_all_species_from_csv():
+    """
+    Liefert alle deutschen Artnamen aus dem gemeinsamen Artenkatalog.
+    Die CSV wird dabei nicht erneut gelesen.
+    """
     try:
-        species_df = pd.read_csv(resource_path("Europ_Species_3.csv"))
+        return species_catalog.german_names
     except Exception as e:
         print(f"Fehler beim Laden der CSV: {e}")
         return []
 
-    # Hier nehmen wir an, dass die CSV eine Spalte "Deutsch" enthält
-    if "Deutsch" not in species_df.columns:
-        print("Spalte 'Deutsch' nicht in der CSV gefunden!")
-        return []
-
-    all_species = species_df["Deutsch"].dropna().unique().tolist()
-    all_species = [str(name).strip() for name in all_species]
-    return all_species
-
 
 
 
@@ -581,6 +394,9 @@ root.title("Vogelquiz Einstellungen")
 root.state("zoomed")
 #root.geometry("1300x900") #Größe manuell definiert
 
+# Hintergrund-Loop mit gepoolter Session starten und Verbindung zu xeno-canto schon jetzt aufbauen
+get_service().prewarm()
+
 # Erstelle einen Top-Frame, der Logo und Überschrift enthält
 top_frame = tk.Frame(root, bg=root.cget("background"))
 top_frame.pack(side="top", pady=10)
@@ -619,19 +435,31 @@ toggle_var = tk.BooleanVar(value=False)
 # Dateiname für das Speichern der Einstellungen
 settings_file = "settings.json"
 
-# Lade die CSV mit den Artennamen (Spalten: Deutsch, Wissenschaftlich, Englisch)
-species_df = pd.read_csv(resource_path("Europ_Species_3.csv"))
+# Auswahl für Länge und Qualität der Aufnahmen (Anzeige -> Wert in settings.json)
+MAX_LENGTH_OPTIONS = {"Beliebig": 0, "bis 15 s": 15, "bis 30 s": 30, "bis 1 min": 60, "bis 2 min": 120}
+MIN_QUALITY_OPTIONS = {"Beliebig": "", "nur A": "A", "mind. B": "B", "mind. C": "C", "mind. D": "D"}
+
+# Gemeinsamer Artenkatalog (Spalten: Deutsch, Wissenschaftlich, Englisch) – wird nur einmal geladen
+species_catalog = get_catalog(resource_path("Europ_Species_3.csv"))
+# Bild-Manifest (bird_cache/manifest.json) einmal beim Start laden
+image_manifest = get_manifest()
+# Hält bird_cache im Hintergrund unter dem Speicherbudget (LRU-Verdrängung)
+cache_manager = get_cache_manager().start()
 
 
 # Funktion zum Speichern der neuen Einstellungen
-def save_new_settings(species_list, var_spectro, var_image, record_type, sex_type, lifestage_type):
+def save_new_settings(species_list, var_spectro, var_image, record_type, sex_type, lifestage_type,
+                      max_length=0, min_quality="", spectrogram_range=DEFAULT_RANGE):
     settings = {
         "species_list": species_list,
         "spectrogram": var_spectro.get(),  # 1 oder 0
         "image": var_image.get(),  # 1 oder 0 (optional, hier beispielhaft)
         "record_type": record_type.get(),  # "Call" oder "Song" oder "Other:Type"
         "sex_type": sex_type.get(),
-        "lifestage_type": lifestage_type.get()
+        "lifestage_type": lifestage_type.get(),
+        "max_length": max_length,  # Sekunden, 0 = beliebig
+        "min_quality": min_quality,  # "A".."D", "" = beliebig
+        "spectrogram_range": list(spectrogram_range)  # Hz, für lokal gerechnete Spektrogramme
     }
     with open(settings_file, "w") as f:
         json.dump(settings, f)
@@ -642,6 +470,7 @@ def save_new_settings(species_list, var_spectro, var_image, record_type, sex_typ
     print(f"Aufnahmetyp: {record_type.get()}")
     print(f"sex_type: {sex_type.get()}"),
     print(f"lifestage_type: {lifestage_type.get()}")
+    print(f"Max. Länge: {max_length or 'beliebig'} | Mindestqualität: {min_quality or 'beliebig'}")
 
     # Starte das Spiel in einem neuen Fenster
     gamestart(species_list)
@@ -658,8 +487,8 @@ def present_specieslist():
     y = (screen_height /2) - (table_height /2)
     table_window.geometry(f'{table_width}x{table_height}+{int(x)}+{int(y)}')
 
-    # Sortiere die Daten alphabetisch nach der "Deutsch"-Spalte
-    df = species_df.sort_values(by="Deutsch")
+    # Sortiere die Daten alphabetisch nach der "Deutsch"-Spalte (DataFrame wird erst hier gebaut)
+    df = species_catalog.dataframe.sort_values(by="Deutsch")
 
     # Entferne die "ID"-Spalte aus dem DataFrame
     df = df.drop(columns=["ID"], errors="ignore")
@@ -942,6 +771,12 @@ def NewSet():
                                  variable=var_image, onvalue=1, offvalue=0)
     image_check.pack(side=LEFT, padx=40, pady=10)
 
+    # Frequenzbereich der Spektrogramme (wirkt, wenn sie lokal aus dem Audio gerechnet werden)
+    spectro_range = tb.Combobox(visual_frame, bootstyle="success", values=list(FREQUENCY_RANGES), width=24)
+    spectro_range['state'] = 'readonly'
+    spectro_range.set(next(iter(FREQUENCY_RANGES)))
+    spectro_range.pack(side=LEFT, padx=10, pady=10)
+
     # Radiobuttons für Aufnahmetyp (gemeinsame Variable=record_type)
     # Container-Frame für Radiobuttons und Combobox
     radio_frame = tb.Labelframe(inner, bootstyle="success",text="Soundtyp wählen")
@@ -1034,6 +869,24 @@ def NewSet():
     selected_lifestage.grid(row=2, column=2, padx=5, pady=20)
     selected_lifestage.grid_forget()
 
+    # Länge und Qualität: werden als len_lt:/q:-Filter direkt in die xeno-canto-Abfrage übernommen
+    quality_frame = tb.Labelframe(inner, bootstyle="success", text="Länge & Qualität")
+    quality_frame.pack(pady=10, fill=BOTH, expand=YES)
+    quality_frame.grid_columnconfigure(0, weight=1, uniform="col")
+    quality_frame.grid_columnconfigure(1, weight=1, uniform="col")
+
+    tb.Label(quality_frame, text="Max. Länge").grid(row=0, column=0, padx=10, pady=(10, 0))
+    selected_max_length = tb.Combobox(quality_frame, bootstyle="success", values=list(MAX_LENGTH_OPTIONS))
+    selected_max_length['state'] = 'readonly'
+    selected_max_length.set("Beliebig")
+    selected_max_length.grid(row=1, column=0, padx=10, pady=10)
+
+    tb.Label(quality_frame, text="Mindestqualität").grid(row=0, column=1, padx=10, pady=(10, 0))
+    selected_min_quality = tb.Combobox(quality_frame, bootstyle="success", values=list(MIN_QUALITY_OPTIONS))
+    selected_min_quality['state'] = 'readonly'
+    selected_min_quality.set("Beliebig")
+    selected_min_quality.grid(row=1, column=1, padx=10, pady=10)
+
     def save_and_start():
         # Falls "Other" gewählt ist, überschreibe record_type mit dem aktuellen Wert der Combobox
         if record_type.get() == "Other":
@@ -1049,7 +902,9 @@ def NewSet():
         if lifestage_type.get() == "All lifestage":
             lifestage_type.set ("")
         species_list = species_list_entry.get()
-        save_new_settings(species_list, var_spectro, var_image, record_type,sex_type, lifestage_type)
+        save_new_settings(species_list, var_spectro, var_image, record_type,sex_type, lifestage_type,
+                          MAX_LENGTH_OPTIONS[selected_max_length.get()], MIN_QUALITY_OPTIONS[selected_min_quality.get()],
+                          FREQUENCY_RANGES[spectro_range.get()])
         settings_frame.pack_forget()  # Formular ausblenden
 
 
@@ -1072,6 +927,8 @@ def load_old_settings():
             print(f"Aufnahmetyp: {settings['record_type']}")
             print(f"Geschlecht: {settings['sex_type']}")
             print(f"Alter: {settings['lifestage_type']}")
+            print(f"Max. Länge: {settings.get('max_length') or 'beliebig'} | "
+                  f"Mindestqualität: {settings.get('min_quality') or 'beliebig'}")
             gamestart(settings['species_list'])
     except FileNotFoundError:
         print("Keine alten Einstellungen gefunden.")
@@ -1079,14 +936,14 @@ def load_old_settings():
 
 
 def shuffle_settings():
-    # Lade die vollständige Artenliste (deutsche Namen) direkt aus der CSV
+    # Lade die vollständige Artenliste (deutsche Namen) aus dem Katalog im Speicher
     all_species = load_all_species_from_csv()
     if not all_species:
         print("Keine Arten gefunden!")
         return
 
     # Wähle zufällig 10 Arten aus
-    species_list = random.sample(all_species, 10)
+    species_list = species_catalog.sample(10)
 
     # Setze Spectrogram und Image automatisch auf 1
     var_spectro = 1
@@ -1133,7 +990,7 @@ def gamestart(species_list):
     canonical_species = {}
     species_options = []
     for art in Artenliste_input:
-        mapping = lookup_species(art, species_df)
+        mapping = lookup_species(art)
         if mapping:
             # Schlüssel kann z.B. der wissenschaftliche Name in Kleinbuchstaben sein:
             scient = mapping["Wissenschaftlich"].strip()
@@ -1159,10 +1016,97 @@ def gamestart(species_list):
     def on_closing():
         if hasattr(game_window, 'player'):
             game_window.player.stop()
+        game_window.warm_up.cancel()
+        game_window.prefetch.stop()
+        game_window.image_cache.stop()
+        cache_manager.set_pinned([])
         game_window.destroy()
 
     game_window.protocol("WM_DELETE_WINDOW", on_closing)
 
+    # Clip-Fenster: von langen Aufnahmen nur die ersten N Sekunden laden (0 = ganze Datei)
+    get_audio_store().set_clip_window(settings.get("clip_seconds", 0))
+    # Spektrogramme aus dem lokalen Audio rechnen (Frequenzbereich aus den Einstellungen)
+    get_sonogram_service().set_local_rendering(settings.get("local_spectrogram", True),
+                                               settings.get("spectrogram_range"))
+    # Vorliebe für schon lokal gespeicherte Aufnahmen (mit Mindestanteil neuer Aufnahmen)
+    get_sampling_policy().configure(settings.get("cache_affinity", DEFAULT_AFFINITY),
+                                    settings.get("min_novelty", DEFAULT_MIN_NOVELTY),
+                                    require_sonogram=settings.get("spectrogram") == 1)
+
+    # Filter für alle xeno-canto-Abfragen dieses Spiels
+    recording_filters = (
+        settings.get("record_type", "Call"),
+        settings.get("sex_type", ""),
+        settings.get("lifestage_type", ""),
+        settings.get("max_length", 0),
+        settings.get("min_quality", "")
+    )
+
+    # Arten, für die es mit diesen Filtern keine Aufnahmen gibt: werden nicht mehr abgefragt
+    game_window.unavailable_species = set()
+
+    def available_species():
+        pool = [s for s in species_options if s not in game_window.unavailable_species]
+        return pool or species_options  # Wenn alle leer sind, lieber weiter "Kein Recording" zeigen
+
+    def mark_unavailable(species):
+        if species in game_window.unavailable_species:
+            return
+        game_window.unavailable_species.add(species)
+        print(f"[INFO] Keine Aufnahmen für {species} mit den gewählten Filtern – Art wird übersprungen.")
+
+        def flag_button():
+            # Button bleibt als Antwortmöglichkeit, wird aber gekennzeichnet
+            btn = species_buttons[species_options.index(species)]
+            if btn.winfo_exists() and not btn.cget("text").endswith("*"):
+                btn.config(text=btn.cget("text") + " *")
+                ToolTip(btn, text="Keine Aufnahmen mit den gewählten Filtern", bootstyle=(LIGHT, INVERSE))
+        try:
+            game_window.after(0, flag_button)
+        except tk.TclError:
+            pass
+
+    def fetch_round_recording(species):
+        """
+        Lädt eine Aufnahme für species. Hat die Art mit den Filtern keine Aufnahmen,
+        wird sie ausgeschlossen und eine andere Art gezogen, statt die Runde zu verschenken.
+        Gibt (species, recording) zurück.
+        """
+        for _ in range(len(species_options)):
+            scient = canonical_species[species]["Wissenschaftlich"]
+            rec = get_random_recording(scient, *recording_filters)
+            if rec is not None or not is_known_empty(scient, *recording_filters):
+                return species, rec
+            mark_unavailable(species)
+            pool = available_species()
+            if species in pool:
+                break  # alle Arten sind leer
+            species = random.choice(pool)
+        return species, None
+
+    # Metadaten aller Arten parallel vorladen (gleichzeitig Verfügbarkeits-Check);
+    # die erste Runde wartet nur auf ihre eigene Art
+    def warm_up_progress(done, total, species, ok):
+        # Läuft auf der Service-Loop: nur after() aufrufen, alles andere im Tk-Thread
+        print(f"[INFO] Warm-up {done}/{total}: {species} {'OK' if ok else 'ohne Aufnahmen' if ok is False else 'Fehler'}")
+
+        def apply_progress():
+            if ok is False:
+                mark_unavailable(species.strip().lower())
+            if hasattr(game_window, "loading_label") and game_window.loading_label.winfo_exists():
+                game_window.loading_label.config(text=f"Neue Audios werden geladen... ({done}/{total} Arten)")
+        try:
+            game_window.after(0, apply_progress)
+        except (tk.TclError, RuntimeError):
+            pass  # Fenster wurde inzwischen geschlossen
+
+    game_window.warm_up = start_warm_up(
+        [mapping["Wissenschaftlich"] for mapping in canonical_species.values()],
+        *recording_filters,
+        progress=warm_up_progress
+    )
+
 
     game_label = tb.Label(game_window, text="Welche Art ist das?", font=("Helvetica", 20))
     game_label.pack(pady=(30,5))
@@ -1182,10 +1126,10 @@ def gamestart(species_list):
         if current_round.get("audio_player"):
             current_round["audio_player"].stop()
 
-        # Hole die aktuelle Audio-URL aus der laufenden Aufnahme
-        audio_url = current_round["recording"]["audio_url"]
+        # Lokale Datei aus dem Audio-Speicher, sobald vorhanden (wird beim ersten Abspielen gefüllt)
+        audio_url = get_audio_store().source_for(current_round["recording"], count=False)
         # Starte das Audio neu
-        player = play_audio(game_window,audio_url)
+        player = play_audio(game_window, audio_url, replay=True)
         current_round["audio_player"] = player
 
         # Fortschrittsbalken zurücksetzen
@@ -1260,13 +1204,9 @@ def gamestart(species_list):
     def create_or_update_copyright_button(parent, image_data):
         """Erstellt oder aktualisiert den Copyright-Button und passt den Tooltip-Text an."""
         try:
-            from bs4 import BeautifulSoup  # HTML-Tags entfernen
-
-            # Neue Werte abrufen
+            # Neue Werte abrufen (Autor steht im Manifest bereits als Klartext)
             photo_author = image_data.get("author", "Unbekannter Autor")
             photo_license = image_data.get("license", "Unbekannte Lizenz")
-            # Entferne HTML-Tags (z.B. <a href=...>)
-            photo_author = BeautifulSoup(photo_author, "html.parser").text
             tooltip_text = f"Foto von: {photo_author}\nLizenz: {photo_license}"
             print("DEBUG: Neuer Tooltip-Text:", tooltip_text)
 
@@ -1342,10 +1282,11 @@ def gamestart(species_list):
 
         # Bild anzeigen, falls aktiviert
         if settings.get("image") == 1:
+            forget_sonogram(image_label)
             image_label.config(image="") # Spektrogram rauslöschen
             try:
                 latin_name = canonical_species[species]["Wissenschaftlich"]
-                image_data = fetch_bird_image_from_commons(latin_name)  # Holt Bild & Metadaten
+                image_data = answer_image_data(latin_name)  # Holt Bild & Metadaten (vorbereitet aus dem Prefetch)
                 photo = image_data.get("photo")
                 # Bildinfo aktualisieren
                 create_or_update_copyright_button(media_frame, image_data)
@@ -1444,6 +1385,7 @@ def gamestart(species_list):
         row += 1
 
 
+    import pandas as pd
     # Erstelle und speichere die Matrix global als Pandas DataFrame
     global final_stats_matrix
     final_stats_matrix = pd.DataFrame(
@@ -1456,34 +1398,75 @@ def gamestart(species_list):
     current_round = {"species": None, "recording": None, "audio_player": None}
     game_window.current_round = current_round  # Speichern im Fenster, damit end_game darauf zugreifen kann
 
-    # --- Prefetch-Funktion ---
-    def prefetch_next_round():
-        def load_next():
-            # Wähle zufällig eine Art aus der kanonischen Liste
-            next_species = random.choice(species_options)
-            next_correct_scient =  canonical_species[next_species]["Wissenschaftlich"]
-            print(next_correct_scient)
-            # Lade das Recording für die nächste Runde
-            rec_data = get_random_recording(
-                next_correct_scient,
-                settings.get("record_type", "Call"),
-                settings.get("sex_type", ""),
-                settings.get("lifestage_type", "")
-            )
-            # Speichere das Ergebnis in der prefetched_round
-            game_window.prefetched_round = {
-                "species": next_species,
-                "recording": rec_data
-            }
-         # Deaktiviere den NEXT Button
-        next_button.config(state="disabled")
-
-        # Fortschrittsbalken zurücksetzen
-        audio_progress.config(value=0)
-        audio_progress.start(15)
-
-
-        threading.Thread(target=load_next, daemon=True).start()
+    # --- Prefetch-Warteschlange ---
+    def round_metadata():
+        # Wähle zufällig eine Art (mit Aufnahmen) aus der kanonischen Liste und lade ihr Recording
+        next_species = random.choice(available_species())
+        print(canonical_species[next_species]["Wissenschaftlich"])
+        next_species, rec_data = fetch_round_recording(next_species)
+        return {"species": next_species, "recording": rec_data, "media": {}}
+
+    def produce_round():
+        round_data = round_metadata()
+        # Audio, Sonogramm und Artbild gleich mit vorbereiten, damit NEXT nur noch die UI tauscht
+        round_data["media"] = build_round_bundle(
+            round_data["recording"],
+            canonical_species[round_data["species"]]["Wissenschaftlich"],
+            sonogram=settings.get("spectrogram") == 1,
+            image=settings.get("image") == 1
+        )
+        return round_data
+
+    def start_media(recording, media):
+        """Startet Audio und Sonogramm der Runde – aus dem vorgeladenen Bundle, sonst wie bisher aus dem Netz."""
+        current_round["media"] = media
+        # Vorgeladene Aufnahmen liegen schon im Audio-Speicher; sonst streamt VLC und der Speicher lädt mit
+        current_round["audio_source"] = get_audio_store().source_for(recording)
+        current_round["audio_player"] = play_audio(game_window, current_round["audio_source"])
+        preload_next_audio()
+
+        if settings.get("spectrogram") == 1 and recording.get("sonogram_url"):
+            if media.get("sonogram") is not None:
+                forget_sonogram(image_label)
+                show_pil_image(image_label, media["sonogram"])
+            else:
+                fetch_and_display_sonogram(recording, image_label)
+            return True
+        forget_sonogram(image_label)
+        image_label.config(image="")
+        return False
+
+    def preload_next_audio():
+        """Lässt VLC das Audio der nächsten vorgeladenen Runde schon analysieren."""
+        upcoming = game_window.prefetch.peek()
+        if upcoming and upcoming.get("recording"):
+            path = get_audio_store().local_path(upcoming["recording"])
+            if path:
+                get_player().preload(path)
+
+    def answer_image_data(latin_name):
+        """Artbild für die Auflösung: vorbereitet aus dem Bundle, sonst von der Platte."""
+        prepared = (current_round.get("media") or {}).get("answer_image")
+        if prepared is not None:
+            return answer_photo(prepared)
+        return fetch_bird_image_from_commons(latin_name)
+
+    # Ein Producer-Thread hält bis zu prefetch_depth Runden bereit und füllt automatisch nach
+    game_window.prefetch = PrefetchQueue(
+        produce_round, depth=settings.get("prefetch_depth", DEFAULT_DEPTH), name="round-prefetch"
+    ).start()
+
+    # Bild-Cache einmal pro Spiel im Hintergrund füllen (gestartet erst nach der ersten Runde)
+    def image_cache_progress(done, total, species, ok):
+        print(f"[INFO] Bild-Cache {done}/{total}: {species} {'bereit' if ok else 'kein Bild'}")
+
+    game_window.image_cache = ImageCacheWorker(
+        [mapping["Wissenschaftlich"] for mapping in canonical_species.values()],
+        cache_bird_images,
+        progress=image_cache_progress
+    )
+    # Arten dieses Spiels werden nicht aus dem bird_cache verdrängt
+    cache_manager.set_pinned(game_window.image_cache.species_list)
 
 
     # --- Angepasste start_round() ---
@@ -1491,6 +1474,7 @@ def gamestart(species_list):
         # Entferne das bisher angezeigte Vogelbild, falls vorhanden:
         game_window.image_label.config(image='')
         game_window.image_label.image = None
+        forget_sonogram(game_window.image_label)
 
         # Fortschrittsbalken zurücksetzen
         audio_progress.config(value=0)
@@ -1500,12 +1484,10 @@ def gamestart(species_list):
         if current_round["audio_player"]:
             current_round["audio_player"].stop()
         feedback_label.config(text="")
+        next_button.config(state="disabled")
 
 
-        # Hier wird die aktuelle Runde synchron mit Spinner geladen
-        current_species = random.choice(species_options)
-        current_round["species"] = current_species
-        correct_scient = canonical_species[current_species]["Wissenschaftlich"]
+        # Hier wird die nächste Runde geladen (mit Spinner): aus der Warteschlange oder nur die Metadaten
 
         # Spinner (indeterminate Progressbar) einblenden
         # Erstelle den Container im game_window – damit alle Kinder gemeinsam verwaltet werden
@@ -1520,40 +1502,38 @@ def gamestart(species_list):
                                      font=("Helvetica", 16),
                                      bg="#ffffff", fg="#000000")
         loading_label.place(relx=0.5, rely=0.5, anchor="center")
+        game_window.loading_label = loading_label
 
         def load_recording():
-            rec_local = get_random_recording(
-                correct_scient,
-                settings.get("record_type", "Call"),
-                settings.get("sex_type", ""),
-                settings.get("lifestage_type", "")
-            )
-
-            #Hier werden die Bilder geladen und lokal gespeichert
-            print(settings.get("image"))
+            next_data = game_window.prefetch.get_nowait()
+            if next_data is None:
+                # Noch keine fertige Runde (z.B. die erste): nicht auf Audio, Sonogramm und Artbild des
+                # Producers warten, sondern nur die Metadaten auflösen – VLC streamt die URL, das
+                # Sonogramm lädt fetch_and_display_sonogram nach
+                next_data = round_metadata()
+            if game_window.prefetch.stopped():
+                return  # Spiel wurde beendet
+            species, rec_local = next_data["species"], next_data["recording"]
+            media = next_data.get("media") or {}
+
+            # Bilder im Hintergrund cachen – erst jetzt, damit die erste Runde nicht darauf wartet
             if settings.get("image") == 1:
-                cache_bird_images(canonical_species)
+                game_window.image_cache.start()
 
             def update_ui(recording):
                 # Falls der Lade-Container noch existiert, entferne ihn vollständig
                 if hasattr(game_window, "loading_frame"):
                     game_window.loading_frame.destroy()
                     del game_window.loading_frame
+                current_round["species"] = species
                 if not recording:
                     feedback_label.config(
-                        text=f"Kein Recording für {canonical_species[current_species]['Deutsch']} gefunden, nächste Runde.")
+                        text=f"Kein Recording für {canonical_species[species]['Deutsch']} gefunden, nächste Runde.")
                     return
                 current_round["recording"] = recording
-                player = play_audio(game_window, recording["audio_url"])
-                current_round["audio_player"] = player
-
-
-                if settings.get("spectrogram") == 1 and recording.get("sonogram_url"):
-                    fetch_and_display_sonogram(recording["sonogram_url"], image_label)
+                if start_media(recording, media):
                     blank_button = tb.Button(media_frame, bootstyle="light-link") #Placeholder, damit Button nicht springen
                     blank_button.grid(row=1, column=0, padx=5, pady=2, sticky="e")
-                else:
-                    image_label.config(image="")
 
                 if settings.get("spectrogram") == 0 and settings.get("image") == 0:
                     show_placeholder(image_label)
@@ -1572,10 +1552,6 @@ def gamestart(species_list):
         threading.Thread(target=load_recording, daemon=True).start()
 
 
-        # Starte das Prefetching für die nächste Runde
-        prefetch_next_round()
-
-
     # --- Angepasste next_round() ---
     def next_round():
         hide_copyright_button()  # Button ausblenden, bevor das nächste Bild kommt
@@ -1583,6 +1559,7 @@ def gamestart(species_list):
         # Entferne das bisher angezeigte Vogelbild, falls vorhanden:
         game_window.image_label.config(image='')
         game_window.image_label.image = None
+        forget_sonogram(game_window.image_label)
 
         for btn in species_buttons:
             btn.config(state=NORMAL)
@@ -1606,8 +1583,8 @@ def gamestart(species_list):
         feedback_label.config(text="")
 
         # Prüfe, ob bereits eine vorgeladene Runde vorliegt
-        if getattr(game_window, "prefetched_round", None) is not None:
-            next_data = game_window.prefetched_round
+        next_data = game_window.prefetch.get_nowait()
+        if next_data is not None:
             # Aktualisiere current_round mit den vorgeladenen Daten
             current_round["species"] = next_data["species"]
             rec = next_data["recording"]
@@ -1615,27 +1592,14 @@ def gamestart(species_list):
             if not rec:
                 feedback_label.config(
                     text=f"Kein Recording für {canonical_species[current_round['species']]['Deutsch']} gefunden, nächste Runde.")
-                # Starte Prefetch erneut
-                prefetch_next_round()
                 return
             current_round["recording"] = rec
-            player = play_audio(game_window,rec["audio_url"])
-            current_round["audio_player"] = player
-
-
-            if settings.get("spectrogram") == 1 and rec.get("sonogram_url"):
-                fetch_and_display_sonogram(rec["sonogram_url"], image_label)
-            else:
-                image_label.config(image="")
-            # Leere die prefetched_round und lade die nächste Runde vor
-            game_window.prefetched_round = None
-            prefetch_next_round()
-
+            start_media(rec, next_data.get("media") or {})
             # Aktualisiere den Tooltip mit den kombinierten Infos:
             info_text = current_round["recording"].get("copyright_info", "Keine Info verfügbar")
             update_info_tooltip(game_window.info_button, info_text)
         else:
-            # Fallback: Falls keine vorgeladene Runde vorliegt, lade synchron
+            # Fallback: Falls noch keine Runde bereitliegt, mit Spinner nur die Metadaten laden
             start_round()
 
         if settings.get("spectrogram") == 0 and settings.get("image") == 0: #Placeholder einbauen in Media Frame
@@ -1665,10 +1629,11 @@ def gamestart(species_list):
 
         # Bild anzeigen, falls aktiviert
         if settings.get("image") == 1:
+            forget_sonogram(image_label)
             image_label.config(image="")  # Spektrogram rauslöschen
             try:
                 latin_name = canonical_species[species]["Wissenschaftlich"]
-                image_data = fetch_bird_image_from_commons(latin_name)  # Holt Bild & Metadaten
+                image_data = answer_image_data(latin_name)  # Holt Bild & Metadaten (vorbereitet aus dem Prefetch)
                 photo = image_data.get("photo")
                 # Bildinfo aktualisieren
                 create_or_update_copyright_button(media_frame, image_data)
@@ -1731,9 +1696,24 @@ def gamestart(species_list):
 
     start_round()
 
+def report_audio_stats():
+    """Trefferquote des Audio-Speichers und Zeit bis zum Ton (Median) ins Log schreiben."""
+    audio = get_audio_store().stats()
+    player = get_player().stats()
+    policy = get_sampling_policy().stats()
+    median = player["median_time_to_audio"]
+    print(f"[INFO] Audio lokal abgespielt: {audio['hit_rate']:.0%} ({audio['hits']} von {audio['hits'] + audio['misses']}), "
+          f"Zeit bis zum Ton (Median): {f'{median * 1000:.0f} ms' if median is not None else '-'}, "
+          f"Runden mit lokaler Aufnahme: {policy['cached_rate']:.0%}")
+
+
 def back_to_settings(game_window):
      if game_window.current_round.get("audio_player"):
          game_window.current_round["audio_player"].stop()
+     game_window.warm_up.cancel()
+     game_window.prefetch.stop()
+     game_window.image_cache.stop()
+     cache_manager.set_pinned([])
 
      game_window.destroy()
 
@@ -1745,6 +1725,8 @@ def end_game(game_window):
     correct_total = game_window.korrekte_antworten
     wrong_total = game_window.falsche_antworten
 
+    report_audio_stats()
+
     #Erstelle das Matrix-Bild bevor es geladen wird
     plot_final_stats_matrix(final_stats_matrix, save_path="matrix_plot.png")
 
@@ -1961,6 +1943,10 @@ def end_game(game_window):
     #close_button.pack(pady=20, anchor="center")
 
     # Game_Window automatisch schließen
+    game_window.warm_up.cancel()
+    game_window.prefetch.stop()
+    game_window.image_cache.stop()
+    cache_manager.set_pinned([])
     game_window.destroy()
 
 
@@ -3,26 +3,27 @@ import json
 import os
 import random
 import asyncio
-import aiohttp
-import vlc
 import threading
-import pandas as pd
 import urllib.request
 import io
 import base64
 from PIL import Image
-import requests
 import http.server
 import socketserver
 import threading
 from functools import partial
 import csv
 import sqlite3
-import seaborn as sns
 import matplotlib.pyplot as plt
 import numpy as np
-from bs4 import BeautifulSoup  # HTML-Tags entfernen
 import shutil
+from audio_player import get_player
+from endpoints import WIKIPEDIA_API
+from image_derivatives import derivative_rel_path
+from image_manifest import get_manifest
+from species_catalog import get_catalog
+from wiki_images import WikipediaClient, cache_species_images
+from xeno_canto import async_get_random_recording, get_service
 
 
 
@@ -79,11 +80,13 @@ def delete_all_results():
     conn.close()
     print("[INFO] Alle Einträge wurden gelöscht.")
 
-# CSV einmal global laden (z.B. beim Programmstart)
-species_df = pd.read_csv("Europ_Species_3.csv", encoding="utf-8-sig")  # Passe ggf. den Delimiter an
+# Artenkatalog einmal global laden (wird mit den anderen Frontends geteilt)
+species_catalog = get_catalog()
+# Bild-Manifest (bird_cache/manifest.json) einmal beim Start laden
+image_manifest = get_manifest()
 
 # Erstelle ein Dictionary für die Umbenennung:
-latin_to_german = dict(zip(species_df["Wissenschaftlich"], species_df["Deutsch"]))
+latin_to_german = species_catalog.latin_to_german
 
 
 def get_last_session_id():
@@ -98,31 +101,16 @@ def get_last_session_id():
     return last_session_id if last_session_id is not None else 0  # Falls leer, starte mit 0
 
 
-def lookup_species(species_input, species_df):
+def lookup_species(species_input):
     """
-    Sucht in species_df (CSV mit Spalten 'Deutsch', 'Wissenschaftlich', 'Englisch')
+    Sucht im gemeinsamen Artenkatalog (CSV mit Spalten 'Deutsch', 'Wissenschaftlich', 'Englisch')
     nach einem Eintrag, der dem normalisierten species_input entspricht.
     Gibt ein Dictionary zurück oder None, falls kein Eintrag gefunden wird.
     """
-
-    species_input_norm = species_input.strip().lower().replace("+", " ").encode("utf-8").decode("utf-8")
-
-    print(f"[DEBUG] Suche nach normalisierter Art: {species_input_norm}")
-
-    for idx, row in species_df.iterrows():
-        for col in ["Deutsch", "Wissenschaftlich", "Englisch"]:
-            val = str(row[col]).strip().lower().replace("+", " ").encode("utf-8").decode("utf-8")
-
-            if val == species_input_norm:
-                return {
-                    "Deutsch": row["Deutsch"],
-                    "Wissenschaftlich": row["Wissenschaftlich"],
-                    "Englisch": row["Englisch"],
-                    "display_language": col
-                }
-
-    print(f"[WARN] Art '{species_input}' wurde nicht gefunden!")
-    return None
+    mapping = species_catalog.lookup(species_input)
+    if mapping is None:
+        print(f"[WARN] Art '{species_input}' wurde nicht gefunden!")
+    return mapping
 
 
 def convert_species_list(species_str):
@@ -138,7 +126,7 @@ def convert_species_list(species_str):
     mapping_dict = {}
     for input_name in species_inputs:
         print(f"[DEBUG] Suche nach: {input_name}")  # Debug für jedes Item
-        mapping = lookup_species(input_name, species_df)
+        mapping = lookup_species(input_name)
 
         if mapping:
             scientific = mapping["Wissenschaftlich"].strip().lower()
@@ -158,145 +146,26 @@ def fetch_and_display_sonogram(sonogram_url, image_control: ft.Image):
     except Exception as e:
         print(f"Error fetching sonogram: {e}")
 
-# Globales Cache-Dictionary
-api_cache = {}
-
-WIKIPEDIA_API = "https://en.wikipedia.org/w/api.php"
 HEADERS = {
     "User-Agent": "BirdQuizBot/1.0 (Python Script for Bird Sound Quiz)"
 }
 
 
 #Ab hier def nicht mehr in test_df drin!!!
-def cache_bird_images(species_list):
+def cache_bird_images(species_list, on_cached=None):
     """
     Lädt und speichert Wikipedia-Bilder für die angegebenen Arten.
+    Die Wikipedia-Abfragen laufen gebündelt für die ganze Liste (siehe wiki_images.py).
     """
-    os.makedirs("bird_cache", exist_ok=True)
-
-    for species in species_list:
-        safe_name = species.replace("+", "_").replace(" ", "_").lower()
-        cache_dir = os.path.join("bird_cache", safe_name)
-        metadata_file = os.path.join(cache_dir, "metadata.json")
-        image_file = os.path.join(cache_dir, "image_0.jpg")
-
-        # Überspringen, wenn bereits gecached
-        if os.path.exists(metadata_file):
-            print(f"[INFO] Bilder für '{species}' sind bereits gecached.")
-            continue
-
-        # Existierenden Ordner löschen und neu anlegen
-        if os.path.exists(cache_dir):
-            shutil.rmtree(cache_dir)
-        os.makedirs(cache_dir, exist_ok=True)
-
-        # Wikipedia nach dem passenden Artikel durchsuchen
-        search_params = {
-            "action": "query",
-            "list": "search",
-            "srsearch": f"{species} +bird -chimp -ape -Pan",
-            "format": "json"
-        }
-        try:
-            resp = requests.get(WIKIPEDIA_API, headers=HEADERS, params=search_params)
-            data = resp.json()
-        except Exception as e:
-            print(f"[ERROR] Suche nach '{species}': {e}")
-            continue
-
-        search_results = data.get("query", {}).get("search", [])
-        if not search_results:
-            print(f"[WARN] Kein Wikipedia-Artikel für '{species}' gefunden.")
-            continue
-
-        page_title = search_results[0]["title"]
-
-        # Bild abrufen (pageimages)
-        image_params = {
-            "action": "query",
-            "prop": "pageimages",
-            "titles": page_title,
-            "piprop": "thumbnail|name",
-            "pithumbsize": 800,
-            "format": "json"
-        }
-        try:
-            img_resp = requests.get(WIKIPEDIA_API, headers=HEADERS, params=image_params)
-            img_data = img_resp.json()
-        except Exception as e:
-            print(f"[ERROR] pageimages für '{page_title}': {e}")
-            continue
-
-        pages = img_data.get("query", {}).get("pages", {})
-        thumbnail_url = None
-        file_name = None
-        for _, page_info in pages.items():
-            thumb = page_info.get("thumbnail")
-            page_img_name = page_info.get("pageimage")
-            if thumb and page_img_name:
-                thumbnail_url = thumb.get("source")
-                file_name = "File:" + page_img_name
-                break
-
-        if not thumbnail_url:
-            print(f"[WARN] Kein Thumbnail für '{page_title}' gefunden.")
-            continue
-
-        # Bild herunterladen
-        try:
-            r = requests.get(thumbnail_url, headers=HEADERS)
-            if r.status_code != 200:
-                print(f"[ERROR] Download des Bildes von {thumbnail_url} fehlgeschlagen, Code={r.status_code}")
-                continue
-
-            with open(image_file, "wb") as f:
-                f.write(r.content)
-        except Exception as e:
-            print(f"[ERROR] Thumbnail für '{species}' herunterladen: {e}")
-            continue
-
-        # Lizenz- und Autor-Informationen abrufen
-        license_params = {
-            "action": "query",
-            "titles": file_name,  # Hier wird der Bild-Dateiname genutzt
-            "prop": "imageinfo",
-            "iiprop": "url|extmetadata",
-            "format": "json"
-        }
-
-        try:
-            license_resp = requests.get(WIKIPEDIA_API, headers=HEADERS, params=license_params)
-            license_data = license_resp.json()
-
-            pages = license_data.get("query", {}).get("pages", {})
-            image_info = next(iter(pages.values()), {}).get("imageinfo", [{}])[0]
-
-            author = image_info.get("extmetadata", {}).get("Artist", {}).get("value", "Unbekannt")
-            license = image_info.get("extmetadata", {}).get("LicenseShortName", {}).get("value", "Unbekannt")
-            photo_author = BeautifulSoup(author, "html.parser").text
-        except Exception as e:
-            print(f"[ERROR] Lizenzinformationen für '{species}' abrufen: {e}")
-            photo_author = "Unbekannt"
-            license = "Unbekannt"
-
-        # Metadaten speichern
-        file_metadata = [{
-            "filename": os.path.basename(image_file),
-            "license": license,
-            "author": photo_author
-        }]
-        try:
-            with open(metadata_file, "w", encoding="utf-8") as f:
-                json.dump(file_metadata, f, ensure_ascii=False, indent=2)
-            print(f"[OK] Bild und Metadaten für '{species}' in {image_file} gespeichert.")
-        except Exception as e:
-            print(f"[ERROR] metadata.json für '{species}' schreiben: {e}")
+    cache_species_images(species_list, on_cached=on_cached,
+                         client=WikipediaClient(WIKIPEDIA_API, HEADERS))
 
 def delete_entire_image_cache():
     cache_dir = "bird_cache"
     if os.path.exists(cache_dir):
         try:
             shutil.rmtree(cache_dir)
+            get_manifest().clear()
             print("[INFO] Gesamter Bilder-Cache erfolgreich gelöscht.")
         except Exception as e:
             print(f"[ERROR] Fehler beim Löschen des Bild-Caches: {e}")
@@ -310,22 +179,19 @@ def load_bird_image(species: str) -> str:
     Gibt die URL des gecachten Vogelbildes für die gegebene Art zurück.
     Voraussetzung: Ein lokaler HTTP-Server liefert den "bird_cache"-Ordner aus.
     """
-    safe_name = species.replace("+", "_").replace(" ", "_").lower()
+    entry = get_manifest().get(species)
+    path = entry["path"] if entry else species.replace("+", "_").replace(" ", "_").lower() + "/image_0.jpg"
+    if entry:
+        try:
+            path = derivative_rel_path(species) or path  # vorskaliertes _h300-Derivat statt des Originals
+        except Exception as e:
+            print(f"[WARN] Derivat für '{species}' nicht verfügbar, nutze das Original: {e}")
     # Annahme: HTTP-Server läuft auf localhost:8000
-    return f"http://localhost:8000/{safe_name}/image_0.jpg"
+    return f"http://localhost:8000/{path}"
 
 def load_image_metadata(species: str) -> dict:
-    safe_name = species.replace("+", "_").replace(" ", "_").lower()
-    metadata_file = os.path.join("bird_cache", safe_name, "metadata.json")
-    if os.path.exists(metadata_file):
-        try:
-            with open(metadata_file, "r", encoding="utf-8") as f:
-                data = json.load(f)
-            if isinstance(data, list) and len(data) > 0:
-                return data[0]  # Metadaten des ersten Bildes zurückgeben
-        except Exception as e:
-            print(f"[ERROR] Fehler beim Laden der Metadaten für '{species}': {e}")
-    return {"license": "Unbekannt", "author": "Unbekannt"}  # Fallback
+    # Aus dem Bild-Manifest im Speicher – kein Dateizugriff
+    return get_manifest().get(species) or {"license": "Unbekannt", "author": "Unbekannt"}  # Fallback
 
 
 
@@ -339,6 +205,7 @@ def plot_final_stats_matrix(matrix, save_path="matrix_plot.png"):
     - X-axis stays on top
     - Saves as PNG for GUI integration
     """
+    import seaborn as sns  # erst hier laden: seaborn zieht pandas nach
     # 🛠 Fix für Matplotlib GUI-Problem
     plt.switch_backend("Agg")
 
@@ -397,6 +264,7 @@ def plot_final_stats_matrix(matrix, save_path="matrix_plot.png"):
 
 def plot_cumulative_accuracy():
     """Erstellt ein Liniendiagramm der kumulierten Korrektheit über alle Sessions."""
+    import pandas as pd
     conn = sqlite3.connect("game_results.db")
     query = """
         SELECT session_id, 
@@ -452,11 +320,11 @@ def get_top3_text():
 
     # 🔹 Artennamen übersetzen (falls notwendig)
     top_3_hardest = [
-        (lookup_species(name, species_df)["Deutsch"] if lookup_species(name, species_df) else name, f"{accuracy:.0f}%", total_count)
+        (lookup_species(name)["Deutsch"] if lookup_species(name) else name, f"{accuracy:.0f}%", total_count)
         for name, accuracy, total_count in top_3_hardest
     ]
     top_3_easiest = [
-        (lookup_species(name, species_df)["Deutsch"] if lookup_species(name, species_df) else name, f"{accuracy:.0f}%", total_count)
+        (lookup_species(name)["Deutsch"] if lookup_species(name) else name, f"{accuracy:.0f}%", total_count)
         for name, accuracy, total_count in top_3_easiest
     ]
 
@@ -490,11 +358,8 @@ class MainMenu(ft.View):
         def shuffle_and_start_quiz(e):
             print("[DEBUG] Quiz starten: Wähle 10 zufällige Arten")
 
-            # **Falls CSV weniger als 10 Zeilen hat, nehme alle**
-            num_species = min(10, len(species_df))
-
-            # **Wähle 10 zufällige Arten**
-            random_species = species_df.sample(n=num_species)["Deutsch"].tolist()
+            # **Wähle 10 zufällige Arten** (aus dem Katalog im Speicher; bei weniger als 10 Arten alle)
+            random_species = species_catalog.sample(10)
 
             # **Speichere die Zufallsarten als kommaseparierte Liste**
             species_list_str = ", ".join(random_species)
@@ -1128,6 +993,7 @@ class Settings(ft.View):
         # Funktion, um den Dialog-Inhalt auf die CSV-Tabelle umzustellen
         def show_csv_table(e):
             print("[DEBUG] show_csv_table wurde aufgerufen")
+            species_df = species_catalog.dataframe  # DataFrame erst bei Bedarf bauen
 
             # 🔹 Lokale Filterfunktion
             def update_table(search_value):
@@ -1598,50 +1464,16 @@ class Game(ft.View):
 
     async def async_get_random_recording(self, scientific, sound_type, selected_sex, selected_lifestage):
         """
-        Führt die API-Abfrage asynchron durch und cached die Antwort.
+        Führt die API-Abfrage asynchron über die gemeinsame xeno-canto-Session durch (mit Cache).
         Verwendet den wissenschaftlichen Namen (scientific) und zusätzliche Filter:
           - sound_type: Aufnahmetyp (z.B. "Call", "Song", etc.)
           - selected_sex: Geschlecht
           - selected_lifestage: Lifestage
         """
-        key = (scientific, sound_type, selected_sex, selected_lifestage)
-        if key in api_cache:
-            data = api_cache[key]
-        else:
-            sound_type_final = sound_type.lower() if sound_type else ""
-            type_query = f'+type:"{sound_type_final}"' if sound_type_final else ""
-            sex_type_final = selected_sex.lower() if selected_sex else ""
-            sex_query = f'+sex:"{sex_type_final}"' if sex_type_final else ""
-            lifestage_final = selected_lifestage.lower() if selected_lifestage else ""
-            lifestage_query = f'+stage:"{lifestage_final}"' if lifestage_final else ""
-            url = f'https://www.xeno-canto.org/api/2/recordings?query={scientific}{type_query}{sex_query}{lifestage_query}'
-            async with aiohttp.ClientSession() as session:
-                async with session.get(url) as response:
-                    data = await response.json()
-                    api_cache[key] = data  # Cache die Antwort
-        recordings = data.get("recordings", [])
-        if not recordings:
-            return None
-        rec = random.choice(recordings)
-        audio_url = rec.get("file")
-        sonogram_data = rec.get("sono", {}).get("med")
-        sonogram_url = "https:" + sonogram_data if sonogram_data else None
-        print(sonogram_url)
-        rec_value = rec.get("rec")
-        lic_value = rec.get("lic")
-        combined_info = ""
-        if rec_value:
-            combined_info += f"Recorded by {rec_value}"
-        if lic_value:
-            if combined_info:
-                combined_info += " | "
-            combined_info += f" \nLicensed under: https:{lic_value}"
-        return {
-            "audio_url": audio_url,
-            "sonogram_url": sonogram_url,
-            "correct_species": scientific,
-            "copyright_info": combined_info
-        }
+        # Läuft auf der Hintergrund-Loop von xeno_canto.py; die flet-Loop wartet nur auf das Ergebnis
+        return await get_service().run_async(
+            async_get_random_recording(scientific, sound_type, selected_sex, selected_lifestage)
+        )
 
     async def load_recording_async(self):
         """
@@ -1728,28 +1560,12 @@ class Game(ft.View):
     def play_audio(self, e=None):
         """Spielt das aktuelle Audio ab."""
         if self.current_audio:
-
-            self.player = vlc.MediaPlayer(self.current_audio)
-
-            def run_player():
-                self.player.play()
-
-            threading.Thread(target=run_player, daemon=True).start()
+            self.player = get_player().play(self.current_audio)
 
     def repeat_audio(self, e):
-        #Audio stoppen, damit es von vorne läuft
-        if self.player is not None:
-            self.player.stop()
-
-        """Spielt das aktuelle Audio ab."""
+        """Spielt das aktuelle Audio von vorn ab."""
         if self.current_audio:
-
-            self.player = vlc.MediaPlayer(self.current_audio)
-
-            def run_player():
-                self.player.play()
-
-            threading.Thread(target=run_player, daemon=True).start()
+            self.player = get_player().replay(self.current_audio)
 
     def save_result(self, correct_species, selected_species, is_correct):
         """Speichert das Ergebnis einer einzelnen Runde mit der aktuellen Session-ID."""
@@ -2398,6 +2214,9 @@ class UserList(ft.Column):
 
 
 def main(page: ft.Page):
+    # Gemeinsame xeno-canto-Session starten und Verbindung vorwärmen, bevor die erste Runde läuft
+    get_service().prewarm()
+
     page.title = "Sound Bird Quiz"
     page.padding = ft.padding.all(0)
     page.horizontal_alignment = "center"
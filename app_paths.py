@@ -0,0 +1,18 @@
+"""
+Gemeinsame Pfade für Programmdaten und Caches.
+"""
+import os
+
+# Relativer Cache-Ordner für Bilder (und weitere Medien), wie bisher in allen Frontends
+BIRD_CACHE_DIR = "bird_cache"
+
+
+def species_cache_dir(species):
+    """bird_cache/<art>, z.B. 'Parus+major' -> bird_cache/parus_major."""
+    return os.path.join(BIRD_CACHE_DIR, species.replace("+", "_").replace(" ", "_").lower())
+
+
+def app_data_dir():
+    """Benutzerverzeichnis für Programmdaten (wie die game_results.db unter LOCALAPPDATA)."""
+    base = os.getenv("LOCALAPPDATA") or os.path.join(os.path.expanduser("~"), ".local", "share")
+    return os.path.join(base, "SoundBirdQuiz")
@@ -0,0 +1,223 @@
+"""
+Ein wiederverwendbarer VLC-Player für alle Runden.
+
+Bisher legte jedes Abspielen einen neuen vlc.MediaPlayer an (und damit einen
+eigenen libvlc-Kontext) und startete einen Daemon-Thread nur für .play();
+gestoppte Player wurden nie freigegeben. AudioPlayer besitzt genau eine
+vlc.Instance und einen langlebigen MediaPlayer:
+  - play(source) tauscht nur das Medium (set_media) und gibt das alte frei.
+    libvlc_media_player_play() kehrt sofort zurück, ein Thread ist nicht nötig.
+  - preload(source) legt das Medium der nächsten Runde schon an und lässt es
+    von VLC im Hintergrund analysieren (parse_with_options).
+  - replay() spielt die aktuelle Aufnahme erneut – bei lokalen Dateien aus einem
+    Puffer im Speicher über Media-Callbacks, ohne erneuten Datei- oder Netzzugriff.
+stop() hat dieselbe Bedeutung wie bisher beim MediaPlayer.
+
+Für jede Runde wird die Zeit von play() bis zum Einsetzen der Wiedergabe
+(VLC-Ereignis MediaPlayerPlaying) gemessen; stats() liefert den Median.
+"""
+import ctypes
+import itertools
+import os
+import statistics
+import threading
+import time
+from collections import deque
+
+import vlc
+
+PARSE_TIMEOUT_MS = 5000
+MAX_MEMORY_BYTES = 32 * 1024 * 1024  # größere Dateien werden für replay() nicht in den Speicher gelesen
+TIME_TO_AUDIO_SAMPLES = 200  # so viele Messungen (letzte Runden) gehen in den Median ein
+
+
+class _MemoryStream:
+    def __init__(self, data):
+        self.data = data
+        self.pos = 0
+
+
+# Offene Speicher-Streams nach Schlüssel (opaque-Zeiger der Callbacks)
+_streams = {}
+_stream_ids = itertools.count(1)
+
+
+@vlc.CallbackDecorators.MediaOpenCb
+def _open_stream(opaque, datap, sizep):
+    stream = _streams.get(opaque)
+    if stream is None:
+        return -1
+    stream.pos = 0
+    datap.contents.value = opaque
+    sizep.contents.value = len(stream.data)
+    return 0
+
+
+@vlc.CallbackDecorators.MediaReadCb
+def _read_stream(opaque, buf, length):
+    stream = _streams.get(opaque)
+    if stream is None:
+        return -1
+    chunk = stream.data[stream.pos:stream.pos + length]
+    ctypes.memmove(buf, chunk, len(chunk))
+    stream.pos += len(chunk)
+    return len(chunk)
+
+
+@vlc.CallbackDecorators.MediaSeekCb
+def _seek_stream(opaque, offset):
+    stream = _streams.get(opaque)
+    if stream is None:
+        return -1
+    stream.pos = min(offset, len(stream.data))
+    return 0
+
+
+@vlc.CallbackDecorators.MediaCloseCb
+def _close_stream(opaque):
+    pass  # der Puffer gehört dem AudioPlayer und wird dort freigegeben
+
+
+class AudioPlayer:
+    def __init__(self, *instance_args):
+        self.instance = vlc.Instance("--no-video", "--quiet", *instance_args)
+        self.player = self.instance.media_player_new()
+        self._lock = threading.Lock()
+        self._media = None
+        self._source = None
+        self._preloaded = {}  # Quelle -> bereits analysiertes Medium
+        self._stream_id = None  # Speicher-Stream der aktuellen Quelle
+        self.plays = 0
+        self.preload_hits = 0
+        self.memory_replays = 0
+        self._play_started = None
+        self.time_to_audio = deque(maxlen=TIME_TO_AUDIO_SAMPLES)  # Sekunden von play() bis Ton
+        self.player.event_manager().event_attach(vlc.EventType.MediaPlayerPlaying, self._on_playing)
+
+    def _on_playing(self, event):
+        """Läuft im VLC-Thread, sobald die Wiedergabe tatsächlich beginnt."""
+        started = self._play_started
+        if started is not None:
+            self._play_started = None
+            self.time_to_audio.append(time.monotonic() - started)
+
+    def _new_media(self, source):
+        return self.instance.media_new(source)
+
+    def _set_media(self, media, source):
+        """Stoppt, tauscht das Medium und gibt das vorherige frei (mit Lock aufrufen)."""
+        self.player.stop()
+        self.player.set_media(media)
+        if self._media is not None and self._media is not media:
+            self._media.release()
+        self._media = media
+        if source != self._source:
+            self._drop_stream()
+        self._source = source
+
+    def _drop_stream(self):
+        if self._stream_id is not None:
+            _streams.pop(self._stream_id, None)
+            self._stream_id = None
+
+    def play(self, source):
+        """Spielt eine Datei oder URL ab (nutzt ein vorgeladenes Medium, falls vorhanden)."""
+        with self._lock:
+            media = self._preloaded.pop(source, None)
+            if media is not None:
+                self.preload_hits += 1
+            else:
+                media = self._new_media(source)
+            # Nicht benutzte Vorladungen freigeben (die Runde wurde übersprungen o.ä.)
+            for stale in self._preloaded.values():
+                stale.release()
+            self._preloaded.clear()
+            self._set_media(media, source)
+            self._play_started = time.monotonic()
+            self.player.play()
+            self.plays += 1
+        return self
+
+    def preload(self, source):
+        """Legt das Medium für die nächste Runde an und lässt VLC es im Hintergrund analysieren."""
+        if not source:
+            return
+        with self._lock:
+            if source in self._preloaded or source == self._source:
+                return
+            media = self._new_media(source)
+            flags = vlc.MediaParseFlag.local
+            if "://" in source:
+                flags |= vlc.MediaParseFlag.network
+            media.parse_with_options(flags, PARSE_TIMEOUT_MS)
+            self._preloaded[source] = media
+
+    def replay(self, source=None):
+        """
+        Spielt die aktuelle Aufnahme von vorn – lokale Dateien aus dem Speicher.
+        Ist source angegeben und eine andere Quelle (z.B. inzwischen lokal gespeichert), wird sie abgespielt.
+        """
+        if source and source != self._source:
+            return self.play(source)
+        with self._lock:
+            source = self._source
+            if source is None:
+                return self
+            if self._stream_id is None and os.path.isfile(source) and os.path.getsize(source) <= MAX_MEMORY_BYTES:
+                with open(source, "rb") as f:
+                    self._stream_id = next(_stream_ids)
+                    _streams[self._stream_id] = _MemoryStream(f.read())
+            if self._stream_id is not None:
+                media = self.instance.media_new_callbacks(
+                    _open_stream, _read_stream, _seek_stream, _close_stream, ctypes.c_void_p(self._stream_id))
+                self.memory_replays += 1
+            else:
+                media = self._new_media(source)
+            self._set_media(media, source)
+            self.player.play()
+            self.plays += 1
+        return self
+
+    def stop(self):
+        with self._lock:
+            self.player.stop()
+
+    def is_playing(self):
+        return bool(self.player.is_playing())
+
+    def stats(self):
+        samples = list(self.time_to_audio)
+        return {
+            "plays": self.plays,
+            "preload_hits": self.preload_hits,
+            "memory_replays": self.memory_replays,
+            "median_time_to_audio": statistics.median(samples) if samples else None,
+        }
+
+    def release(self):
+        """Gibt Player, Medien und Instanz frei (beim Beenden des Programms)."""
+        with self._lock:
+            self.player.stop()
+            for media in self._preloaded.values():
+                media.release()
+            self._preloaded.clear()
+            if self._media is not None:
+                self._media.release()
+                self._media = None
+            self._drop_stream()
+            self.player.release()
+            self.instance.release()
+
+
+_player = None
+_player_lock = threading.Lock()
+
+
+def get_player():
+    """Liefert den prozessweit geteilten AudioPlayer (eine vlc.Instance für das ganze Programm)."""
+    global _player
+    if _player is None:
+        with _player_lock:
+            if _player is None:
+                _player = AudioPlayer()
+    return _player
@@ -0,0 +1,280 @@
+"""
+Lokaler Audio-Speicher: jede xeno-canto-Aufnahme wird höchstens einmal geladen.
+
+Bisher bekam vlc.MediaPlayer die entfernte URL – jedes REPEAT und jede spätere
+Runde mit derselben Aufnahme hat die ganze Datei erneut gestreamt. Die Dateien
+liegen jetzt unter bird_cache/audio/XC<id>.mp3 (die xeno-canto-ID ändert sich nie,
+der Name adressiert also den Inhalt). Der Ordner gehört zum Speicherbudget des
+CacheManagers (cache_manager.py), dort werden alte Aufnahmen verdrängt.
+
+source_for(recording) ist der Weg für die Wiedergabe: liegt die Datei lokal vor,
+spielt VLC sie von der Platte (Treffer); sonst streamt VLC wie bisher die URL
+und die Datei wird parallel im Hintergrund in den Speicher geladen (Fehlschlag),
+so dass schon das erste REPEAT lokal läuft. Gezählt wird nur der erste Abruf
+einer Runde, REPEAT übergibt count=False. fetch() lädt blockierend (für das
+Vorladen der Runden in round_media.py).
+
+Clip-Modus (set_clip_window): Für eine Quizrunde reicht der Anfang einer
+Aufnahme. Ist ein Clip-Fenster gesetzt, wird von längeren Aufnahmen nur der
+passende Byte-Bereich per HTTP-Range geladen und als XC<id>.clip<N>s.mp3
+gespeichert. Die Größe ergibt sich aus der Gesamtgröße (Content-Range) und der
+Länge laut xeno-canto ("length"), also aus der mittleren Bitrate der Datei.
+
+local_ids() (Auswahl der Runden, sampling_policy.py) liest nicht das Verzeichnis,
+sondern eine Menge im Speicher: einmal aus dem Verzeichnis gefüllt, danach bei
+jedem Download ergänzt und bei jeder Verdrängung durch den CacheManager bereinigt.
+"""
+import math
+import hashlib
+import os
+import threading
+
+import requests
+
+from app_paths import BIRD_CACHE_DIR
+from cache_manager import get_cache_manager
+from recording_store import length_seconds
+
+AUDIO_DIR = os.path.join(BIRD_CACHE_DIR, "audio")
+TIMEOUT = (5, 30)
+CLIP_MAX_BITRATE = 320000  # bit/s – obere Grenze für die erste Range-Anfrage (MP3 hat höchstens 320 kbit/s)
+CLIP_MARGIN = 1.05  # etwas mehr laden, da die Bitrate innerhalb der Datei schwanken kann
+
+HEADERS = {
+    "User-Agent": "BirdQuizBot/1.0 (Python Script for Bird Sound Quiz)"
+}
+
+
+class AudioStore:
+    def __init__(self, directory=AUDIO_DIR, session=None):
+        self.directory = directory
+        self.session = session or requests.Session()
+        self.session.headers.update(HEADERS)
+        self._lock = threading.Lock()
+        self._inflight = {}  # Dateiname -> Event, solange die Datei geladen wird
+        self._local = None  # Endung (".mp3", ".clip<N>s.mp3") -> xeno-canto-IDs; None = noch nicht gelesen
+        self.hits = 0
+        self.misses = 0
+        self.downloads = 0
+        self.bytes_downloaded = 0
+        self.bytes_skipped = 0  # im Clip-Modus nicht geladene Bytes
+        self.clip_seconds = 0
+
+    def set_clip_window(self, seconds):
+        """Nur die ersten `seconds` Sekunden laden (0 = immer die ganze Datei)."""
+        self.clip_seconds = max(0, int(seconds or 0))
+
+    def clip_for(self, recording):
+        """Clip-Länge in Sekunden für diese Aufnahme oder 0, wenn die ganze Datei geladen wird."""
+        length = length_seconds(recording.get("length", ""))
+        if self.clip_seconds and length > self.clip_seconds * CLIP_MARGIN:
+            return self.clip_seconds
+        return 0
+
+    @staticmethod
+    def file_name(recording, clip=0):
+        """XC<id>.mp3 bzw. XC<id>.clip<N>s.mp3; ohne ID (ältere Runden-Dictionaries) der Hash der URL."""
+        if recording.get("id"):
+            base = f"XC{recording['id']}"
+        else:
+            base = hashlib.sha1(recording["audio_url"].encode("utf-8")).hexdigest()
+        return f"{base}.clip{clip}s.mp3" if clip else base + ".mp3"
+
+    def path(self, recording, clip=0):
+        # Absolut, da VLC relative Pfade nicht überall gleich auflöst
+        return os.path.abspath(os.path.join(self.directory, self.file_name(recording, clip)))
+
+    def local_path(self, recording):
+        """Pfad der lokalen Datei (ganz oder passender Clip) oder None (zählt nicht als Treffer/Fehlschlag)."""
+        candidates = [self.path(recording)]
+        clip = self.clip_for(recording)
+        if clip:
+            candidates.append(self.path(recording, clip))
+        for path in candidates:
+            if os.path.exists(path):
+                get_cache_manager().touch("audio/" + os.path.basename(path))
+                return path
+        return None
+
+    @staticmethod
+    def _split_name(name):
+        """XC<id>.mp3 -> ("<id>", ".mp3"); andere Dateien -> None."""
+        base, _, suffix = name.partition(".")
+        if base.startswith("XC") and suffix.endswith("mp3"):
+            return base[2:], "." + suffix
+        return None
+
+    def _local_index(self):
+        """Endung -> IDs; beim ersten Aufruf einmal aus dem Verzeichnis gelesen (Aufrufer hält _lock)."""
+        if self._local is None:
+            self._local = {}
+            try:
+                names = os.listdir(self.directory)
+            except OSError:
+                names = []
+            for name in names:
+                parts = self._split_name(name)
+                if parts:
+                    self._local.setdefault(parts[1], set()).add(parts[0])
+        return self._local
+
+    def _remember(self, name):
+        parts = self._split_name(name)
+        if parts:
+            with self._lock:
+                self._local_index().setdefault(parts[1], set()).add(parts[0])
+
+    def forget(self, name):
+        """Datei wurde entfernt (vom CacheManager gemeldet)."""
+        parts = self._split_name(name)
+        if parts:
+            with self._lock:
+                self._local_index().get(parts[1], set()).discard(parts[0])
+
+    def local_ids(self):
+        """
+        xeno-canto-IDs aller Aufnahmen, die lokal abspielbar sind (ganze Datei oder Clip
+        mit dem aktuellen Fenster). Aus dem Speicher, ohne Zugriff auf die Platte.
+        """
+        with self._lock:
+            index = self._local_index()
+            ids = set(index.get(".mp3", ()))
+            if self.clip_seconds:
+                ids |= index.get(f".clip{self.clip_seconds}s.mp3", set())
+        return ids
+
+    def source_for(self, recording, count=True):
+        """
+        Was VLC abspielen soll: die lokale Datei oder – beim ersten Mal – die URL.
+        count=False für REPEAT: Treffer/Fehlschläge werden einmal pro Runde gezählt.
+        """
+        path = self.local_path(recording)
+        if count:
+            with self._lock:
+                if path:
+                    self.hits += 1
+                else:
+                    self.misses += 1
+        if path:
+            return path
+        self.fill_async(recording)
+        return recording["audio_url"]
+
+    def fill_async(self, recording):
+        """Lädt die Aufnahme im Hintergrund in den Speicher (läuft parallel zum Streamen in VLC)."""
+        def run():
+            try:
+                self.fetch(recording)
+            except Exception as e:
+                print(f"[WARN] Audio konnte nicht lokal gespeichert werden: {e}")
+
+        threading.Thread(target=run, name="audio-store", daemon=True).start()
+
+    def fetch(self, recording):
+        """Lädt die Aufnahme (falls nötig) und gibt den lokalen Pfad zurück; gleichzeitige Aufrufe laden nur einmal."""
+        path = self.local_path(recording)
+        if path:
+            return path
+        clip = self.clip_for(recording)
+        name = self.file_name(recording, clip)
+        with self._lock:
+            event = self._inflight.get(name)
+            owner = event is None
+            if owner:
+                event = self._inflight[name] = threading.Event()
+        if not owner:
+            event.wait()
+            path = self.local_path(recording)
+            if path is None:
+                raise RuntimeError(f"Download von {recording['audio_url']} fehlgeschlagen")
+            return path
+
+        try:
+            if clip:
+                return self._download(recording["audio_url"], self.path(recording, clip),
+                                      clip / length_seconds(recording["length"]))
+            return self._download(recording["audio_url"], self.path(recording))
+        finally:
+            with self._lock:
+                self._inflight.pop(name, None)
+            event.set()
+
+    def _download(self, audio_url, path, fraction=None):
+        """Lädt die Datei nach path; mit fraction nur diesen Anteil vom Anfang (HTTP-Range)."""
+        os.makedirs(self.directory, exist_ok=True)
+        tmp_path = path + ".part"
+        size = 0
+        total = None
+        headers = None
+        if fraction:
+            # Obergrenze für die erste Anfrage; die genaue Menge folgt aus der Gesamtgröße
+            guess = math.ceil(self.clip_seconds * CLIP_MAX_BITRATE / 8 * CLIP_MARGIN)
+            headers = {"Range": f"bytes=0-{guess - 1}"}
+        try:
+            with self.session.get(audio_url, stream=True, timeout=TIMEOUT, headers=headers) as response:
+                response.raise_for_status()
+                limit = None
+                if fraction:
+                    total = self._total_size(response)
+                    if total:
+                        limit = math.ceil(total * fraction * CLIP_MARGIN)
+                with open(tmp_path, "wb") as f:
+                    for chunk in response.iter_content(chunk_size=65536):
+                        if limit is not None and size + len(chunk) >= limit:
+                            f.write(chunk[:limit - size])
+                            size = limit
+                            break  # Rest nicht mehr lesen; die Verbindung wird verworfen
+                        f.write(chunk)
+                        size += len(chunk)
+            os.replace(tmp_path, path)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        self._remember(os.path.basename(path))
+        with self._lock:
+            self.downloads += 1
+            self.bytes_downloaded += size
+            if total:
+                self.bytes_skipped += max(0, total - size)
+        manager = get_cache_manager()
+        manager.touch("audio/" + os.path.basename(path))
+        manager.request_check()
+        return path
+
+    @staticmethod
+    def _total_size(response):
+        """Gesamtgröße der Datei aus Content-Range (206) bzw. Content-Length (200, Server ohne Range)."""
+        content_range = response.headers.get("Content-Range", "")
+        if response.status_code == 206 and "/" in content_range:
+            total = content_range.rsplit("/", 1)[1]
+            return int(total) if total.isdigit() else None
+        length = response.headers.get("Content-Length", "")
+        return int(length) if length.isdigit() else None
+
+    def stats(self):
+        with self._lock:
+            plays = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / plays if plays else 0.0,
+                "downloads": self.downloads,
+                "bytes_downloaded": self.bytes_downloaded,
+                "bytes_skipped": self.bytes_skipped,
+            }
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_audio_store():
+    """Liefert den prozessweit geteilten AudioStore."""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = AudioStore()
+                get_cache_manager().add_pool_listener("audio", _store.forget)
+    return _store
@@ -0,0 +1,68 @@
+"""
+Benchmark: ganze Audiodateien gegen Clip-Fenster (HTTP-Range) im Audio-Speicher.
+
+Läuft gegen den lokalen Fake-Server (fake_server.py) mit langen Aufnahmen
+(stille 128-kbit/s-MP3) und fester Latenz pro Anfrage. Gemessen werden geladene
+Bytes und Zeit pro Runde – einmal ganze Dateien, einmal nur die ersten N Sekunden.
+Auf localhost zählt vor allem die Byte-Ersparnis; die Zeit hängt im echten Netz
+von der Bandbreite ab.
+    python benchmarks/bench_audio_clip.py [runden] [aufnahmelänge_s] [clip_s]
+"""
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fake_server import FakeServer  # noqa: E402
+
+ROUNDS = 20
+RECORDING_SECONDS = 180
+CLIP_SECONDS = 20
+LATENCY = 0.05
+
+
+def recordings(base_url, count, seconds):
+    return [{"id": str(900000 + i), "audio_url": f"{base_url}/audio/XC{900000 + i}.mp3",
+             "length": f"{seconds // 60}:{seconds % 60:02d}"} for i in range(count)]
+
+
+def run(recs, clip_seconds):
+    from audio_store import AudioStore
+
+    directory = tempfile.mkdtemp(prefix="bench_audio_")
+    store = AudioStore(directory)
+    store.set_clip_window(clip_seconds)
+    try:
+        start = time.perf_counter()
+        for rec in recs:
+            store.fetch(rec)
+        elapsed = time.perf_counter() - start
+        return elapsed, store.stats()
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+def main():
+    rounds = int(sys.argv[1]) if len(sys.argv) > 1 else ROUNDS
+    seconds = int(sys.argv[2]) if len(sys.argv) > 2 else RECORDING_SECONDS
+    clip = int(sys.argv[3]) if len(sys.argv) > 3 else CLIP_SECONDS
+    server = FakeServer(latency=LATENCY, audio_seconds=seconds).start()
+    try:
+        recs = recordings(server.base_url, rounds, seconds)
+        t_full, full = run(recs, 0)
+        t_clip, clipped = run(recs, clip)
+    finally:
+        server.stop()
+
+    print(f"{rounds} Runden, Aufnahmen à {seconds} s, Clip-Fenster {clip} s, Latenz {LATENCY * 1000:.0f} ms")
+    print(f"ganze Dateien: {full['bytes_downloaded'] / rounds / 1024:8.1f} KB/Runde  {t_full / rounds * 1000:7.1f} ms/Runde")
+    print(f"Clip (Range):  {clipped['bytes_downloaded'] / rounds / 1024:8.1f} KB/Runde  {t_clip / rounds * 1000:7.1f} ms/Runde")
+    print(f"gespart:       {clipped['bytes_skipped'] / max(full['bytes_downloaded'], 1):.0%} der Bytes, "
+          f"{1 - t_clip / t_full:.0%} der Zeit")
+
+
+if __name__ == "__main__":
+    main()
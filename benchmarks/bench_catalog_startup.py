@@ -0,0 +1,90 @@
+"""
+Startup-Benchmark: Artenliste per pandas.read_csv gegen den Binär-Snapshot.
+
+Jede Variante läuft in einem frischen Python-Prozess (Kaltstart inkl. Imports).
+Die Ersparnis gibt es nur, wenn auch die Frontends pandas nicht beim Start laden;
+darum wird zusätzlich geprüft, dass kein Frontend pandas oder seaborn (das pandas
+nachlädt) auf Modulebene importiert.
+Aufruf aus dem Projektordner:
+    python benchmarks/bench_catalog_startup.py
+"""
+import ast
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RUNS = 7
+FRONTENDS = ("BirdQuiz.py", "test_df.py", "Testmitflet.py")
+HEAVY_MODULES = ("pandas", "seaborn")
+
+PANDAS_CODE = """
+import time; t = time.perf_counter()
+import pandas as pd
+from species_resolver import SpeciesResolver
+df = pd.read_csv("Europ_Species_3.csv", encoding="utf-8-sig")
+SpeciesResolver.from_dataframe(df).lookup("Kohlmeise")
+print(time.perf_counter() - t)
+"""
+
+SNAPSHOT_CODE = """
+import time; t = time.perf_counter()
+import sys
+from species_catalog import SpeciesCatalog
+c = SpeciesCatalog("Europ_Species_3.csv", snapshot_path=sys.argv[1])
+c.lookup("Kohlmeise")
+assert "pandas" not in sys.modules
+print(time.perf_counter() - t)
+"""
+
+
+def run(code, *args):
+    times = []
+    for _ in range(RUNS):
+        out = subprocess.run([sys.executable, "-c", code, *args], cwd=ROOT,
+                             capture_output=True, text=True, check=True).stdout
+        times.append(float(out.strip().splitlines()[-1]))
+    return statistics.median(times)
+
+
+def top_level_heavy_imports(path):
+    """Module aus HEAVY_MODULES, die `path` beim Start (auf Modulebene) importiert."""
+    with open(path, encoding="utf-8") as f:
+        tree = ast.parse(f.read(), filename=path)
+    found = set()
+    for node in tree.body:
+        if isinstance(node, ast.Import):
+            names = [alias.name for alias in node.names]
+        elif isinstance(node, ast.ImportFrom):
+            names = [node.module or ""]
+        else:
+            continue
+        found.update(name.split(".")[0] for name in names if name.split(".")[0] in HEAVY_MODULES)
+    return sorted(found)
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        snapshot_path = os.path.join(tmp, "species_catalog.snapshot")
+        # Erster Lauf erzeugt den Snapshot (entspricht dem ersten Start nach einer CSV-Änderung)
+        subprocess.run([sys.executable, "-c", SNAPSHOT_CODE, snapshot_path], cwd=ROOT,
+                       capture_output=True, check=True)
+        t_pandas = run(PANDAS_CODE)
+        t_snapshot = run(SNAPSHOT_CODE, snapshot_path)
+
+    print(f"Median über {RUNS} Kaltstarts (Import + Laden + erste Suche)")
+    print(f"pandas.read_csv + Index:  {t_pandas * 1000:8.1f} ms")
+    print(f"Binär-Snapshot:           {t_snapshot * 1000:8.1f} ms")
+    print(f"Ersparnis:                {(t_pandas - t_snapshot) * 1000:8.1f} ms")
+    for name in FRONTENDS:
+        heavy = top_level_heavy_imports(os.path.join(ROOT, name))
+        if heavy:
+            print(f"[WARN] {name} importiert beim Start {', '.join(heavy)} – die Ersparnis geht verloren")
+        else:
+            print(f"[OK] {name} lädt pandas erst für die Statistik")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""
+Micro-Benchmark: altes lookup_species (iterrows über die ganze CSV) gegen SpeciesResolver.
+
+Aufruf aus dem Projektordner:
+    python benchmarks/bench_lookup_species.py
+"""
+import os
+import random
+import sys
+import timeit
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from species_resolver import SpeciesResolver  # noqa: E402
+
+CSV_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "Europ_Species_3.csv")
+
+
+def lookup_species_iterrows(species_input, species_df):
+    """Bisherige Implementierung aus BirdQuiz.py (als Referenz)."""
+    species_input_norm = species_input.strip().lower().replace("+", " ")
+    for idx, row in species_df.iterrows():
+        for col in ["Deutsch", "Wissenschaftlich", "Englisch"]:
+            val = str(row[col]).strip().lower().replace("+", " ")
+            if val == species_input_norm:
+                return {
+                    "Deutsch": row["Deutsch"],
+                    "Wissenschaftlich": row["Wissenschaftlich"],
+                    "Englisch": row["Englisch"],
+                    "display_language": col
+                }
+    return None
+
+
+def main():
+    species_df = pd.read_csv(CSV_PATH, encoding="utf-8-sig")
+    resolver = SpeciesResolver.from_dataframe(species_df)
+
+    # Gemischte Eingaben: alle drei Sprachen + ein paar unbekannte Namen
+    rng = random.Random(42)
+    names = []
+    for _ in range(30):
+        row = species_df.iloc[rng.randrange(len(species_df))]
+        names.append(row[rng.choice(["Deutsch", "Wissenschaftlich", "Englisch"])])
+    names += ["Gibt es nicht", "Dodo"]
+
+    # Gleiches Ergebnis prüfen
+    for name in names:
+        old = lookup_species_iterrows(name, species_df)
+        new = resolver.lookup(name)
+        assert old == new, (name, old, new)
+
+    n_old = 3
+    t_old = timeit.timeit(lambda: [lookup_species_iterrows(n, species_df) for n in names], number=n_old) / n_old
+    n_new = 2000
+    t_new = timeit.timeit(lambda: [resolver.lookup(n) for n in names], number=n_new) / n_new
+    t_build = timeit.timeit(lambda: SpeciesResolver.from_dataframe(species_df), number=20) / 20
+
+    print(f"{len(species_df)} Zeilen, {len(names)} Suchen pro Durchlauf")
+    print(f"iterrows:         {t_old * 1000:10.3f} ms pro Durchlauf")
+    print(f"SpeciesResolver:  {t_new * 1000:10.3f} ms pro Durchlauf")
+    print(f"Index-Aufbau:     {t_build * 1000:10.3f} ms (einmalig beim Laden)")
+    print(f"Faktor:           {t_old / t_new:10.0f}x")
+
+
+if __name__ == "__main__":
+    main()
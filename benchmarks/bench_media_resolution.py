@@ -0,0 +1,58 @@
+"""
+Geladene Pixel pro Runde: feste Größen (bisher) gegen die Auswahl nach Anzeigegröße.
+
+Für die Anzeigen beider Frontends (bei Skalierungsfaktor 1 und 2) wird verglichen,
+welche Fassung geladen wird und wie viele Pixel davon dekodiert und wieder
+verworfen werden:
+  - bisher: Artbild mit pithumbsize=800, Sonogramm immer sono.med
+  - neu:    display_resolution.ResolutionPolicy
+Bei den Artbildern wird ein 3:2-Foto im Querformat angenommen. Die Bytes echter
+JPEGs und PNGs wachsen grob mit der Pixelzahl.
+    python benchmarks/bench_media_resolution.py
+"""
+import math
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from display_resolution import SONO_VARIANTS, ResolutionPolicy  # noqa: E402
+
+OLD_THUMB_SIZE = 800
+OLD_SONO_VARIANT = "med"
+PHOTO = (3, 2)
+
+# Frontend -> (Sonogramm (Breite, Höhe), Höhe des Artbilds) in logischen Pixeln;
+# Tk zeigt die Bilder 1:1 in Gerätepixeln (Höhe 0 = nur das Derivat)
+DISPLAYS = {
+    "BirdQuiz (Tk)": ((400, 300), 0),
+    "test_df (flet)": ((480, 160), 160),
+}
+
+
+def thumb_pixels(long_side):
+    width = long_side
+    height = math.ceil(long_side * PHOTO[1] / PHOTO[0])
+    return width * height
+
+
+def sono_pixels(variant):
+    width, height = dict(SONO_VARIANTS)[variant]
+    return width * height
+
+
+def main():
+    print(f"{'Anzeige':22s} {'Faktor':>6s}  {'Sonogramm bisher -> neu':>26s}  {'Artbild bisher -> neu':>24s}  Pixel")
+    for name, (sono_size, image_height) in DISPLAYS.items():
+        for scale in ((1.0,) if not image_height else (1.0, 2.0)):
+            policy = ResolutionPolicy(scale, image_height)
+            variant = policy.sono_variant(policy.device_size(sono_size))
+            thumb = policy.answer_thumb_size()
+            old = sono_pixels(OLD_SONO_VARIANT) + thumb_pixels(OLD_THUMB_SIZE)
+            new = sono_pixels(variant) + thumb_pixels(thumb)
+            print(f"{name:22s} {scale:6.1f}  {OLD_SONO_VARIANT:>12s} -> {variant:<11s}  "
+                  f"{OLD_THUMB_SIZE:>10d} -> {thumb:<11d}  {new / old * 100:4.0f} %")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""
+Dauertest: viele Runden Wiedergabe mit dem geteilten AudioPlayer gegen das alte Muster.
+
+Misst nach je 100 Runden die Anzahl der Threads und der offenen Handles des
+Prozesses (Linux: /proc/self/fd, Windows: psutil num_handles). Jede Runde:
+Vorladen der nächsten Datei, Abspielen, gelegentlich REPEAT, Stop.
+  - neu:    audio_player.AudioPlayer (eine vlc.Instance, ein MediaPlayer)
+  - --legacy: wie bisher ein vlc.MediaPlayer plus ein Daemon-Thread pro Abspielen
+Braucht python-vlc und libvlc; die Ausgabe erfolgt über --aout=dummy.
+    python benchmarks/bench_player_soak.py [runden] [--legacy]
+"""
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fake_server import mp3_bytes  # noqa: E402
+
+ROUNDS = 500
+FILES = 10
+REPORT_EVERY = 100
+PLAY_SECONDS = 0.05
+
+
+def open_handles():
+    if os.path.isdir("/proc/self/fd"):
+        return len(os.listdir("/proc/self/fd"))
+    try:
+        import psutil
+        return psutil.Process().num_handles()
+    except (ImportError, AttributeError):
+        return -1
+
+
+def make_files(directory, count):
+    paths = []
+    for i in range(count):
+        path = os.path.join(directory, f"XC{i}.mp3")
+        with open(path, "wb") as f:
+            f.write(mp3_bytes(2))
+        paths.append(path)
+    return paths
+
+
+def soak_player(paths, rounds):
+    from audio_player import AudioPlayer
+
+    player = AudioPlayer("--aout=dummy")
+    for i in range(1, rounds + 1):
+        player.play(paths[i % len(paths)])
+        player.preload(paths[(i + 1) % len(paths)])
+        time.sleep(PLAY_SECONDS)
+        if i % 5 == 0:
+            player.replay()
+            time.sleep(PLAY_SECONDS)
+        player.stop()
+        if i % REPORT_EVERY == 0:
+            report(i)
+    print(f"[INFO] Vorladungen genutzt: {player.preload_hits}, REPEAT aus dem Speicher: {player.memory_replays}")
+    player.release()
+
+
+def soak_legacy(paths, rounds):
+    import vlc
+
+    player = None
+    for i in range(1, rounds + 1):
+        for _ in range(2 if i % 5 == 0 else 1):
+            if player:
+                player.stop()
+            player = vlc.MediaPlayer(paths[i % len(paths)], "--aout=dummy")
+            threading.Thread(target=player.play, daemon=True).start()
+            time.sleep(PLAY_SECONDS)
+        player.stop()
+        if i % REPORT_EVERY == 0:
+            report(i)
+
+
+def report(i):
+    print(f"Runde {i:4d}: {threading.active_count():3d} Threads, {open_handles():5d} Handles")
+
+
+def main():
+    legacy = "--legacy" in sys.argv
+    args = [arg for arg in sys.argv[1:] if not arg.startswith("--")]
+    rounds = int(args[0]) if args else ROUNDS
+    directory = tempfile.mkdtemp(prefix="bench_player_")
+    try:
+        paths = make_files(directory, FILES)
+        print(f"{rounds} Runden, {'altes Muster (MediaPlayer pro Abspielen)' if legacy else 'AudioPlayer'}")
+        report(0)
+        start = time.perf_counter()
+        (soak_legacy if legacy else soak_player)(paths, rounds)
+        print(f"Dauer: {time.perf_counter() - start:.1f} s")
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""
+Speicher-Benchmark: vollständige xeno-canto-JSON im api_cache gegen RecordingPage (recording_store.py).
+
+Ohne Argument werden synthetische Antworten mit dem vollen Feldsatz der API v2
+erzeugt (500 Aufnahmen pro Seite). Alternativ kann eine gespeicherte echte
+Antwort übergeben werden, sie wird dann für jede "Art" wiederverwendet:
+    python benchmarks/bench_recording_memory.py [antwort.json]
+"""
+import gc
+import json
+import os
+import random
+import sys
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from recording_store import RecordingPage  # noqa: E402
+
+SPECIES = 30
+PER_PAGE = 500
+RECORDISTS = [f"Recordist {i}" for i in range(60)]
+LICENSES = ["//creativecommons.org/licenses/by-nc-sa/4.0/", "//creativecommons.org/licenses/by-nc-nd/4.0/",
+            "//creativecommons.org/licenses/by-sa/4.0/"]
+TYPES = ["song", "call", "alarm call", "flight call", "call, song"]
+
+
+def synthetic_recording(i, rng):
+    rid = str(100000 + i)
+    path = f"//xeno-canto.org/sounds/uploaded/ABCDEFGHIJ/ffts/XC{rid}"
+    return {
+        "id": rid, "gen": "Parus", "sp": "major", "ssp": "", "group": "birds", "en": "Great Tit",
+        "rec": rng.choice(RECORDISTS), "cnt": "Germany", "loc": f"Somewhere near village {i % 300}, Bayern",
+        "lat": f"{rng.uniform(47, 55):.4f}", "lng": f"{rng.uniform(6, 15):.4f}", "alt": str(rng.randint(0, 1500)),
+        "type": rng.choice(TYPES), "sex": rng.choice(["male", "female", ""]), "stage": "adult",
+        "method": "field recording", "url": f"//xeno-canto.org/{rid}",
+        "file": f"https://xeno-canto.org/{rid}/download", "file-name": f"XC{rid}-Parus-major-{i}.mp3",
+        "sono": {"small": path + "-small.png", "med": path + "-med.png", "large": path + "-large.png",
+                 "full": path + "-full.png"},
+        "osci": {"large": path + "-osc-large.png", "med": path + "-osc-med.png", "small": path + "-osc-small.png"},
+        "lic": rng.choice(LICENSES), "q": rng.choice("ABCDE"), "length": f"{rng.randint(0, 3)}:{rng.randint(0, 59):02d}",
+        "time": "07:30", "date": "2021-05-04", "uploaded": "2021-05-06",
+        "also": [f"Species {j}" for j in range(rng.randint(0, 4))],
+        "rmk": "Recorded in mixed forest at dawn, several individuals singing nearby. " * rng.randint(1, 4),
+        "animal-seen": "yes", "playback-used": "no", "temp": "", "regnr": "", "auto": "no",
+        "dvc": "Zoom H5", "mic": "Sennheiser ME66", "smp": "48000",
+    }
+
+
+def synthetic_response(seed):
+    rng = random.Random(seed)
+    recordings = [synthetic_recording(seed * PER_PAGE + i, rng) for i in range(PER_PAGE)]
+    return {"numRecordings": str(PER_PAGE * 4), "numSpecies": "1", "page": 1, "numPages": 4,
+            "recordings": recordings}
+
+
+def measure(build):
+    gc.collect()
+    tracemalloc.start()
+    cache = build()
+    gc.collect()
+    current, _peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return cache, current
+
+
+def main():
+    if len(sys.argv) > 1:
+        with open(sys.argv[1], "r", encoding="utf-8") as f:
+            raw = f.read()
+        responses = lambda: [json.loads(raw) for _ in range(SPECIES)]
+    else:
+        # Die JSON-Texte vorab erzeugen, gemessen wird nur das Parsen und Halten
+        raws = [json.dumps(synthetic_response(seed)) for seed in range(SPECIES)]
+        responses = lambda: [json.loads(raw) for raw in raws]
+
+    full_cache, full_bytes = measure(lambda: {i: data for i, data in enumerate(responses())})
+    recordings = sum(len(data["recordings"]) for data in full_cache.values())
+    del full_cache
+
+    _compact, compact_bytes = measure(lambda: {i: RecordingPage.from_api(data) for i, data in enumerate(responses())})
+
+    print(f"{SPECIES} Antworten mit zusammen {recordings} Aufnahmen")
+    print(f"Vollständige JSON im api_cache: {full_bytes / 1024 / 1024:8.2f} MB")
+    print(f"RecordingPage (__slots__):      {compact_bytes / 1024 / 1024:8.2f} MB")
+    print(f"Faktor:                         {full_bytes / compact_bytes:8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
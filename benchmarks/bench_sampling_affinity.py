@@ -0,0 +1,79 @@
+"""
+Benchmark: Auswahl der Aufnahmen mit und ohne Vorliebe für lokale Medien.
+
+Spielt gegen den lokalen Fake-Server (fake_server.py) viele Runden mit wenigen
+Arten durch. Pro Runde wird wie im Spiel eine Aufnahme gezogen und ihr Audio
+bereitgestellt: liegt die Datei schon im Audio-Speicher, ist sie sofort da
+(Treffer), sonst wird sie geladen (Fehlschlag). Als Zeit bis zum Ton zählt
+hier die Zeit bis die Datei lokal vorliegt (ohne VLC).
+Verglichen werden verschiedene Werte für cache_affinity bei gleicher Mindest-Neuheit.
+    python benchmarks/bench_sampling_affinity.py [runden] [latenz_s]
+"""
+import os
+import random
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fake_server import FakeServer  # noqa: E402
+
+ROUNDS = 150
+LATENCY = 0.05
+SPECIES = ["Parus major", "Turdus merula", "Erithacus rubecula", "Fringilla coelebs", "Sylvia atricapilla"]
+AFFINITIES = (0.0, 0.3, 0.6, 0.9)
+MIN_NOVELTY = 0.25
+
+
+def play_rounds(rounds, affinity):
+    from audio_store import get_audio_store
+    from sampling_policy import get_sampling_policy
+    from xeno_canto import get_random_recording
+
+    store = get_audio_store()
+    policy = get_sampling_policy().configure(affinity, MIN_NOVELTY)
+    policy.reset()
+    rng = random.Random(1)
+    hits = 0
+    times = []
+    for _ in range(rounds):
+        recording = get_random_recording(rng.choice(SPECIES))
+        start = time.perf_counter()
+        if store.local_path(recording):
+            hits += 1
+        else:
+            store.fetch(recording)
+        times.append(time.perf_counter() - start)
+    return hits / rounds, statistics.median(times), policy.stats()
+
+
+def main():
+    rounds = int(sys.argv[1]) if len(sys.argv) > 1 else ROUNDS
+    latency = float(sys.argv[2]) if len(sys.argv) > 2 else LATENCY
+    server = FakeServer(latency=latency, audio_seconds=20).start()
+    os.environ["BIRDQUIZ_ENDPOINT"] = server.base_url
+    appdata = tempfile.mkdtemp(prefix="bench_affinity_appdata_")
+    os.environ["LOCALAPPDATA"] = appdata  # eigener Antwort-Cache, nichts aus früheren Läufen
+    cwd = os.getcwd()
+    print(f"{rounds} Runden, {len(SPECIES)} Arten, Latenz {latency * 1000:.0f} ms, Mindest-Neuheit {MIN_NOVELTY:.0%}")
+    print("affinity  Trefferquote  Median bis Ton  neue Aufnahmen")
+    try:
+        for affinity in AFFINITIES:
+            workdir = tempfile.mkdtemp(prefix="bench_affinity_")
+            os.chdir(workdir)  # bird_cache/audio liegt relativ zum Arbeitsverzeichnis – jeder Lauf startet leer
+            try:
+                hit_rate, median, stats = play_rounds(rounds, affinity)
+            finally:
+                os.chdir(cwd)
+                shutil.rmtree(workdir, ignore_errors=True)
+            print(f"{affinity:8.1f}  {hit_rate:12.0%}  {median * 1000:11.1f} ms  {1 - stats['cached_rate']:14.0%}")
+    finally:
+        server.stop()
+        shutil.rmtree(appdata, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""
+Rechenzeit der lokalen Spektrogramme (spectrogram.py).
+
+Synthetisches Signal (Vogelruf-ähnliche Chirps plus Rauschen) in 22,05 und
+44,1 kHz, gerendert in den Anzeigegrößen beider Frontends. Ist ein Decoder
+installiert (miniaudio, soundfile oder ffmpeg), wird zusätzlich eine MP3 des
+Testservers dekodiert und gerendert.
+    python benchmarks/bench_spectrogram_render.py [sekunden]
+"""
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from spectrogram import DEFAULT_RANGE, decoder_name, render, render_file  # noqa: E402
+
+SECONDS = 30
+REPEATS = 10
+SIZES = [(400, 300), (480, 160)]
+SAMPLE_RATES = [22050, 44100]
+
+
+def synthetic(seconds, sample_rate):
+    t = np.arange(int(seconds * sample_rate), dtype=np.float32) / sample_rate
+    phase = 2 * np.pi * (3000 * t + 1500 * np.sin(2 * np.pi * 2 * t) / (2 * np.pi * 2))
+    calls = (np.sin(2 * np.pi * 1.5 * t) > 0.3).astype(np.float32)
+    noise = np.random.default_rng(0).normal(0, 0.05, t.size).astype(np.float32)
+    return (0.5 * np.sin(phase) * calls + noise).astype(np.float32)
+
+
+def median_ms(fn):
+    times = []
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        fn()
+        times.append((time.perf_counter() - start) * 1000)
+    return statistics.median(times)
+
+
+def bench_decode(seconds):
+    from fake_server import mp3_bytes
+
+    fd, path = tempfile.mkstemp(suffix=".mp3")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(mp3_bytes(seconds))
+        ms = median_ms(lambda: render_file(path, SIZES[0], DEFAULT_RANGE, seconds))
+        print(f"Dekodieren + Rendern ({decoder_name()}), {seconds} s MP3: {ms:6.1f} ms")
+    finally:
+        os.remove(path)
+
+
+def main():
+    seconds = int(sys.argv[1]) if len(sys.argv) > 1 else SECONDS
+    for sample_rate in SAMPLE_RATES:
+        samples = synthetic(seconds, sample_rate)
+        for size in SIZES:
+            ms = median_ms(lambda: render(samples, sample_rate, size))
+            print(f"{seconds} s bei {sample_rate / 1000:4.1f} kHz -> {size[0]}x{size[1]}: {ms:6.1f} ms")
+    if decoder_name() is None:
+        print("[INFO] Kein Decoder installiert – Dekodieren wird nicht gemessen")
+    else:
+        bench_decode(seconds)
+
+
+if __name__ == "__main__":
+    main()
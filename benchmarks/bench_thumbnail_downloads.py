@@ -0,0 +1,90 @@
+"""
+Benchmark: Thumbnail-Downloads für den bird_cache – nacheinander gegen parallel.
+
+Läuft komplett gegen den lokalen Fake-Server (fake_server.py), mit einstellbarer
+Latenz pro Anfrage. Die Bild-Metadaten werden einmal vorab geholt, gemessen wird
+nur der Download-Teil:
+  - sequenziell: ein requests.get pro Bild, r.content in die Datei (bisheriges Verhalten)
+  - parallel:    cache_species_images() mit Thread-Pool und gemeinsamer Session
+    python benchmarks/bench_thumbnail_downloads.py [arten] [latenz_s]
+"""
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fake_server import FakeServer  # noqa: E402
+
+SPECIES = 30
+LATENCY = 0.08
+
+
+def species_names(count):
+    return [f"avis+species{i:03d}" for i in range(count)]
+
+
+def sequential(images):
+    import requests
+    from app_paths import species_cache_dir
+
+    for species, info in images.items():
+        cache_dir = species_cache_dir(species)
+        os.makedirs(cache_dir, exist_ok=True)
+        r = requests.get(info["thumbnail_url"], timeout=20)
+        with open(os.path.join(cache_dir, "image_0.jpg"), "wb") as f:
+            f.write(r.content)
+
+
+def parallel(species_list, images):
+    import wiki_images
+
+    class PreparedClient(wiki_images.WikipediaClient):
+        def lookup_images(self, species_list, thumb_size=None):
+            return images
+
+    wiki_images.cache_species_images(species_list, client=PreparedClient())
+
+
+def timed(fn, *args):
+    workdir = tempfile.mkdtemp(prefix="bench_thumbs_")
+    cwd = os.getcwd()
+    os.chdir(workdir)  # bird_cache liegt relativ zum Arbeitsverzeichnis
+    try:
+        start = time.perf_counter()
+        fn(*args)
+        return time.perf_counter() - start
+    finally:
+        os.chdir(cwd)
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else SPECIES
+    latency = float(sys.argv[2]) if len(sys.argv) > 2 else LATENCY
+    server = FakeServer(latency=latency).start()
+    os.environ["BIRDQUIZ_ENDPOINT"] = server.base_url
+    try:
+        from wiki_images import DOWNLOAD_WORKERS, WikipediaClient
+
+        species_list = species_names(count)
+        images = WikipediaClient().lookup_images(species_list)
+        print(f"[INFO] {len(images)} Bilder, Latenz {latency * 1000:.0f} ms pro Anfrage")
+
+        before = server.stats["thumb"]
+        t_seq = timed(sequential, images)
+        assert server.stats["thumb"] - before == len(images)
+        before = server.stats["thumb"]
+        t_par = timed(parallel, species_list, images)
+        assert server.stats["thumb"] - before == len(images)
+    finally:
+        server.stop()
+
+    print(f"sequenziell:                    {t_seq:6.2f} s")
+    print(f"parallel ({DOWNLOAD_WORKERS} Threads, 1 Session): {t_par:6.2f} s   ({t_seq / t_par:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,297 @@
+"""
+Speicherbudget und LRU-Verdrängung für den gesamten bird_cache.
+
+Der bird_cache wuchs bisher nur; entfernt wurde höchstens alles auf einmal
+(clear_bird_cache / delete_entire_image_cache). Der CacheManager hält den Ordner
+unter einem einstellbaren Byte-Budget:
+  - Einheiten sind die Artordner (bird_cache/<art>/, Bilder + Derivate) und die
+    einzelnen Dateien in den Medien-Unterordnern (POOL_DIRS, z.B. bird_cache/audio/).
+  - Jeder Zugriff wird mit touch() vermerkt (Zeitstempel in cache_access.json).
+  - Ein Hintergrund-Thread prüft regelmäßig bzw. nach request_check() die Belegung
+    und löscht die am längsten nicht benutzten Einheiten, bis wieder LOW_WATER
+    des Budgets erreicht ist.
+  - Die Arten des laufenden Spiels sind angeheftet (set_pinned) und werden nie verdrängt.
+  - Wer sich merkt, welche Dateien eines Medien-Unterordners vorliegen (AudioStore,
+    SonogramService), meldet sich mit add_pool_listener() an und erfährt, wenn
+    eine Datei verdrängt wurde oder beim nächsten scan() fehlt.
+Das Budget steht in cache_settings.json (neben settings.json), damit es das
+Löschen des Caches überlebt.
+"""
+import json
+import os
+import shutil
+import threading
+import time
+
+from app_paths import BIRD_CACHE_DIR
+from image_manifest import MANIFEST_FILENAME, get_manifest, species_key
+
+MB = 1024 * 1024
+DEFAULT_BUDGET = 500 * MB
+LOW_WATER = 0.9  # nach dem Aufräumen höchstens 90 % des Budgets belegt
+CHECK_INTERVAL = 60.0
+POOL_DIRS = ("audio", "sonograms")  # Unterordner, deren Dateien einzeln verdrängt werden
+ACCESS_FILENAME = "cache_access.json"
+SETTINGS_FILE = "cache_settings.json"
+
+
+def _path_size(path):
+    if os.path.isfile(path):
+        return os.path.getsize(path)
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            try:
+                total += os.path.getsize(os.path.join(root, name))
+            except OSError:
+                pass  # gerade gelöscht/umbenannt
+    return total
+
+
+class CacheManager:
+    def __init__(self, root=BIRD_CACHE_DIR, budget=None, settings_file=SETTINGS_FILE):
+        self.root = root
+        self.settings_file = settings_file
+        self.budget = budget or self._load_budget()
+        self._lock = threading.Lock()
+        self._access = self._load_access()
+        self._access_dirty = False
+        self._pinned = set()
+        self._units = {}  # Schlüssel -> (Größe, Teilbaum)
+        self._pool_listeners = {}  # Unterordner -> [callback(Dateiname)]
+        self._wake = threading.Event()
+        self._stopped = threading.Event()
+        self._thread = None
+        self.evicted_units = 0
+        self.evicted_bytes = 0
+        self.last_scan = None
+
+    # --- Einstellungen und Zugriffszeiten ---
+
+    def _load_budget(self):
+        try:
+            with open(self.settings_file, "r", encoding="utf-8") as f:
+                return int(json.load(f).get("budget_bytes", DEFAULT_BUDGET))
+        except (OSError, ValueError, AttributeError):
+            return DEFAULT_BUDGET
+
+    def set_budget(self, budget):
+        """Neues Budget in Bytes; wird gespeichert und sofort angewandt."""
+        self.budget = max(10 * MB, int(budget))
+        try:
+            with open(self.settings_file, "w", encoding="utf-8") as f:
+                json.dump({"budget_bytes": self.budget}, f, indent=4)
+        except OSError as e:
+            print(f"[ERROR] {self.settings_file} speichern: {e}")
+        self.request_check()
+
+    @property
+    def access_file(self):
+        return os.path.join(self.root, ACCESS_FILENAME)
+
+    def _load_access(self):
+        try:
+            with open(self.access_file, "r", encoding="utf-8") as f:
+                return {key: float(value) for key, value in json.load(f).items()}
+        except (OSError, ValueError, AttributeError):
+            return {}
+
+    def _save_access(self):
+        with self._lock:
+            if not self._access_dirty:
+                return
+            data = dict(self._access)
+            self._access_dirty = False
+        if not os.path.isdir(self.root):
+            return
+        tmp_path = self.access_file + ".part"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(data, f)
+            os.replace(tmp_path, self.access_file)
+        except OSError as e:
+            print(f"[WARN] {self.access_file} speichern: {e}")
+
+    def touch(self, key):
+        """Vermerkt einen Zugriff. key: Art (z.B. 'Parus major') oder 'audio/<datei>'."""
+        if "/" not in key:
+            key = species_key(key)
+        with self._lock:
+            self._access[key] = time.time()
+            self._access_dirty = True
+
+    # --- Anheften ---
+
+    def set_pinned(self, species_list):
+        """Heftet die Arten des laufenden Spiels an (ersetzt die bisherige Auswahl)."""
+        with self._lock:
+            self._pinned = {species_key(species) for species in species_list}
+
+    def is_pinned(self, key):
+        return key in self._pinned
+
+    # --- Benachrichtigung ---
+
+    def add_pool_listener(self, pool, callback):
+        """callback(Dateiname) wird gerufen, wenn eine Datei in bird_cache/<pool>/ entfernt wurde."""
+        with self._lock:
+            self._pool_listeners.setdefault(pool, []).append(callback)
+
+    def _notify_removed(self, keys):
+        with self._lock:
+            listeners = {pool: list(callbacks) for pool, callbacks in self._pool_listeners.items()}
+        for key in keys:
+            pool, _, file_name = key.partition("/")
+            for callback in listeners.get(pool, ()) if file_name else ():
+                try:
+                    callback(file_name)
+                except Exception as e:
+                    print(f"[WARN] Cache-Benachrichtigung für {key} fehlgeschlagen: {e}")
+
+    # --- Belegung und Verdrängung ---
+
+    def scan(self):
+        """Ermittelt die Größe aller Einheiten im bird_cache."""
+        units = {}
+        if os.path.isdir(self.root):
+            for name in os.listdir(self.root):
+                path = os.path.join(self.root, name)
+                if name in POOL_DIRS and os.path.isdir(path):
+                    for file_name in os.listdir(path):
+                        if file_name.endswith(".part"):
+                            continue  # wird gerade geschrieben
+                        units[f"{name}/{file_name}"] = (_path_size(os.path.join(path, file_name)), name)
+                elif os.path.isdir(path):
+                    units[name] = (_path_size(path), "images")
+        with self._lock:
+            # Außerhalb der Verdrängung verschwundene Dateien (z.B. nach "Cache löschen")
+            vanished = [key for key in self._units if key not in units]
+            self._units = units
+            # Zugriffszeiten verschwundener Einheiten vergessen
+            for key in [key for key in self._access if key not in units]:
+                del self._access[key]
+                self._access_dirty = True
+        self._notify_removed(vanished)
+        self.last_scan = time.time()
+        return units
+
+    def _last_access(self, key):
+        value = self._access.get(key)
+        if value is None:
+            try:
+                value = os.path.getmtime(os.path.join(self.root, *key.split("/")))
+            except OSError:
+                value = 0.0
+        return value
+
+    def evict(self):
+        """Löscht die am längsten nicht benutzten, nicht angehefteten Einheiten bis unter LOW_WATER."""
+        units = self.scan()
+        total = sum(size for size, _ in units.values())
+        if total <= self.budget:
+            return 0
+        target = self.budget * LOW_WATER
+        candidates = sorted((key for key in units if not self.is_pinned(key.split("/")[0])),
+                            key=self._last_access)
+        freed = 0
+        removed = []
+        removed_species = []
+        for key in candidates:
+            if total - freed <= target:
+                break
+            path = os.path.join(self.root, *key.split("/"))
+            try:
+                if os.path.isdir(path):
+                    get_manifest().remove(key)  # erst austragen, dann löschen
+                    removed_species.append(key)
+                    shutil.rmtree(path)
+                else:
+                    os.remove(path)
+            except OSError as e:
+                print(f"[WARN] Cache-Eintrag {key} konnte nicht gelöscht werden: {e}")
+                continue
+            removed.append(key)
+            size = units[key][0]
+            freed += size
+            with self._lock:
+                self._access.pop(key, None)
+                self._access_dirty = True
+            self.evicted_units += 1
+            self.evicted_bytes += size
+
+        with self._lock:
+            self._units = {key: value for key, value in units.items() if key not in removed}
+        self._notify_removed(removed)
+        if removed_species:
+            get_manifest().save()
+        print(f"[INFO] Cache-Budget: {freed / MB:.1f} MB freigegeben ({total / MB:.1f} MB > {self.budget / MB:.0f} MB).")
+        return freed
+
+    # --- Hintergrund-Thread ---
+
+    def start(self):
+        with self._lock:
+            if self._thread is not None:
+                return self
+            self._thread = threading.Thread(target=self._run, name="cache-manager", daemon=True)
+        self._thread.start()
+        return self
+
+    def _run(self):
+        while not self._stopped.is_set():
+            try:
+                self.evict()
+            except Exception as e:
+                print(f"[WARN] Cache-Verwaltung fehlgeschlagen: {e}")
+            self._save_access()
+            # Vor der nächsten Prüfung zurücksetzen: ein request_check() während
+            # evict() bleibt gesetzt und löst sofort eine weitere Runde aus
+            if self._wake.wait(CHECK_INTERVAL):
+                self._wake.clear()
+
+    def request_check(self):
+        """Weckt den Hintergrund-Thread (z.B. nachdem neue Dateien gespeichert wurden)."""
+        self._wake.set()
+
+    def stop(self):
+        self._stopped.set()
+        self._wake.set()
+        self._save_access()
+
+    # --- Statistik ---
+
+    def stats(self):
+        """Belegung für die Einstellungsseite (Werte in Bytes)."""
+        if self.last_scan is None:
+            self.scan()
+        with self._lock:
+            units = dict(self._units)
+            pinned = len(self._pinned)
+        by_subtree = {}
+        for size, subtree in units.values():
+            by_subtree[subtree] = by_subtree.get(subtree, 0) + size
+        manifest_path = os.path.join(self.root, MANIFEST_FILENAME)
+        return {
+            "total_bytes": sum(by_subtree.values()),
+            "budget_bytes": self.budget,
+            "units": len(units),
+            "by_subtree": by_subtree,
+            "pinned": pinned,
+            "evicted_units": self.evicted_units,
+            "evicted_bytes": self.evicted_bytes,
+            "manifest_bytes": os.path.getsize(manifest_path) if os.path.exists(manifest_path) else 0,
+        }
+
+
+_manager = None
+_manager_lock = threading.Lock()
+
+
+def get_cache_manager():
+    """Liefert den prozessweit geteilten CacheManager (Hintergrund-Thread mit start() starten)."""
+    global _manager
+    if _manager is None:
+        with _manager_lock:
+            if _manager is None:
+                _manager = CacheManager()
+    return _manager
@@ -0,0 +1,132 @@
+"""
+Vorkompilierter Snapshot der Artenliste für einen schnellen Kaltstart.
+
+Statt Europ_Species_3.csv bei jedem Programmstart mit pandas zu parsen, wird
+einmal ein kompakter Binär-Snapshot (marshal) geschrieben. Er enthält die
+Zeilen mit internierten Strings und den fertigen Such-Index des SpeciesResolver.
+
+Der Snapshot trägt den SHA-256-Hash der CSV und die Python-Version; passt einer
+der beiden nicht mehr (CSV geändert, anderes Python), wird er automatisch neu
+erzeugt. Das Laden kommt komplett ohne pandas aus.
+"""
+import csv
+import hashlib
+import marshal
+import os
+import sys
+
+from app_paths import app_data_dir
+from species_resolver import NAME_COLUMNS, SpeciesResolver
+
+SNAPSHOT_VERSION = 1
+SNAPSHOT_FILENAME = "species_catalog.snapshot"
+
+
+def default_snapshot_path():
+    # Nicht neben der CSV ablegen: im PyInstaller-Bundle (sys._MEIPASS) ist das ein temporärer Ordner
+    return os.path.join(app_data_dir(), SNAPSHOT_FILENAME)
+
+
+def csv_sha256(csv_path):
+    """SHA-256 der CSV-Datei (als Hex-String)."""
+    h = hashlib.sha256()
+    with open(csv_path, "rb") as f:
+        for chunk in iter(lambda: f.read(65536), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def read_csv_records(csv_path):
+    """
+    Liest die CSV mit dem csv-Modul (ohne pandas).
+    Gibt (columns, rows) zurück; leere Zellen werden zu None, die ID-Spalte zu int.
+    """
+    with open(csv_path, "r", encoding="utf-8-sig", newline="") as f:
+        reader = csv.reader(f)
+        columns = tuple(sys.intern(col.strip()) for col in next(reader))
+        rows = []
+        for raw in reader:
+            if not raw:
+                continue
+            row = []
+            for col, cell in zip(columns, raw):
+                cell = cell.strip()
+                if not cell:
+                    row.append(None)
+                elif col == "ID" and cell.isdigit():
+                    row.append(int(cell))
+                else:
+                    row.append(sys.intern(cell))
+            row += [None] * (len(columns) - len(row))
+            rows.append(tuple(row))
+    return columns, rows
+
+
+def name_records(columns, rows):
+    """Extrahiert die (Deutsch, Wissenschaftlich, Englisch)-Tupel für den SpeciesResolver."""
+    positions = [columns.index(col) for col in NAME_COLUMNS]
+    return [tuple(row[pos] for pos in positions) for row in rows]
+
+
+def build_snapshot(csv_path, csv_hash=None):
+    """Erzeugt den Snapshot-Inhalt (ein Dictionary nur aus marshal-fähigen Typen)."""
+    columns, rows = read_csv_records(csv_path)
+    index = SpeciesResolver.build_index(name_records(columns, rows))
+    # Auch die normalisierten Schlüssel internieren, damit gleiche Strings nur einmal gespeichert werden
+    index = {sys.intern(key): value for key, value in index.items()}
+    return {
+        "version": SNAPSHOT_VERSION,
+        "python": tuple(sys.version_info[:2]),
+        "csv_hash": csv_hash or csv_sha256(csv_path),
+        "columns": columns,
+        "rows": tuple(rows),
+        "index": index,
+    }
+
+
+def write_snapshot(snapshot, snapshot_path):
+    os.makedirs(os.path.dirname(snapshot_path), exist_ok=True)
+    tmp_path = snapshot_path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        marshal.dump(snapshot, f)
+    os.replace(tmp_path, snapshot_path)  # atomar, damit nie ein halber Snapshot gelesen wird
+
+
+def read_snapshot(snapshot_path):
+    """Liest einen Snapshot oder gibt None zurück, falls er fehlt oder unlesbar ist."""
+    try:
+        with open(snapshot_path, "rb") as f:
+            return marshal.load(f)
+    except (OSError, EOFError, ValueError, TypeError):
+        return None
+
+
+def is_current(snapshot, csv_hash):
+    return (
+        isinstance(snapshot, dict)
+        and snapshot.get("version") == SNAPSHOT_VERSION
+        and snapshot.get("python") == tuple(sys.version_info[:2])
+        and snapshot.get("csv_hash") == csv_hash
+    )
+
+
+def load_or_build(csv_path, snapshot_path=None):
+    """
+    Lädt den Snapshot zur CSV. Fehlt er oder passt der CSV-Hash nicht mehr,
+    wird er neu gebaut und gespeichert. Schlägt das Schreiben fehl (z.B. keine
+    Schreibrechte), wird der frisch gebaute Snapshot trotzdem zurückgegeben.
+    """
+    snapshot_path = snapshot_path or default_snapshot_path()
+    csv_hash = csv_sha256(csv_path)
+
+    snapshot = read_snapshot(snapshot_path)
+    if is_current(snapshot, csv_hash):
+        return snapshot
+
+    print("[INFO] Arten-Snapshot fehlt oder ist veraltet – wird neu erzeugt.")
+    snapshot = build_snapshot(csv_path, csv_hash)
+    try:
+        write_snapshot(snapshot, snapshot_path)
+    except OSError as e:
+        print(f"[WARN] Arten-Snapshot konnte nicht gespeichert werden: {e}")
+    return snapshot
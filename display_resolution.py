@@ -0,0 +1,111 @@
+"""
+Auflösung der Medien passend zur Anzeige wählen – nichts laden, was danach weggeworfen wird.
+
+Bisher wurden feste Größen geladen und erst lokal verkleinert:
+  - Artbilder: Wikipedia-Thumbnail mit pithumbsize=800, angezeigt mit 300px Höhe
+  - Sonogramme: immer sono.med von xeno-canto, egal wie groß das Widget ist
+ResolutionPolicy rechnet die Anzeigegröße (logische Pixel des Widgets) mit dem
+Skalierungsfaktor der Anzeige (DPI, "display_scale" in settings.json) in
+Gerätepixel um und wählt die kleinste Fassung, die sie abdeckt:
+  - xeno-canto: small / med / large (SONO_VARIANTS, die ersten 10 Sekunden);
+                entscheidend ist die Breite, da alle Varianten 3:1 sind
+  - Wikipedia:  pithumbsize aus den Standardbreiten von Wikimedia, die im
+                CDN-Cache liegen (WIKI_THUMB_SIZES); pithumbsize begrenzt die
+                längere Bildseite, darum wird die Höhe mit dem Seitenverhältnis
+                typischer Vogelfotos hochgerechnet. Der bird_cache wird von
+                beiden Frontends geteilt: mindestens das Derivat in
+                ANSWER_IMAGE_HEIGHT (Tk zeigt es 1:1) muss abgedeckt sein.
+Deckt keine Fassung die Anzeige ab, wird die größte genommen.
+"""
+import math
+import re
+import threading
+
+from image_derivatives import ANSWER_IMAGE_HEIGHT
+
+# Variante -> (Breite, Höhe) der Sonogramme von xeno-canto ("full" zeigt die ganze Aufnahme, nicht 10 s)
+SONO_VARIANTS = (
+    ("small", (240, 80)),
+    ("med", (480, 160)),
+    ("large", (960, 320)),
+)
+WIKI_THUMB_SIZES = (120, 250, 330, 500, 960, 1280, 1920)
+PHOTO_ASPECT = 1.5  # Breite/Höhe typischer Vogelfotos (3:2)
+
+# .../XC123456-med.png -> Variante austauschbar
+SONO_VARIANT_RE = re.compile(r"-(small|med|large)(\.\w+)$")
+
+
+class ResolutionPolicy:
+    def __init__(self, scale=1.0, image_height=0):
+        self.scale = 1.0
+        self.image_height = 0
+        self.configure(scale, image_height)
+
+    def configure(self, scale=1.0, image_height=0):
+        """
+        scale: Skalierungsfaktor der Anzeige (1.0 = 96 dpi, 2.0 = HiDPI); ungültige Werte -> 1.0.
+        image_height: Höhe, in der das Frontend die Artbilder selbst zeigt (logische Pixel, 0 = nur Derivat).
+        """
+        try:
+            scale = float(scale)
+        except (TypeError, ValueError):
+            scale = 1.0
+        self.scale = scale if 0.5 <= scale <= 4.0 else 1.0
+        self.image_height = max(0, int(image_height or 0))
+        return self
+
+    def device_size(self, size):
+        """(Breite, Höhe) in logischen Pixeln -> Gerätepixel."""
+        return tuple(math.ceil(value * self.scale) for value in size)
+
+    @staticmethod
+    def sono_variant(size):
+        """
+        Kleinste Sonogramm-Variante, deren Breite (Zeitachse) `size` (Gerätepixel) abdeckt.
+        Alle Varianten sind 3:1; ist die Anzeige höher (BirdQuiz: 400x300), wird nur die
+        Frequenzachse gestreckt – eine größere Variante brächte dort kaum Auflösung für
+        viermal so viele Pixel. Bei flacheren Anzeigen deckt die Breite die Höhe mit ab.
+        """
+        width = size[0]
+        for variant, (w, _h) in SONO_VARIANTS:
+            if w >= width:
+                return variant
+        return SONO_VARIANTS[-1][0]
+
+    def sonogram_url(self, url, size):
+        """xeno-canto-URL der passenden Variante für `size` (Gerätepixel); andere URLs unverändert."""
+        if not url:
+            return url
+        base, _, query = url.partition("?")
+        if not SONO_VARIANT_RE.search(base):
+            return url
+        base = SONO_VARIANT_RE.sub(lambda m: f"-{self.sono_variant(size)}{m.group(2)}", base)
+        return f"{base}?{query}" if query else base
+
+    @staticmethod
+    def wiki_thumb_size(height):
+        """Kleinstes pithumbsize, das ein Foto in `height` Gerätepixeln Höhe abdeckt."""
+        needed = math.ceil(height * PHOTO_ASPECT)
+        for size in WIKI_THUMB_SIZES:
+            if size >= needed:
+                return size
+        return WIKI_THUMB_SIZES[-1]
+
+    def answer_thumb_size(self):
+        """pithumbsize für die Artbilder im bird_cache (Derivat oder Anzeige des Frontends, die größere)."""
+        return self.wiki_thumb_size(max(ANSWER_IMAGE_HEIGHT, math.ceil(self.image_height * self.scale)))
+
+
+_policy = None
+_policy_lock = threading.Lock()
+
+
+def get_resolution_policy():
+    """Liefert die prozessweit geteilte ResolutionPolicy (mit configure() einstellen)."""
+    global _policy
+    if _policy is None:
+        with _policy_lock:
+            if _policy is None:
+                _policy = ResolutionPolicy()
+    return _policy
@@ -0,0 +1,43 @@
+"""
+Basis-URLs aller externen Dienste (xeno-canto, Wikipedia).
+
+Standard sind die echten Endpunkte. Für Offline-Tests und Benchmarks lassen sie sich
+per Umgebungsvariable umlenken, z.B. auf den lokalen fake_server.py:
+
+    BIRDQUIZ_ENDPOINT=http://127.0.0.1:8765          (beide Dienste auf einem Server)
+    BIRDQUIZ_XENO_CANTO_API=http://.../api/2/recordings
+    BIRDQUIZ_WIKIPEDIA_API=http://.../w/api.php
+
+Die Variablen werden beim Import gelesen, müssen also vor dem Programmstart gesetzt sein.
+"""
+import os
+from urllib.parse import urlsplit
+
+DEFAULT_XENO_CANTO_API = "https://www.xeno-canto.org/api/2/recordings"
+DEFAULT_WIKIPEDIA_API = "https://en.wikipedia.org/w/api.php"
+
+XENO_CANTO_PATH = "/api/2/recordings"
+WIKIPEDIA_PATH = "/w/api.php"
+
+
+def _endpoint(env_var, path, default):
+    if os.getenv(env_var):
+        return os.getenv(env_var)
+    base = os.getenv("BIRDQUIZ_ENDPOINT")
+    if base:
+        return base.rstrip("/") + path
+    return default
+
+
+XENO_CANTO_API = _endpoint("BIRDQUIZ_XENO_CANTO_API", XENO_CANTO_PATH, DEFAULT_XENO_CANTO_API)
+WIKIPEDIA_API = _endpoint("BIRDQUIZ_WIKIPEDIA_API", WIKIPEDIA_PATH, DEFAULT_WIKIPEDIA_API)
+
+
+def absolute_url(url, base):
+    """
+    Ergänzt protokoll-relative URLs ("//xeno-canto.org/...", so liefert sie die API)
+    um das Schema des Endpunkts base – https für die echten Dienste, http für den Fake-Server.
+    """
+    if url and url.startswith("//"):
+        return (urlsplit(base).scheme or "https") + ":" + url
+    return url
@@ -0,0 +1,313 @@
+"""
+Lokaler Ersatz-Server für xeno-canto und Wikipedia (Offline-Tests und Benchmarks).
+
+Liefert deterministische, aber realistisch geformte Antworten:
+  /api/2/recordings?query=...&page=N   xeno-canto-JSON (500 Aufnahmen pro Seite)
+  /sono/<id>-med.png                    Sonogramm als PNG
+  /audio/<id>.mp3                       kurze, stille MP3 (unterstützt HTTP Range)
+  /w/api.php?action=query&...           Wikipedia: list=search, prop=pageimages, prop=imageinfo
+  /thumb/<name>?width=N                 Vorschaubild (PNG-Inhalt, wie ein Wikipedia-Thumbnail)
+
+Latenz und Fehlerquote lassen sich einstellen (Fehler = HTTP 503). Alles kommt aus
+der Standardbibliothek, damit der Server auch ohne die GUI-Abhängigkeiten läuft.
+
+Start von der Kommandozeile und App darauf umlenken (siehe endpoints.py):
+    python fake_server.py --port 8765 --latency 0.2 --error-rate 0.05
+    BIRDQUIZ_ENDPOINT=http://127.0.0.1:8765 python BirdQuiz.py
+
+Oder im Prozess (z.B. in Benchmarks):
+    server = FakeServer(latency=0.05).start()
+    ... server.base_url ... server.stats ...
+    server.stop()
+"""
+import argparse
+import collections
+import json
+import random
+import re
+import struct
+import threading
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, quote, unquote, urlsplit
+
+PER_PAGE = 500
+RECORDISTS = ["Anna Berger", "Jonas Keller", "Marta Nowak", "Pierre Dubois", "Sven Larsson", "Lucia Romano"]
+LICENSES = ["//creativecommons.org/licenses/by-nc-sa/4.0/", "//creativecommons.org/licenses/by-sa/4.0/"]
+TYPES = ["song", "call", "alarm call", "flight call"]
+SONO_SIZES = {"small": (240, 80), "med": (480, 160), "large": (960, 320), "full": (1920, 320)}  # wie xeno-canto
+FILTER_RE = re.compile(r'(\w+):(?:"([^"]*)"|(\S+))')
+
+# Ein stilles MPEG-1-Layer-III-Frame: 128 kbit/s, 44,1 kHz, Stereo, ohne CRC (417 Byte, ~26 ms)
+MP3_FRAME = b"\xff\xfb\x90\x00" + bytes(417 - 4)
+MP3_FRAMES_PER_SECOND = 44100 / 1152
+
+
+def png_bytes(width, height, seed=0):
+    """Erzeugt ein einfaches RGB-PNG (Streifenmuster) ohne Pillow."""
+    r, g, b = (seed & 0xFF, (seed >> 8) & 0xFF, (seed >> 16) & 0xFF)
+    rows = []
+    for y in range(height):
+        shade = (y * 255) // max(height - 1, 1)
+        pixel = bytes(((r + shade) & 0xFF, (g + shade // 2) & 0xFF, b))
+        rows.append(b"\x00" + pixel * width)
+
+    def chunk(tag, data):
+        return struct.pack(">I", len(data)) + tag + data + struct.pack(">I", zlib.crc32(tag + data) & 0xFFFFFFFF)
+
+    header = struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0)
+    return (b"\x89PNG\r\n\x1a\n" + chunk(b"IHDR", header)
+            + chunk(b"IDAT", zlib.compress(b"".join(rows), 6)) + chunk(b"IEND", b""))
+
+
+def mp3_bytes(seconds):
+    return MP3_FRAME * max(1, round(seconds * MP3_FRAMES_PER_SECOND))
+
+
+def parse_query(query):
+    """'parus major type:"call" sex:"male"' -> ("parus major", {"type": "call", "sex": "male"})"""
+    filters = {key: quoted or plain for key, quoted, plain in FILTER_RE.findall(query)}
+    species = FILTER_RE.sub("", query).replace("+", " ")
+    return " ".join(species.split()).lower(), filters
+
+
+def title_case(name):
+    name = " ".join(name.replace("_", " ").split())
+    return name[:1].upper() + name[1:]
+
+
+class FakeServer:
+    """Der Server samt Einstellungen; läuft in einem Daemon-Thread."""
+
+    def __init__(self, host="127.0.0.1", port=0, latency=0.0, jitter=0.0, error_rate=0.0,
+                 seed=0, audio_seconds=3.0, empty_species=()):
+        self.host = host
+        self.port = port
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.audio_seconds = audio_seconds
+        self.empty_species = {name.replace("+", " ").lower() for name in empty_species}
+        self.stats = collections.Counter()
+        self._rng = random.Random(seed)
+        self._rng_lock = threading.Lock()
+        self._httpd = None
+        self._thread = None
+
+    @property
+    def base_url(self):
+        return f"http://{self.host}:{self.port}"
+
+    def start(self):
+        handler = type("BoundHandler", (FakeRequestHandler,), {"server_state": self})
+        self._httpd = ThreadingHTTPServer((self.host, self.port), handler)
+        self._httpd.daemon_threads = True
+        self.port = self._httpd.server_address[1]
+        self._thread = threading.Thread(target=self._httpd.serve_forever, name="fake-server", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        if self._httpd is not None:
+            self._httpd.shutdown()
+            self._httpd.server_close()
+            self._httpd = None
+
+    def serve_forever(self):
+        self.start()
+        print(f"[INFO] Fake-Server läuft auf {self.base_url}")
+        try:
+            self._thread.join()
+        except KeyboardInterrupt:
+            self.stop()
+
+    # --- Injektion von Latenz und Fehlern ---
+
+    def delay(self):
+        with self._rng_lock:
+            extra = self._rng.uniform(0, self.jitter) if self.jitter else 0.0
+            fail = self._rng.random() < self.error_rate
+        if self.latency or extra:
+            time.sleep(self.latency + extra)
+        return fail
+
+    # --- Inhalte ---
+
+    def recording_count(self, species, filters):
+        if species in self.empty_species:
+            return 0
+        count = zlib.crc32(species.encode("utf-8")) % 1500 + 1
+        for _ in filters:
+            count //= 3  # jeder Filter schränkt das Ergebnis ein (kann bis auf 0 fallen)
+        return count
+
+    @staticmethod
+    def max_length(filters):
+        """Längste erzeugte Aufnahme in Sekunden (len_lt:N wird wie bei xeno-canto beachtet)."""
+        limit = filters.get("len_lt", "")
+        return max(5, min(59, int(limit) - 1)) if limit.isdigit() else 59
+
+    @staticmethod
+    def quality(rng, filters):
+        levels = "ABCDE"
+        if filters.get("q") in tuple(levels):
+            return filters["q"]
+        if filters.get("q_gt") in tuple(levels[1:]):
+            levels = levels[:levels.index(filters["q_gt"])]
+        return rng.choice(levels)
+
+    def recordings_json(self, query, page, host):
+        species, filters = parse_query(query)
+        total = self.recording_count(species, filters)
+        num_pages = max(1, -(-total // PER_PAGE))
+        start = (page - 1) * PER_PAGE
+        seed = zlib.crc32(query.encode("utf-8"))
+        genus, _, epithet = title_case(species).partition(" ")
+        recordings = []
+        for i in range(start, min(start + PER_PAGE, total)):
+            rng = random.Random(seed + i)
+            xc_id = str(100000 + (seed + i * 7919) % 900000)
+            recordings.append({
+                "id": xc_id, "gen": genus, "sp": epithet, "ssp": "", "group": "birds", "en": title_case(species),
+                "rec": rng.choice(RECORDISTS), "cnt": "Germany", "loc": f"Testgebiet {i % 40}",
+                "lat": f"{rng.uniform(47, 55):.4f}", "lng": f"{rng.uniform(6, 15):.4f}", "alt": str(rng.randint(0, 1200)),
+                "type": filters.get("type") or rng.choice(TYPES), "sex": filters.get("sex", ""),
+                "stage": filters.get("stage", "adult"), "method": "field recording",
+                "url": f"//{host}/{xc_id}", "file": f"http://{host}/audio/XC{xc_id}.mp3",
+                "file-name": f"XC{xc_id}.mp3",
+                "sono": {size: f"//{host}/sono/XC{xc_id}-{size}.png" for size in ("small", "med", "large", "full")},
+                "lic": rng.choice(LICENSES), "q": self.quality(rng, filters),
+                "length": f"0:{rng.randint(5, self.max_length(filters)):02d}", "time": "06:30", "date": "2024-05-01",
+                "also": [], "rmk": "Synthetische Aufnahme des lokalen Test-Servers.",
+            })
+        return {"numRecordings": str(total), "numSpecies": "1" if total else "0",
+                "page": page, "numPages": num_pages, "recordings": recordings}
+
+    def wikipedia_json(self, params, host):
+        query = {}
+        if params.get("list") == "search":
+            term = params.get("srsearch", "").split(" +", 1)[0].strip()
+            if term.replace("+", " ").lower() in self.empty_species or not term:
+                query["search"] = []
+            else:
+                query["search"] = [{"ns": 0, "title": title_case(term), "pageid": zlib.crc32(term.encode())}]
+            return {"batchcomplete": "", "query": query}
+
+        titles = [t for t in params.get("titles", "").split("|") if t]
+        pages = {}
+        for n, title in enumerate(titles):
+            page_id = str(zlib.crc32(title.encode("utf-8")))
+            page = {"pageid": int(page_id), "ns": 0, "title": title}
+            if params.get("prop") == "pageimages":
+                width = int(params.get("pithumbsize", 300))
+                file_name = title.replace(" ", "_") + ".jpg"
+                page["thumbnail"] = {"source": f"http://{host}/thumb/{quote(file_name)}?width={width}",
+                                     "width": width, "height": width * 2 // 3}
+                page["pageimage"] = file_name
+            elif params.get("prop") == "imageinfo":
+                page["ns"] = 6
+                page["imageinfo"] = [{"extmetadata": {
+                    "LicenseShortName": {"value": "CC BY-SA 4.0"},
+                    "Artist": {"value": f'<a href="//commons.wikimedia.org/wiki/User:Tester{n}">Tester {n}</a>'},
+                }}]
+            pages[page_id] = page
+        query["pages"] = pages
+        return {"batchcomplete": "", "query": query}
+
+
+class FakeRequestHandler(BaseHTTPRequestHandler):
+    server_state = None  # wird in FakeServer.start() gesetzt
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass  # kein Log pro Anfrage
+
+    def handle(self):
+        try:
+            super().handle()
+        except (ConnectionResetError, BrokenPipeError):
+            pass  # Client hat abgebrochen (z.B. Clip-Download liest nicht bis zum Ende)
+
+    def do_HEAD(self):
+        self.handle_request(send_body=False)
+
+    def do_GET(self):
+        self.handle_request(send_body=True)
+
+    def handle_request(self, send_body):
+        state = self.server_state
+        url = urlsplit(self.path)
+        params = {key: values[0] for key, values in parse_qs(url.query).items()}
+        host = self.headers.get("Host") or f"{state.host}:{state.port}"
+        kind = url.path.strip("/").split("/", 1)[0] or "root"
+        state.stats[kind] += 1
+
+        if state.delay():
+            state.stats["errors"] += 1
+            return self.send(503, b'{"error": "injected"}', "application/json", send_body)
+
+        if url.path == "/api/2/recordings":
+            body = state.recordings_json(params.get("query", ""), int(params.get("page", 1)), host)
+            return self.send(200, json.dumps(body).encode("utf-8"), "application/json", send_body)
+        if url.path == "/w/api.php":
+            body = state.wikipedia_json(params, host)
+            return self.send(200, json.dumps(body).encode("utf-8"), "application/json", send_body)
+        if url.path.startswith("/sono/"):
+            width, height = SONO_SIZES.get(url.path.rsplit("-", 1)[-1].split(".", 1)[0], (480, 160))
+            return self.send(200, png_bytes(width, height, zlib.crc32(url.path.encode())), "image/png", send_body)
+        if url.path.startswith("/thumb/"):
+            width = int(params.get("width", 300))
+            name = unquote(url.path[len("/thumb/"):])
+            return self.send(200, png_bytes(width, width * 2 // 3, zlib.crc32(name.encode())), "image/png", send_body)
+        if url.path.startswith("/audio/"):
+            return self.send_ranged(mp3_bytes(state.audio_seconds), "audio/mpeg", send_body)
+        if url.path in ("/", "/api/2/"):
+            return self.send(200, b"ok", "text/plain", send_body)
+        return self.send(404, b'{"error": "not found"}', "application/json", send_body)
+
+    def send(self, status, body, content_type, send_body, extra_headers=None):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for key, value in (extra_headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        if send_body:
+            self.wfile.write(body)
+
+    def send_ranged(self, body, content_type, send_body):
+        """Unterstützt "Range: bytes=a-b" (206), wie die Audio-Downloads von xeno-canto."""
+        match = re.match(r"bytes=(\d*)-(\d*)$", self.headers.get("Range", ""))
+        if not match or not any(match.groups()):
+            return self.send(200, body, content_type, send_body, {"Accept-Ranges": "bytes"})
+        first, last = match.groups()
+        if first:
+            start, end = int(first), int(last) if last else len(body) - 1
+        else:
+            start, end = max(len(body) - int(last), 0), len(body) - 1
+        end = min(end, len(body) - 1)
+        if start > end:
+            return self.send(416, b"", content_type, send_body, {"Content-Range": f"bytes */{len(body)}"})
+        return self.send(206, body[start:end + 1], content_type, send_body, {
+            "Accept-Ranges": "bytes", "Content-Range": f"bytes {start}-{end}/{len(body)}"})
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Lokaler Ersatz für xeno-canto und Wikipedia")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.0, help="Verzögerung pro Anfrage in Sekunden")
+    parser.add_argument("--jitter", type=float, default=0.0, help="zusätzliche zufällige Verzögerung (0..jitter)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Anteil der Anfragen mit HTTP 503")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--audio-seconds", type=float, default=3.0)
+    parser.add_argument("--empty", default="", help="Komma-getrennte Arten ohne Aufnahmen/Bilder")
+    args = parser.parse_args()
+
+    FakeServer(args.host, args.port, args.latency, args.jitter, args.error_rate, args.seed, args.audio_seconds,
+               [name.strip() for name in args.empty.split(",") if name.strip()]).serve_forever()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""
+Hintergrund-Worker für den Bild-Cache (bird_cache) – einmal pro Spiel.
+
+Bisher lief cache_bird_images() im UI-Pfad: in BirdQuiz.py bei jeder Runde aus
+start_round, in test_df.py synchron vor der ersten Runde. Der Worker arbeitet
+die Artenliste stattdessen in einem eigenen Thread ab und meldet den Fortschritt.
+Jede Art ist verfügbar, sobald sie im Bild-Manifest (image_manifest.py) steht –
+die Frontends müssen nicht auf die ganze Liste warten.
+"""
+import threading
+
+from image_derivatives import generate_missing
+from image_manifest import get_manifest
+
+BATCH_SIZE = 50  # so viele Arten bekommt cache_fn pro Aufruf (eine Wikipedia-Bündelabfrage)
+
+
+def is_cached(species):
+    return get_manifest().has(species)
+
+
+class ImageCacheWorker:
+    """
+    cache_fn(species_list, on_cached=...) ist die cache_bird_images-Funktion des Frontends;
+    sie bekommt die Arten in Bündeln (die Wikipedia-Abfragen werden dort gebündelt) und
+    meldet jede fertige Art über on_cached(species, ok). progress(done, total, species, ok)
+    wird daraufhin im Worker-Thread aufgerufen (UI-Updates also selbst in den UI-Thread holen).
+    """
+
+    def __init__(self, species_list, cache_fn, progress=None, name="image-cache"):
+        self.species_list = list(dict.fromkeys(species_list))
+        self.cache_fn = cache_fn
+        self.progress = progress
+        self.done = threading.Event()
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._started = False
+        self._lock = threading.Lock()
+
+    def start(self):
+        """Startet den Worker (weitere Aufrufe werden ignoriert – einmal pro Spiel)."""
+        with self._lock:
+            if self._started:
+                return self
+            self._started = True
+        self._thread.start()
+        return self
+
+    def _run(self):
+        # Bereits gecachte Arten zuerst abhaken, damit der Fortschritt sofort stimmt
+        pending = [species for species in self.species_list if not is_cached(species)]
+        total = len(self.species_list)
+        done = total - len(pending)
+        print(f"[INFO] Bild-Cache: {done}/{total} Arten bereits vorhanden.")
+        try:
+            generate_missing([species for species in self.species_list if species not in pending])
+        except Exception as e:
+            print(f"[WARN] Bild-Derivate konnten nicht erzeugt werden: {e}")
+
+        def on_cached(species, ok):
+            nonlocal done
+            done += 1
+            if self.progress:
+                try:
+                    self.progress(done, total, species, ok)
+                except Exception as e:
+                    print(f"[WARN] Fortschritts-Callback fehlgeschlagen: {e}")
+
+        for start in range(0, len(pending), BATCH_SIZE):
+            if self._stopped.is_set():
+                break
+            batch = pending[start:start + BATCH_SIZE]
+            try:
+                self.cache_fn(batch, on_cached=on_cached)
+            except Exception as e:
+                print(f"[WARN] Bild-Cache für {len(batch)} Arten fehlgeschlagen: {e}")
+        self.done.set()
+
+    def is_ready(self, species):
+        return is_cached(species)
+
+    def stop(self):
+        """Beendet den Worker nach dem aktuellen Bündel."""
+        self._stopped.set()
@@ -0,0 +1,156 @@
+"""
+Vorskalierte Artbilder (Derivate) und ein LRU-Speicher für dekodierte Bilder.
+
+Bisher wurde bei jeder Auflösung/jedem Überspringen das 800px-Thumbnail von
+Wikipedia geöffnet und mit LANCZOS auf 300px Höhe verkleinert. Jetzt entsteht
+die Anzeigegröße einmal beim Cachen als eigene Datei neben dem Original:
+    bird_cache/parus_major/image_0.jpg       (Original, wie von Wikipedia)
+    bird_cache/parus_major/image_0_h300.jpg  (Derivat für 300px Höhe)
+Das Derivat steht im Bild-Manifest unter entry["derivatives"]["300"]. JPEGs
+werden dabei im Draft-Modus dekodiert (libjpeg skaliert schon beim Dekodieren
+um 1/2, 1/4 oder 1/8), das spart den Großteil der Dekodier- und Resize-Zeit.
+
+DecodedImageCache hält zusätzlich die zuletzt angezeigten, fertig dekodierten
+Bilder im Speicher (Schlüssel: Art + Höhe), damit eine wiederholte Anzeige
+gar nicht mehr auf die Platte geht.
+"""
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from PIL import Image
+
+from image_manifest import get_manifest, species_key
+
+ANSWER_IMAGE_HEIGHT = 300
+DISPLAY_HEIGHTS = (ANSWER_IMAGE_HEIGHT,)  # diese Derivate werden beim Cachen erzeugt
+DERIVATIVE_QUALITY = 88
+DECODED_CACHE_SIZE = 32  # ca. 450x300 RGB je Bild -> gut 10 MB
+RESIZE_WORKERS = 4
+
+
+def derivative_path(image_file, height):
+    root, _ = os.path.splitext(image_file)
+    return f"{root}_h{height}.jpg"
+
+
+def make_derivative(image_file, height):
+    """Schreibt das auf `height` verkleinerte Bild neben das Original und gibt den Pfad zurück."""
+    target = derivative_path(image_file, height)
+    with Image.open(image_file) as im:
+        width, img_height = im.size
+        if img_height > height:
+            new_size = (max(1, round(width * height / img_height)), height)
+            im.draft("RGB", new_size)  # nur JPEG: dekodiert direkt in (mindestens) Zielgröße
+            small = im.convert("RGB").resize(new_size, Image.Resampling.LANCZOS)
+        else:
+            small = im.convert("RGB")  # nie vergrößern (wie bisher Image.thumbnail)
+    tmp_path = target + ".part"
+    small.save(tmp_path, format="JPEG", quality=DERIVATIVE_QUALITY)
+    os.replace(tmp_path, target)
+    return target
+
+
+def ensure_derivative(species, height=ANSWER_IMAGE_HEIGHT):
+    """Pfad zum Derivat der Art (wird bei Bedarf erzeugt und ins Manifest eingetragen) oder None."""
+    manifest = get_manifest()
+    entry = manifest.get(species)
+    if entry is None:
+        return None
+    rel_path = entry.get("derivatives", {}).get(str(height))
+    if rel_path:
+        return manifest.image_path({"path": rel_path})
+    target = make_derivative(manifest.image_path(entry), height)
+    manifest.add_derivative(species, height, target)
+    return target
+
+
+def derivative_rel_path(species, height=ANSWER_IMAGE_HEIGHT):
+    """
+    Pfad des Derivats relativ zum bird_cache ("parus_major/image_0_h300.jpg") oder None –
+    für die flet-Frontends, deren lokaler HTTP-Server den bird_cache ausliefert.
+    """
+    entry = get_manifest().get(species)
+    if entry is None:
+        return None
+    created = str(height) not in entry.get("derivatives", {})
+    path = ensure_derivative(species, height)
+    manifest = get_manifest()
+    if created:
+        manifest.save()  # Derivat wurde eben erst erzeugt (Eintrag aus einer älteren Version)
+    return os.path.relpath(path, manifest.cache_dir).replace(os.sep, "/")
+
+
+def make_derivatives(species, heights=DISPLAY_HEIGHTS):
+    for height in heights:
+        ensure_derivative(species, height)
+
+
+def generate_missing(species_list, heights=DISPLAY_HEIGHTS, workers=RESIZE_WORKERS):
+    """
+    Erzeugt fehlende Derivate für bereits gecachte Arten (z.B. aus älteren Versionen)
+    in einem Thread-Pool. Gibt die Anzahl der bearbeiteten Arten zurück.
+    """
+    manifest = get_manifest()
+    missing = []
+    for species in species_list:
+        entry = manifest.get(species)
+        if entry is not None and any(str(h) not in entry.get("derivatives", {}) for h in heights):
+            missing.append(species)
+    if not missing:
+        return 0
+
+    def work(species):
+        try:
+            make_derivatives(species, heights)
+        except Exception as e:
+            print(f"[WARN] Derivat für '{species}' konnte nicht erzeugt werden: {e}")
+
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="resize") as pool:
+        list(pool.map(work, missing))
+    manifest.save()
+    print(f"[INFO] Bild-Derivate für {len(missing)} Arten erzeugt.")
+    return len(missing)
+
+
+class DecodedImageCache:
+    """Begrenzter LRU-Speicher (Art, Höhe) -> fertig dekodiertes Bild samt Lizenz/Autor."""
+
+    def __init__(self, max_items=DECODED_CACHE_SIZE):
+        self.max_items = max_items
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(species, height):
+        return species_key(species), height
+
+    def get(self, key):
+        with self._lock:
+            item = self._items.get(key)
+            if item is None:
+                self.misses += 1
+                return None
+            self._items.move_to_end(key)
+            self.hits += 1
+            return item
+
+    def put(self, key, item):
+        with self._lock:
+            self._items[key] = item
+            self._items.move_to_end(key)
+            while len(self._items) > self.max_items:
+                self._items.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+
+    def __len__(self):
+        return len(self._items)
+
+
+decoded_images = DecodedImageCache()
@@ -0,0 +1,186 @@
+"""
+Ein gemeinsames Manifest für den Bild-Cache (bird_cache/manifest.json).
+
+Bisher lag pro Art eine metadata.json im bird_cache, und jede Prüfung "ist die
+Art gecached?" bzw. jede Bildanzeige kostete os.path.exists() plus das Lesen
+dieser Datei; den Autor (HTML von Wikimedia) hat BirdQuiz.py bei jedem Aufdecken
+erneut mit BeautifulSoup bereinigt. Das Manifest wird einmal pro Prozess in den
+Speicher geladen und enthält pro Art alles, was die Anzeige braucht:
+    {"path": "parus_major/image_0.jpg", "width": 800, "height": 533,
+     "license": "CC BY-SA 4.0", "author": "Max Muster",   (author als Klartext)
+     "derivatives": {"300": "parus_major/image_0_h300.jpg"}}  (siehe image_derivatives.py)
+Alle Pfade sind relativ zu bird_cache und nutzen immer "/" (passt auch als URL für den
+lokalen HTTP-Server der flet-Frontends).
+
+Vorhandene metadata.json-Dateien aus älteren Versionen werden beim ersten Laden
+einmalig übernommen.
+"""
+import json
+import os
+import threading
+
+from bs4 import BeautifulSoup
+
+from app_paths import BIRD_CACHE_DIR, species_cache_dir
+
+MANIFEST_FILENAME = "manifest.json"
+UNKNOWN = "Unbekannt"
+
+
+def species_key(species):
+    """Schlüssel im Manifest – derselbe Name wie der Ordner im bird_cache."""
+    return os.path.basename(species_cache_dir(species))
+
+
+def plain_text(html):
+    """Autor/Lizenz aus der Wikimedia-API ohne HTML-Tags (z.B. <a href=...>)."""
+    if not html:
+        return ""
+    if "<" not in html and "&" not in html:
+        return html.strip()
+    return BeautifulSoup(html, "html.parser").text.strip()
+
+
+class ImageManifest:
+    """Thread-sicheres Manifest im Speicher; save() schreibt es atomar auf die Platte."""
+
+    def __init__(self, cache_dir=BIRD_CACHE_DIR):
+        self.cache_dir = cache_dir
+        self.path = os.path.join(cache_dir, MANIFEST_FILENAME)
+        self._lock = threading.Lock()
+        self._entries = {}
+        self._dirty = False
+        self.load()
+
+    def load(self):
+        entries = {}
+        if os.path.exists(self.path):
+            try:
+                with open(self.path, "r", encoding="utf-8") as f:
+                    entries = json.load(f)
+            except Exception as e:
+                print(f"[WARN] {self.path} nicht lesbar, Bild-Cache wird neu aufgebaut: {e}")
+                entries = {}
+        elif os.path.isdir(self.cache_dir):
+            entries = self._import_metadata_files()
+        with self._lock:
+            self._entries = entries
+            self._dirty = False
+        if entries and not os.path.exists(self.path):
+            self._dirty = True
+            self.save()
+        print(f"[INFO] Bild-Manifest: {len(entries)} Arten im Cache.")
+
+    def _import_metadata_files(self):
+        """Übernimmt die metadata.json-Dateien älterer Versionen (einmalig)."""
+        from PIL import Image
+
+        entries = {}
+        for name in os.listdir(self.cache_dir):
+            metadata_file = os.path.join(self.cache_dir, name, "metadata.json")
+            if not os.path.isfile(metadata_file):
+                continue
+            try:
+                with open(metadata_file, "r", encoding="utf-8") as f:
+                    chosen = json.load(f)[0]
+                image_file = os.path.join(self.cache_dir, name, chosen["filename"])
+                with Image.open(image_file) as im:
+                    width, height = im.size
+            except Exception as e:
+                print(f"[WARN] Alter Cache-Eintrag '{name}' wird übersprungen: {e}")
+                continue
+            entries[name] = {
+                "path": f"{name}/{chosen['filename']}",
+                "width": width,
+                "height": height,
+                "license": plain_text(chosen.get("license")) or UNKNOWN,
+                "author": plain_text(chosen.get("author")) or UNKNOWN,
+            }
+        return entries
+
+    def get(self, species):
+        """Eintrag der Art oder None – reiner Speicherzugriff."""
+        return self._entries.get(species_key(species))
+
+    def has(self, species):
+        return species_key(species) in self._entries
+
+    def image_path(self, entry):
+        """Lokaler Dateipfad zu einem Manifest-Eintrag."""
+        return os.path.join(self.cache_dir, *entry["path"].split("/"))
+
+    def put(self, species, image_file, width, height, license, author):
+        """Trägt ein gespeichertes Bild ein; license/author dürfen HTML enthalten."""
+        key = species_key(species)
+        rel_path = os.path.relpath(image_file, self.cache_dir).replace(os.sep, "/")
+        entry = {
+            "path": rel_path,
+            "width": width,
+            "height": height,
+            "license": plain_text(license) or UNKNOWN,
+            "author": plain_text(author) or UNKNOWN,
+        }
+        with self._lock:
+            self._entries[key] = entry
+            self._dirty = True
+        return entry
+
+    def add_derivative(self, species, height, image_file):
+        """Vermerkt eine vorskalierte Fassung (Höhe in Pixeln) zum Eintrag der Art."""
+        key = species_key(species)
+        rel_path = os.path.relpath(image_file, self.cache_dir).replace(os.sep, "/")
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return
+            # Eintrag kopieren statt ändern: Leser ohne Lock sehen nie einen halben Zustand
+            self._entries[key] = dict(entry, derivatives={**entry.get("derivatives", {}), str(height): rel_path})
+            self._dirty = True
+
+    def remove(self, species):
+        with self._lock:
+            if self._entries.pop(species_key(species), None) is not None:
+                self._dirty = True
+
+    def save(self):
+        """Schreibt das Manifest (über eine .part-Datei), falls sich etwas geändert hat."""
+        with self._lock:
+            if not self._dirty:
+                return
+            data = dict(self._entries)
+            self._dirty = False
+        os.makedirs(self.cache_dir, exist_ok=True)
+        tmp_path = self.path + ".part"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(data, f, ensure_ascii=False, indent=1)
+            os.replace(tmp_path, self.path)
+        except Exception as e:
+            with self._lock:
+                self._dirty = True
+            print(f"[ERROR] Bild-Manifest speichern: {e}")
+
+    def clear(self):
+        """Leert das Manifest (z.B. nachdem der bird_cache-Ordner gelöscht wurde)."""
+        with self._lock:
+            self._entries = {}
+            self._dirty = False
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+    def __len__(self):
+        return len(self._entries)
+
+
+_manifest = None
+_manifest_lock = threading.Lock()
+
+
+def get_manifest():
+    """Liefert das prozessweit geteilte Manifest (wird beim ersten Aufruf geladen)."""
+    global _manifest
+    if _manifest is None:
+        with _manifest_lock:
+            if _manifest is None:
+                _manifest = ImageManifest()
+    return _manifest
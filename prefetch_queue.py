@@ -0,0 +1,122 @@
+"""
+Begrenzte Vorlade-Warteschlange für Quizrunden.
+
+Ersetzt den einzelnen prefetched_round-Slot: EIN Producer-Thread hält bis zu
+`depth` fertige Runden bereit und füllt nach, sobald eine Runde entnommen wurde.
+Damit überholt auch ein schneller Spieler das Vorladen nicht so leicht, und es
+gibt keine parallelen Prefetch-Threads mehr, die sich gegenseitig überschreiben.
+
+Die Warteschlange ist thread-sicher (queue.Queue) und kann aus Tk (get_nowait/get
+in einem Worker-Thread) wie aus flet (await get_async) benutzt werden.
+"""
+import asyncio
+import queue
+import threading
+import time
+
+DEFAULT_DEPTH = 3
+
+
+class PrefetchQueue:
+    """
+    producer() wird im Producer-Thread aufgerufen und liefert eine fertige Runde
+    (blockierend, z.B. API-Abfrage). Liefert er None, wird nichts eingereiht.
+    """
+
+    def __init__(self, producer, depth=DEFAULT_DEPTH, name="prefetch", retry_delay=1.0):
+        self.producer = producer
+        self.depth = max(1, depth)
+        self.retry_delay = retry_delay
+        self._queue = queue.Queue(maxsize=self.depth)
+        self._stopped = threading.Event()
+        self._generation = 0  # wird bei clear() erhöht, damit veraltete Runden verworfen werden
+        self._lock = threading.Lock()
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self.hits = 0
+        self.misses = 0
+
+    def start(self):
+        if not self._thread.is_alive() and not self._stopped.is_set():
+            self._thread.start()
+        return self
+
+    def _run(self):
+        while not self._stopped.is_set():
+            generation = self._generation
+            try:
+                item = self.producer()
+            except Exception as e:
+                print(f"[WARN] Vorladen einer Runde fehlgeschlagen: {e}")
+                self._stopped.wait(self.retry_delay)
+                continue
+            if item is None:
+                self._stopped.wait(self.retry_delay)
+                continue
+            # Blockiert, solange die Warteschlange voll ist; prüft dabei regelmäßig auf stop()
+            while not self._stopped.is_set():
+                with self._lock:
+                    if generation != self._generation:
+                        break  # Runde stammt noch aus der Zeit vor clear()
+                    try:
+                        self._queue.put_nowait(item)
+                        break
+                    except queue.Full:
+                        pass
+                time.sleep(0.05)
+
+    def get_nowait(self):
+        """Nächste vorgeladene Runde oder None, wenn (noch) keine bereitliegt."""
+        try:
+            item = self._queue.get_nowait()
+        except queue.Empty:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return item
+
+    def peek(self):
+        """Nächste vorgeladene Runde, ohne sie zu entnehmen (z.B. um ihr Audio vorzubereiten), oder None."""
+        with self._queue.mutex:
+            return self._queue.queue[0] if self._queue.queue else None
+
+    def get(self, timeout=None):
+        """Wartet auf die nächste Runde (nicht im Tk-Hauptthread aufrufen). None bei Timeout oder stop()."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        item = self.get_nowait()
+        if item is not None:
+            return item
+        while not self._stopped.is_set():
+            wait = 0.1 if deadline is None else min(0.1, deadline - time.monotonic())
+            if wait <= 0:
+                return None
+            try:
+                return self._queue.get(timeout=wait)
+            except queue.Empty:
+                continue
+        return None
+
+    async def get_async(self, timeout=None):
+        """Für flet-Tasks: wartet auf die nächste Runde, ohne die Event-Loop zu blockieren."""
+        item = self.get_nowait()
+        if item is not None:
+            return item
+        return await asyncio.to_thread(self.get, timeout)
+
+    def clear(self):
+        """Verwirft alle vorgeladenen Runden (z.B. nach geänderten Filtern)."""
+        with self._lock:
+            self._generation += 1
+            while True:
+                try:
+                    self._queue.get_nowait()
+                except queue.Empty:
+                    break
+
+    def stop(self):
+        self._stopped.set()
+
+    def stopped(self):
+        return self._stopped.is_set()
+
+    def __len__(self):
+        return self._queue.qsize()
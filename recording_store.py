@@ -0,0 +1,116 @@
+"""
+Kompakte Ablage der xeno-canto-Antworten im Speicher.
+
+Die API liefert pro Aufnahme rund 40 Felder (Bemerkungen, also-Listen, Koordinaten,
+Geräteinfos, ...). Das Quiz braucht davon nur acht: id, file, sono.med, rec, lic,
+length, q und type. Statt der kompletten JSON-Antwort werden deshalb nur diese
+Felder in Objekten mit __slots__ gehalten; wiederkehrende Strings (Lizenzen,
+Aufnehmer, Typen, Qualitätsstufen) werden interniert.
+
+to_api() schreibt dieselbe Form zurück, wie sie die API liefert (nur eben ohne die
+ungenutzten Felder) – so können Platten-Cache und from_api() alte vollständige und
+neue kompakte Einträge gleichermaßen lesen.
+"""
+import sys
+
+
+def _intern(value):
+    return sys.intern(value) if isinstance(value, str) else value
+
+
+def _as_int(value, default=0):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return default
+
+
+def length_seconds(length):
+    """xeno-canto-Länge ("1:23" oder "1:02:03") in Sekunden; 0, wenn unbekannt."""
+    try:
+        seconds = 0
+        for part in str(length).split(":"):
+            seconds = seconds * 60 + int(part)
+        return seconds
+    except ValueError:
+        return 0
+
+
+class Recording:
+    """Eine Aufnahme mit genau den Feldern, die das Quiz benutzt."""
+
+    __slots__ = ("id", "file", "sono_med", "rec", "lic", "length", "quality", "type")
+
+    def __init__(self, id, file, sono_med=None, rec=None, lic=None, length=None, quality=None, type=None):
+        self.id = id
+        self.file = file
+        self.sono_med = sono_med
+        self.rec = rec
+        self.lic = lic
+        self.length = length
+        self.quality = quality
+        self.type = type
+
+    @classmethod
+    def from_api(cls, rec):
+        """Erstellt den Eintrag aus einem Element von data["recordings"]."""
+        return cls(
+            id=rec.get("id"),
+            file=rec.get("file"),
+            sono_med=(rec.get("sono") or {}).get("med"),
+            rec=_intern(rec.get("rec")),
+            lic=_intern(rec.get("lic")),
+            length=_intern(rec.get("length")),
+            quality=_intern(rec.get("q")),
+            type=_intern(rec.get("type")),
+        )
+
+    def to_api(self):
+        """Zurück in die Form der API-Antwort (nur die gespeicherten Felder)."""
+        return {
+            "id": self.id,
+            "file": self.file,
+            "sono": {"med": self.sono_med},
+            "rec": self.rec,
+            "lic": self.lic,
+            "length": self.length,
+            "q": self.quality,
+            "type": self.type,
+        }
+
+    def __repr__(self):
+        return f"Recording(id={self.id!r}, rec={self.rec!r}, q={self.quality!r}, length={self.length!r})"
+
+
+class RecordingPage:
+    """Eine Ergebnisseite einer Query: Zähler aus dem Kopf der Antwort plus kompakte Aufnahmen."""
+
+    __slots__ = ("num_recordings", "num_pages", "page", "recordings")
+
+    def __init__(self, num_recordings, num_pages, page, recordings):
+        self.num_recordings = num_recordings
+        self.num_pages = num_pages
+        self.page = page
+        self.recordings = recordings
+
+    @classmethod
+    def from_api(cls, data):
+        """Erstellt die Seite aus der (vollständigen oder kompakten) JSON-Antwort."""
+        recordings = tuple(Recording.from_api(rec) for rec in data.get("recordings") or ())
+        return cls(
+            num_recordings=_as_int(data.get("numRecordings"), len(recordings)),
+            num_pages=max(_as_int(data.get("numPages"), 1), 1),
+            page=_as_int(data.get("page"), 1),
+            recordings=recordings,
+        )
+
+    def to_api(self):
+        return {
+            "numRecordings": self.num_recordings,
+            "numPages": self.num_pages,
+            "page": self.page,
+            "recordings": [rec.to_api() for rec in self.recordings],
+        }
+
+    def __len__(self):
+        return len(self.recordings)
@@ -0,0 +1,140 @@
+"""
+Persistenter Cache für xeno-canto-Antworten (SQLite).
+
+Ersetzt das alte, unbegrenzte api_cache-Dictionary, das beim Beenden verloren ging.
+Schlüssel ist die komplette normalisierte Query (Art, Typ, Geschlecht, Alter), damit
+gefilterte Abfragen nie die Daten einer anderen Filterkombination bekommen.
+
+- TTL: Einträge jünger als ttl gelten als frisch.
+- Stale-while-revalidate: Einträge zwischen ttl und stale_ttl werden trotzdem sofort
+  geliefert; der Aufrufer aktualisiert sie im Hintergrund.
+- Größenbegrenzung: über max_entries bzw. max_bytes werden die am längsten nicht
+  benutzten Einträge gelöscht.
+"""
+import json
+import os
+import sqlite3
+import threading
+import time
+
+from app_paths import app_data_dir
+
+DEFAULT_TTL = 7 * 24 * 3600          # 1 Woche frisch
+DEFAULT_STALE_TTL = 90 * 24 * 3600   # bis 90 Tage noch als "stale" nutzbar
+DEFAULT_MAX_ENTRIES = 5000
+DEFAULT_MAX_BYTES = 100 * 1024 * 1024
+
+
+def default_cache_path():
+    return os.path.join(app_data_dir(), "xc_cache.db")
+
+
+def key_to_str(key):
+    """Tupel-Schlüssel (species, type, sex, stage, ...) als eindeutiger String."""
+    return "|".join(str(part) for part in key)
+
+
+class ResponseCache:
+    def __init__(self, path=None, ttl=DEFAULT_TTL, stale_ttl=DEFAULT_STALE_TTL,
+                 max_entries=DEFAULT_MAX_ENTRIES, max_bytes=DEFAULT_MAX_BYTES):
+        self.path = path or default_cache_path()
+        self.ttl = ttl
+        self.stale_ttl = max(stale_ttl, ttl)
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._conn = None
+
+    def _connect(self):
+        if self._conn is None:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS responses (
+                    key TEXT PRIMARY KEY,
+                    payload TEXT NOT NULL,
+                    size INTEGER NOT NULL,
+                    fetched_at REAL NOT NULL,
+                    accessed_at REAL NOT NULL
+                )
+            """)
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_responses_accessed ON responses (accessed_at)")
+            self._conn.commit()
+        return self._conn
+
+    def get(self, key):
+        """
+        Gibt (data, is_fresh) zurück.
+        data ist None, wenn kein Eintrag existiert oder er älter als stale_ttl ist.
+        """
+        now = time.time()
+        with self._lock:
+            conn = self._connect()
+            row = conn.execute(
+                "SELECT payload, fetched_at FROM responses WHERE key = ?", (key_to_str(key),)
+            ).fetchone()
+            if row is None:
+                return None, False
+            payload, fetched_at = row
+            age = now - fetched_at
+            if age > self.stale_ttl:
+                conn.execute("DELETE FROM responses WHERE key = ?", (key_to_str(key),))
+                conn.commit()
+                return None, False
+            conn.execute("UPDATE responses SET accessed_at = ? WHERE key = ?", (now, key_to_str(key)))
+            conn.commit()
+        try:
+            return json.loads(payload), age <= self.ttl
+        except ValueError:
+            return None, False
+
+    def put(self, key, data):
+        payload = json.dumps(data, ensure_ascii=False, separators=(",", ":"))
+        now = time.time()
+        with self._lock:
+            conn = self._connect()
+            conn.execute(
+                "INSERT OR REPLACE INTO responses (key, payload, size, fetched_at, accessed_at) VALUES (?, ?, ?, ?, ?)",
+                (key_to_str(key), payload, len(payload), now, now)
+            )
+            self._evict(conn)
+            conn.commit()
+
+    def _evict(self, conn):
+        # Zuerst nach Anzahl, dann nach Größe begrenzen (LRU über accessed_at)
+        count, total = conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses").fetchone()
+        if count > self.max_entries:
+            conn.execute("""
+                DELETE FROM responses WHERE key IN (
+                    SELECT key FROM responses ORDER BY accessed_at ASC LIMIT ?
+                )
+            """, (count - self.max_entries,))
+            total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if total > self.max_bytes:
+            rows = conn.execute("SELECT key, size FROM responses ORDER BY accessed_at ASC").fetchall()
+            doomed = []
+            for key, size in rows:
+                if total <= self.max_bytes:
+                    break
+                doomed.append((key,))
+                total -= size
+            conn.executemany("DELETE FROM responses WHERE key = ?", doomed)
+
+    def stats(self):
+        with self._lock:
+            count, total = self._connect().execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses"
+            ).fetchone()
+        return {"entries": count, "bytes": total}
+
+    def clear(self):
+        with self._lock:
+            conn = self._connect()
+            conn.execute("DELETE FROM responses")
+            conn.commit()
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
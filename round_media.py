@@ -0,0 +1,92 @@
+"""
+Medien einer Quizrunde vorab laden und fertig aufbereiten.
+
+Die Prefetch-Warteschlange (prefetch_queue.py) ruft build_round_bundle() im
+Producer-Thread auf. Danach liegt alles bereit, was die Runde braucht:
+  - audio:        die Aufnahme als lokale Datei im Audio-Speicher (audio_store.py),
+                  VLC spielt sie ohne Netz-Streaming
+  - sonogram:     das Sonogramm in Anzeigegröße (PIL.Image) – lokal aus dem eben
+                  gespeicherten Audio gerechnet oder über den Cache von sonogram_service.py
+  - answer_image: das Artbild aus bird_cache (vorskaliertes Derivat, siehe
+                  image_derivatives.py), dekodiert, samt Lizenz/Autor
+
+Hier entstehen nur PIL-Bilder; die Tk-PhotoImage wird erst im UI-Thread daraus
+gebaut (Tk-Objekte dürfen nicht in Worker-Threads angelegt werden).
+"""
+import base64
+import io
+
+from PIL import Image
+
+from audio_store import get_audio_store
+from cache_manager import get_cache_manager
+from image_derivatives import ANSWER_IMAGE_HEIGHT, decoded_images, ensure_derivative
+from image_manifest import get_manifest
+from sonogram_service import SONOGRAM_SIZE, get_sonogram_service
+
+
+def load_sonogram(sonogram_url, size=SONOGRAM_SIZE):
+    """Sonogramm in Anzeigegröße (blockierend; aus Speicher, Platte oder Netz – siehe sonogram_service.py)."""
+    return get_sonogram_service().load(sonogram_url, size)
+
+
+def image_data_uri(im, format="PNG"):
+    """PIL-Bild als data:-URI (für flet ft.Image.src, ohne weiteren Abruf im Client)."""
+    buffer = io.BytesIO()
+    im.save(buffer, format=format)
+    return f"data:image/{format.lower()};base64," + base64.b64encode(buffer.getvalue()).decode("ascii")
+
+
+def load_answer_image(latin_name, height=ANSWER_IMAGE_HEIGHT):
+    """
+    Liefert das Artbild in der festen Höhe (aus dem LRU-Speicher oder dem vorskalierten Derivat).
+    Gibt {"image": PIL.Image, "license": str, "author": str, "key": (art, höhe)} zurück oder None.
+    Das Bild wird geteilt und darf nicht verändert werden.
+    """
+    get_cache_manager().touch(latin_name)
+    key = decoded_images.key(latin_name, height)
+    image_data = decoded_images.get(key)
+    if image_data is not None:
+        return image_data
+
+    manifest = get_manifest()
+    entry = manifest.get(latin_name)
+    if entry is None:
+        return None
+    path = ensure_derivative(latin_name, height)
+    if str(height) not in entry.get("derivatives", {}):
+        manifest.save()  # Derivat wurde eben erst erzeugt (Eintrag aus einer älteren Version)
+    img_pil = Image.open(path)
+    img_pil.load()
+    image_data = {"image": img_pil, "license": entry["license"], "author": entry["author"], "key": key}
+    decoded_images.put(key, image_data)
+    return image_data
+
+
+def build_round_bundle(recording, latin_name, sonogram=True, image=True, sonogram_size=SONOGRAM_SIZE):
+    """
+    Lädt alle Medien einer Runde. Fehler einzelner Teile werden nur protokolliert –
+    die UI fällt für fehlende Teile auf das bisherige Laden zurück.
+    sonogram_size: Anzeigegröße des Sonogramms in Gerätepixeln (bestimmt auch die xeno-canto-Variante).
+    """
+    bundle = {"audio": None, "sonogram": None, "answer_image": None}
+    if not recording:
+        return bundle
+
+    try:
+        bundle["audio"] = get_audio_store().fetch(recording)
+    except Exception as e:
+        print(f"[WARN] Audio konnte nicht vorgeladen werden: {e}")
+
+    if sonogram and recording.get("sonogram_url"):
+        try:
+            bundle["sonogram"] = get_sonogram_service().load_for(recording, sonogram_size)
+        except Exception as e:
+            print(f"[WARN] Sonogramm konnte nicht vorgeladen werden: {e}")
+
+    if image:
+        try:
+            bundle["answer_image"] = load_answer_image(latin_name)
+        except Exception as e:
+            print(f"[WARN] Artbild für {latin_name} konnte nicht vorbereitet werden: {e}")
+    return bundle
@@ -0,0 +1,123 @@
+"""
+Auswahl der Aufnahme einer Runde mit Vorliebe für bereits lokale Medien.
+
+sample_recording() (xeno_canto.py) zieht gleichverteilt über alle Aufnahmen
+einer Art – auch dann, wenn von derselben Art Dutzende Aufnahmen schon im
+Audio-Speicher liegen. Jede Runde kostete so oft einen neuen Download.
+
+CacheAffinityPolicy entscheidet nach der gleichverteilten Ziehung:
+  - Mit Wahrscheinlichkeit `affinity` wird stattdessen eine der lokal
+    vorhandenen Aufnahmen aus dem geladenen Index der Query gewählt
+    (0 = wie bisher, 1 = immer lokal, sofern vorhanden).
+  - Mindest-Neuheit: Liegt der Anteil neuer (nicht lokaler) Aufnahmen unter den
+    letzten NOVELTY_WINDOW Runden unter `min_novelty`, wird eine neue Aufnahme
+    erzwungen – der Spieler hört also nicht nur den Cache in Schleife.
+"Lokal" heißt: die Aufnahme liegt im Audio-Speicher (audio_store.py) und –
+falls Sonogramme angezeigt und nicht lokal aus dem Audio gerechnet werden
+(require_sonogram) – auch ihr Sonogramm im Sonogramm-Cache (sonogram_service.py).
+Einstellbar über settings.json ("cache_affinity", "min_novelty").
+"""
+import random
+import threading
+from collections import deque
+
+from audio_store import get_audio_store
+from sonogram_service import get_sonogram_service
+
+DEFAULT_AFFINITY = 0.6
+DEFAULT_MIN_NOVELTY = 0.25
+NOVELTY_WINDOW = 20
+
+
+def local_recording_ids(require_sonogram=False):
+    """IDs aller Aufnahmen, deren Medien lokal vorliegen."""
+    ids = get_audio_store().local_ids()
+    service = get_sonogram_service()
+    if require_sonogram and not service.renders_locally():
+        ids &= service.local_ids()  # sonst wird das Spektrogramm ohnehin aus dem Audio gerechnet
+    return ids
+
+
+class CacheAffinityPolicy:
+    def __init__(self, affinity=DEFAULT_AFFINITY, min_novelty=DEFAULT_MIN_NOVELTY, local_ids=local_recording_ids,
+                 rng=None):
+        self.local_ids = local_ids
+        self.rng = rng or random.Random()
+        self._lock = threading.Lock()
+        self._history = deque(maxlen=NOVELTY_WINDOW)  # True = Runde mit neuer Aufnahme
+        self.require_sonogram = False
+        self.configure(affinity, min_novelty)
+        self.cached_picks = 0
+        self.novel_picks = 0
+        self.forced_novel = 0
+
+    def configure(self, affinity=DEFAULT_AFFINITY, min_novelty=DEFAULT_MIN_NOVELTY, require_sonogram=None):
+        self.affinity = min(1.0, max(0.0, float(affinity)))
+        self.min_novelty = min(1.0, max(0.0, float(min_novelty)))
+        if require_sonogram is not None:
+            self.require_sonogram = bool(require_sonogram)
+        return self
+
+    def reset(self):
+        """Vergisst Verlauf und Zähler (z.B. für einen neuen Messlauf)."""
+        with self._lock:
+            self._history.clear()
+            self.cached_picks = 0
+            self.novel_picks = 0
+            self.forced_novel = 0
+
+    def novelty_rate(self):
+        with self._lock:
+            return sum(self._history) / len(self._history) if self._history else 1.0
+
+    def choose(self, pick, pool):
+        """
+        pick: gleichverteilt gezogene Recording; pool: alle in Frage kommenden
+        Recordings aus dem geladenen Index der Query. Gibt die zu spielende Recording zurück.
+        """
+        if self.affinity <= 0 and self.min_novelty <= 0:
+            return pick
+        local = self.local_ids(self.require_sonogram)
+        if self.novelty_rate() < self.min_novelty:
+            if pick.id in local:
+                fresh = [rec for rec in pool if rec.id not in local]
+                if fresh:
+                    pick = self.rng.choice(fresh)
+                    self.forced_novel += 1
+        elif pick.id not in local and self.rng.random() < self.affinity:
+            cached = [rec for rec in pool if rec.id in local]
+            if cached:
+                pick = self.rng.choice(cached)
+        novel = pick.id not in local
+        with self._lock:
+            self._history.append(novel)
+            if novel:
+                self.novel_picks += 1
+            else:
+                self.cached_picks += 1
+        return pick
+
+    def stats(self):
+        picks = self.cached_picks + self.novel_picks
+        return {
+            "affinity": self.affinity,
+            "min_novelty": self.min_novelty,
+            "cached_picks": self.cached_picks,
+            "novel_picks": self.novel_picks,
+            "forced_novel": self.forced_novel,
+            "cached_rate": self.cached_picks / picks if picks else 0.0,
+        }
+
+
+_policy = None
+_policy_lock = threading.Lock()
+
+
+def get_sampling_policy():
+    """Liefert die prozessweit geteilte Auswahl-Strategie (mit configure() einstellen)."""
+    global _policy
+    if _policy is None:
+        with _policy_lock:
+            if _policy is None:
+                _policy = CacheAffinityPolicy()
+    return _policy
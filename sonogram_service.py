@@ -0,0 +1,279 @@
+"""
+Sonogramme laden, zwischenspeichern und anzeigefertig aufbereiten – außerhalb des Tk-Threads.
+
+Bisher hat fetch_and_display_sonogram (BirdQuiz.py) das Sonogramm im Tk-Hauptthread
+per Netz geladen und skaliert; während des Downloads war das ganze Fenster eingefroren,
+und dieselbe Aufnahme wurde in jeder Runde erneut geladen. Der SonogramService
+arbeitet in drei Stufen:
+  1. Speicher: LRU der fertig dekodierten und skalierten Bilder (Schlüssel: URL + Größe)
+  2. Platte:   bird_cache/sonograms/XC<id>-med.png – der Name kommt aus der
+               xeno-canto-URL (ID + Variante), adressiert also den Inhalt; die
+               Dateien gehören zum Speicherbudget des CacheManagers
+  3. Netz:     Download in die Datei (.part + os.replace) – in der kleinsten
+               Variante (small/med/large), die die Anzeigegröße abdeckt
+               (display_resolution.py)
+Dekodieren und Skalieren laufen in einem kleinen Thread-Pool (submit()); die
+Frontends übergeben nur noch das fertige Bild an ihre UI (Tk: after()).
+
+Für eine Runde (load_for/submit_for) wird das Spektrogramm bevorzugt lokal aus
+der gespeicherten Aufnahme berechnet (spectrogram.py) – in genau der
+Anzeigegröße und im eingestellten Frequenzbereich, ohne Download. Erst wenn
+das Audio (noch) nicht lokal liegt oder kein Decoder installiert ist, kommt das
+Sonogramm wie oben von xeno-canto.
+
+local_ids() liest wie beim AudioStore eine Menge im Speicher, die bei Downloads
+ergänzt und bei Verdrängungen durch den CacheManager bereinigt wird.
+"""
+import hashlib
+import os
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from PIL import Image
+
+from app_paths import BIRD_CACHE_DIR
+from audio_store import get_audio_store
+from cache_manager import get_cache_manager
+from display_resolution import get_resolution_policy
+from image_derivatives import DecodedImageCache
+from spectrogram import DEFAULT_RANGE, decoder_name, render_file
+
+SONOGRAM_DIR = os.path.join(BIRD_CACHE_DIR, "sonograms")
+SONOGRAM_SIZE = (400, 300)
+SONOGRAM_CACHE_SIZE = 24  # 400x300 RGB je Bild -> knapp 9 MB
+SONOGRAM_WORKERS = 2
+TIMEOUT = (5, 20)
+
+# .../XC123456-med.png bzw. ...-large.png (letzter Pfadteil der sono-URLs von xeno-canto)
+SONO_NAME_RE = re.compile(r"^XC(\d+)-(\w+)\.(png|jpg|jpeg|gif)$", re.IGNORECASE)
+
+HEADERS = {
+    "User-Agent": "BirdQuizBot/1.0 (Python Script for Bird Sound Quiz)"
+}
+
+
+class SonogramService:
+    def __init__(self, directory=SONOGRAM_DIR, workers=SONOGRAM_WORKERS, memory_items=SONOGRAM_CACHE_SIZE,
+                 session=None):
+        self.directory = directory
+        self.session = session or requests.Session()
+        self.session.headers.update(HEADERS)
+        self.images = DecodedImageCache(memory_items)
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="sonogram")
+        self._lock = threading.Lock()
+        self._inflight = {}  # (URL, Größe) -> Future
+        self._local = None  # xeno-canto-ID -> Dateinamen auf der Platte; None = noch nicht gelesen
+        self.local_rendering = True
+        self.freq_range = DEFAULT_RANGE
+        self.disk_hits = 0
+        self.downloads = 0
+        self.local_renders = 0
+
+    def set_local_rendering(self, enabled=True, freq_range=None):
+        """Spektrogramme aus dem lokalen Audio rechnen (enabled) und Frequenzbereich (von, bis) in Hz."""
+        self.local_rendering = bool(enabled)
+        if freq_range:
+            self.freq_range = (int(freq_range[0]), int(freq_range[1]))
+
+    def renders_locally(self):
+        """True, wenn Spektrogramme lokal gerechnet werden können (eingeschaltet und Decoder vorhanden)."""
+        return self.local_rendering and decoder_name() is not None
+
+    @staticmethod
+    def file_name(url):
+        """XC<id>-<variante>.png aus der xeno-canto-URL; andere URLs über ihren Hash."""
+        name = url.split("?", 1)[0].rstrip("/").rsplit("/", 1)[-1]
+        if SONO_NAME_RE.match(name):
+            return name
+        return hashlib.sha1(url.encode("utf-8")).hexdigest() + ".png"
+
+    def path(self, url):
+        return os.path.join(self.directory, self.file_name(url))
+
+    def cached_path(self, url):
+        """Pfad der Datei auf der Platte oder None (ohne Download)."""
+        path = self.path(url)
+        if os.path.exists(path):
+            get_cache_manager().touch("sonograms/" + os.path.basename(path))
+            return path
+        return None
+
+    def cached_image(self, url, size=SONOGRAM_SIZE):
+        """Fertiges Bild aus dem Speicher oder None – für den schnellen Weg im UI-Thread."""
+        return self.images.get((url, tuple(size)))
+
+    def download(self, url):
+        """Lädt das Sonogramm auf die Platte (falls nötig) und gibt den Pfad zurück."""
+        path = self.cached_path(url)
+        if path:
+            with self._lock:
+                self.disk_hits += 1
+            return path
+        os.makedirs(self.directory, exist_ok=True)
+        path = self.path(url)
+        tmp_path = f"{path}.{threading.get_ident()}.part"
+        try:
+            with self.session.get(url, stream=True, timeout=TIMEOUT) as response:
+                response.raise_for_status()
+                with open(tmp_path, "wb") as f:
+                    for chunk in response.iter_content(chunk_size=65536):
+                        f.write(chunk)
+            os.replace(tmp_path, path)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        self._remember(os.path.basename(path))
+        with self._lock:
+            self.downloads += 1
+        manager = get_cache_manager()
+        manager.touch("sonograms/" + os.path.basename(path))
+        manager.request_check()
+        return path
+
+    def load(self, url, size=SONOGRAM_SIZE):
+        """Blockierend: fertiges PIL-Bild in `size` (Speicher -> Platte -> Netz). Nicht im Tk-Thread aufrufen."""
+        key = (url, tuple(size))
+        im = self.images.get(key)
+        if im is not None:
+            return im
+        path = self.download(get_resolution_policy().sonogram_url(url, size))
+        with Image.open(path) as source:
+            im = source.convert("RGB").resize(tuple(size))
+        self.images.put(key, im)
+        return im
+
+    def submit(self, url, size=SONOGRAM_SIZE):
+        """Lädt im Thread-Pool; gleichzeitige Anfragen für dasselbe Bild teilen sich einen Future."""
+        key = (url, tuple(size))
+        with self._lock:
+            future = self._inflight.get(key)
+            if future is not None:
+                return future
+            future = self._inflight[key] = self._pool.submit(self.load, url, size)
+        # Außerhalb des Locks: ist der Future schon fertig, läuft der Callback sofort
+        future.add_done_callback(lambda _: self._forget(key))
+        return future
+
+    def _local_key(self, recording, size):
+        """Schlüssel des lokal gerechneten Bildes oder None, wenn es nicht lokal gerechnet werden kann."""
+        if not self.renders_locally():
+            return None
+        path = get_audio_store().local_path(recording)
+        if path is None:
+            return None
+        return path, tuple(size), self.freq_range
+
+    def load_for(self, recording, size=SONOGRAM_SIZE):
+        """Blockierend: Sonogramm der Runde – lokal aus dem Audio gerechnet, sonst von xeno-canto."""
+        key = self._local_key(recording, size)
+        if key is not None:
+            im = self.images.get(key)
+            if im is not None:
+                return im
+            try:
+                im = render_file(key[0], size, self.freq_range)
+            except Exception as e:
+                print(f"[WARN] Spektrogramm konnte nicht lokal berechnet werden, lade von xeno-canto: {e}")
+            else:
+                self.images.put(key, im)
+                with self._lock:
+                    self.local_renders += 1
+                return im
+        return self.load(recording["sonogram_url"], size)
+
+    def cached_image_for(self, recording, size=SONOGRAM_SIZE):
+        """Fertiges Sonogramm der Runde aus dem Speicher oder None (für den UI-Thread)."""
+        key = self._local_key(recording, size)
+        if key is not None:
+            return self.images.get(key)
+        return self.cached_image(recording["sonogram_url"], size)
+
+    def submit_for(self, recording, size=SONOGRAM_SIZE):
+        """Wie submit(), aber für eine Runde (lokal gerechnet, wenn möglich)."""
+        key = ("round", recording.get("id") or recording["sonogram_url"], tuple(size))
+        with self._lock:
+            future = self._inflight.get(key)
+            if future is not None:
+                return future
+            future = self._inflight[key] = self._pool.submit(self.load_for, recording, size)
+        future.add_done_callback(lambda _: self._forget(key))
+        return future
+
+    def fill_async(self, url):
+        """Legt das Sonogramm im Hintergrund nur auf der Platte ab (ohne Dekodieren)."""
+        def run():
+            try:
+                self.download(url)
+            except Exception as e:
+                print(f"[WARN] Sonogramm konnte nicht gespeichert werden: {e}")
+
+        return self._pool.submit(run)
+
+    def _forget(self, key):
+        with self._lock:
+            self._inflight.pop(key, None)
+
+    def _local_index(self):
+        """ID -> Dateinamen; beim ersten Aufruf einmal aus dem Verzeichnis gelesen (Aufrufer hält _lock)."""
+        if self._local is None:
+            self._local = {}
+            try:
+                names = os.listdir(self.directory)
+            except OSError:
+                names = []
+            for name in names:
+                match = SONO_NAME_RE.match(name)
+                if match:
+                    self._local.setdefault(match.group(1), set()).add(name)
+        return self._local
+
+    def _remember(self, name):
+        match = SONO_NAME_RE.match(name)
+        if match:
+            with self._lock:
+                self._local_index().setdefault(match.group(1), set()).add(name)
+
+    def forget(self, name):
+        """Datei wurde entfernt (vom CacheManager gemeldet)."""
+        match = SONO_NAME_RE.match(name)
+        if match:
+            with self._lock:
+                index = self._local_index()
+                names = index.get(match.group(1))
+                if names is not None:
+                    names.discard(name)
+                    if not names:
+                        del index[match.group(1)]
+
+    def local_ids(self):
+        """xeno-canto-IDs aller Sonogramme auf der Platte (aus dem Speicher, ohne Verzeichnis-Listing)."""
+        with self._lock:
+            return set(self._local_index())
+
+    def stats(self):
+        with self._lock:
+            return {
+                "memory_hits": self.images.hits,
+                "memory_misses": self.images.misses,
+                "disk_hits": self.disk_hits,
+                "downloads": self.downloads,
+                "local_renders": self.local_renders,
+            }
+
+
+_service = None
+_service_lock = threading.Lock()
+
+
+def get_sonogram_service():
+    """Liefert den prozessweit geteilten SonogramService."""
+    global _service
+    if _service is None:
+        with _service_lock:
+            if _service is None:
+                _service = SonogramService()
+                get_cache_manager().add_pool_listener("sonograms", _service.forget)
+    return _service
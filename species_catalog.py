@@ -0,0 +1,134 @@
+"""
+Gemeinsamer Artenkatalog für alle Frontends (BirdQuiz.py, Testmitflet.py, test_df.py).
+
+Die Artenliste wird genau einmal pro Prozess geladen – aus dem Binär-Snapshot
+(siehe catalog_snapshot.py), ohne pandas. Alle daraus abgeleiteten Sichten
+(deutsche Namensliste, latin -> deutsch, Such-Index, DataFrame) werden erst beim
+ersten Zugriff aufgebaut und danach wiederverwendet. Auch die "10 Zufallsarten"
+ziehen nur noch aus dem Speicher und lesen nie wieder von der Platte.
+"""
+import os
+import random
+import sys
+import threading
+
+import catalog_snapshot
+from species_resolver import SpeciesResolver
+
+CSV_FILENAME = "Europ_Species_3.csv"
+
+
+def resource_path(relative_path):
+    """Pfad relativ zum Programmordner bzw. zum PyInstaller-Bundle (sys._MEIPASS)."""
+    try:
+        base_path = sys._MEIPASS
+    except Exception:
+        base_path = os.path.abspath(".")
+
+    return os.path.join(base_path, relative_path)
+
+
+class SpeciesCatalog:
+    """
+    Hält die Artenliste im Speicher und stellt memoisierte Sichten darauf bereit.
+    Alle Sichten werden lazy und thread-sicher genau einmal gebaut.
+    """
+
+    def __init__(self, csv_path, snapshot_path=None):
+        self.csv_path = csv_path
+        self.snapshot_path = snapshot_path
+        self._lock = threading.RLock()
+        self._views = {}
+
+    def _view(self, name, builder):
+        # Schneller Pfad ohne Lock, falls die Sicht schon existiert
+        try:
+            return self._views[name]
+        except KeyError:
+            pass
+        with self._lock:
+            if name not in self._views:
+                self._views[name] = builder()
+            return self._views[name]
+
+    @property
+    def snapshot(self):
+        """Der geladene (oder neu gebaute) Binär-Snapshot der CSV."""
+        return self._view("snapshot", lambda: catalog_snapshot.load_or_build(self.csv_path, self.snapshot_path))
+
+    @property
+    def columns(self):
+        return self.snapshot["columns"]
+
+    @property
+    def rows(self):
+        """Alle Zeilen der CSV als Tupel in Spaltenreihenfolge."""
+        return self.snapshot["rows"]
+
+    @property
+    def name_records(self):
+        """(Deutsch, Wissenschaftlich, Englisch)-Tupel pro Zeile."""
+        return self._view("name_records", lambda: catalog_snapshot.name_records(self.columns, self.rows))
+
+    @property
+    def dataframe(self):
+        """
+        Die komplette Artenliste als pandas DataFrame (Spalten: ID, Deutsch, Wissenschaftlich, Englisch).
+        pandas wird erst hier importiert – nur die Tabellenansichten brauchen das.
+        """
+        def build():
+            import pandas as pd
+            return pd.DataFrame.from_records(list(self.rows), columns=list(self.columns))
+        return self._view("dataframe", build)
+
+    @property
+    def german_names(self):
+        """Alle deutschen Artnamen (ohne Duplikate, in CSV-Reihenfolge)."""
+        def build():
+            names = (record[0] for record in self.name_records if record[0])
+            return list(dict.fromkeys(name.strip() for name in names))
+        return self._view("german_names", build)
+
+    @property
+    def latin_to_german(self):
+        """Dictionary wissenschaftlicher Name (wie in der CSV, z.B. 'Parus+major') -> deutscher Name."""
+        return self._view("latin_to_german", lambda: {
+            record[1]: record[0] for record in self.name_records
+        })
+
+    @property
+    def resolver(self):
+        """SpeciesResolver mit dem normalisierten Namens-Index über alle drei Sprachen (aus dem Snapshot)."""
+        return self._view("resolver", lambda: SpeciesResolver(self.name_records, self.snapshot["index"]))
+
+    def lookup(self, species_input):
+        """Kurzform für resolver.lookup()."""
+        return self.resolver.lookup(species_input)
+
+    def sample(self, n, rng=None):
+        """
+        Zieht n zufällige deutsche Artnamen (ohne Zurücklegen) aus dem Speicher.
+        Bei weniger als n Arten werden alle Arten in zufälliger Reihenfolge zurückgegeben.
+        """
+        names = self.german_names
+        return (rng or random).sample(names, min(n, len(names)))
+
+    def __len__(self):
+        return len(self.rows)
+
+
+_catalog = None
+_catalog_lock = threading.Lock()
+
+
+def get_catalog(csv_path=None):
+    """
+    Liefert die prozessweit geteilte SpeciesCatalog-Instanz.
+    Der erste Aufruf legt den Katalog an; csv_path wird nur dabei berücksichtigt.
+    """
+    global _catalog
+    if _catalog is None:
+        with _catalog_lock:
+            if _catalog is None:
+                _catalog = SpeciesCatalog(csv_path or resource_path(CSV_FILENAME))
+    return _catalog
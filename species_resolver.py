@@ -0,0 +1,78 @@
+"""
+Schneller Artnamen-Resolver für die Artenliste (Europ_Species_3.csv).
+
+Statt bei jedem Aufruf alle Zeilen der CSV mit iterrows() zu durchlaufen und
+die drei Namensspalten neu zu normalisieren, wird einmal beim Laden ein
+Dictionary "normalisierter Name -> Eintrag" aufgebaut. Eine Suche ist danach
+ein einziger Dictionary-Zugriff.
+"""
+
+NAME_COLUMNS = ("Deutsch", "Wissenschaftlich", "Englisch")
+
+
+def normalize_species_name(name):
+    """
+    Normalisiert einen Artnamen genauso wie das bisherige lookup_species:
+    Leerzeichen am Rand entfernen, Kleinbuchstaben, '+' durch ' ' ersetzen.
+    """
+    return str(name).strip().lower().replace("+", " ")
+
+
+class SpeciesResolver:
+    """
+    Hält für jede Art einen kanonischen Eintrag (Deutsch, Wissenschaftlich, Englisch)
+    und einen Index, der jeden normalisierten Namen (in allen drei Sprachen)
+    auf (Zeile, Spalte) abbildet.
+
+    lookup() liefert dasselbe Dictionary wie das alte lookup_species, z.B.:
+    {"Deutsch": "Blaumeise", "Wissenschaftlich": "Cyanistes+caeruleus", "Englisch": "Eurasian Blue Tit",
+     "display_language": "Deutsch"}
+    """
+
+    def __init__(self, records, index=None):
+        # records: Liste von Tupeln (Deutsch, Wissenschaftlich, Englisch)
+        self.records = list(records)
+        self.index = index if index is not None else self.build_index(self.records)
+
+    @staticmethod
+    def build_index(records):
+        """
+        Baut den Index normalisierter Name -> (Zeilennummer, Spaltenname).
+        Bei doppelten Namen gewinnt - wie beim zeilenweisen Durchsuchen - der erste Treffer.
+        """
+        index = {}
+        for row_idx, record in enumerate(records):
+            for col, value in zip(NAME_COLUMNS, record):
+                if not isinstance(value, str):
+                    continue  # z.B. leere Zellen (NaN) überspringen
+                index.setdefault(normalize_species_name(value), (row_idx, col))
+        return index
+
+    @classmethod
+    def from_dataframe(cls, species_df):
+        """Erstellt den Resolver aus einem DataFrame mit den Spalten Deutsch/Wissenschaftlich/Englisch."""
+        records = list(zip(*(species_df[col].tolist() for col in NAME_COLUMNS)))
+        return cls(records)
+
+    def lookup(self, species_input):
+        """
+        Sucht den normalisierten species_input in allen drei Sprachen.
+        Gibt ein neues Dictionary zurück oder None, falls kein Eintrag gefunden wurde.
+        """
+        hit = self.index.get(normalize_species_name(species_input))
+        if hit is None:
+            return None
+        row_idx, col = hit
+        deutsch, wissenschaftlich, englisch = self.records[row_idx]
+        return {
+            "Deutsch": deutsch,
+            "Wissenschaftlich": wissenschaftlich,
+            "Englisch": englisch,
+            "display_language": col
+        }
+
+    def __contains__(self, species_input):
+        return normalize_species_name(species_input) in self.index
+
+    def __len__(self):
+        return len(self.records)
@@ -0,0 +1,147 @@
+"""
+Spektrogramme lokal aus dem gespeicherten Audio berechnen (NumPy-STFT).
+
+Jede Runde hat bisher das fertige Sonogramm von xeno-canto (sono.med) geladen –
+ein weiterer Download pro Runde, immer in derselben Größe und mit festem
+Frequenzbereich. Liegt die Aufnahme schon im Audio-Speicher (audio_store.py),
+rechnen wir das Bild selbst:
+  1. decode_audio(): MP3 -> Mono-Samples (float32). Ein Decoder ist optional:
+     miniaudio oder soundfile (libsndfile >= 1.1), sonst ffmpeg auf dem PATH.
+     Ohne Decoder wirft es DecoderUnavailable und der Aufrufer lädt wie bisher
+     das Sonogramm von xeno-canto (siehe sonogram_service.py).
+  2. power_spectrogram(): Hann-Fenster, alle Frames auf einmal per Fancy-Indexing,
+     np.fft.rfft über die ganze Matrix – keine Python-Schleife pro Frame.
+  3. render(): genau eine Spalte pro Pixel (Maximum über die Frames der Spalte,
+     so gehen kurze Rufe nicht verloren), Frequenzbereich frei wählbar, dunkel
+     auf hell wie die Sonogramme von xeno-canto.
+"""
+import importlib.util
+import shutil
+import subprocess
+
+import numpy as np
+from PIL import Image
+
+DEFAULT_SECONDS = 10  # wie sono.med von xeno-canto: die ersten 10 Sekunden
+DEFAULT_RANGE = (0, 10000)  # Hz
+DYNAMIC_RANGE_DB = 70
+FFMPEG_SAMPLE_RATE = 22050
+WINDOW_SECONDS = 0.023  # ~23 ms Fensterlänge (512 Punkte bei 22,05 kHz)
+
+# Auswahl für die Einstellungen (Anzeige -> (von, bis) in Hz)
+FREQUENCY_RANGES = {
+    "0–10 kHz (Standard)": (0, 10000),
+    "1–8 kHz (Singvögel)": (1000, 8000),
+    "0–4 kHz (Eulen, Tauben)": (0, 4000),
+    "0–22 kHz (voll)": (0, 22050),
+}
+
+
+class DecoderUnavailable(RuntimeError):
+    """Kein Audio-Decoder installiert (miniaudio, soundfile oder ffmpeg)."""
+
+
+def _decode_miniaudio(path, seconds):
+    import miniaudio
+
+    decoded = miniaudio.decode_file(path, output_format=miniaudio.SampleFormat.FLOAT32, nchannels=1)
+    samples = np.frombuffer(decoded.samples, dtype=np.float32)
+    return samples[:int(seconds * decoded.sample_rate)], decoded.sample_rate
+
+
+def _decode_soundfile(path, seconds):
+    import soundfile
+
+    with soundfile.SoundFile(path) as f:
+        frames = f.read(min(f.frames, int(seconds * f.samplerate)), dtype="float32", always_2d=True)
+        return frames.mean(axis=1), f.samplerate
+
+
+def _decode_ffmpeg(path, seconds):
+    result = subprocess.run(
+        ["ffmpeg", "-v", "error", "-t", str(seconds), "-i", path,
+         "-f", "f32le", "-ac", "1", "-ar", str(FFMPEG_SAMPLE_RATE), "-"],
+        capture_output=True, check=True, timeout=30,
+    )
+    return np.frombuffer(result.stdout, dtype=np.float32), FFMPEG_SAMPLE_RATE
+
+
+def _find_decoder():
+    if importlib.util.find_spec("miniaudio") is not None:
+        return "miniaudio", _decode_miniaudio
+    try:
+        import soundfile
+        if "MP3" in soundfile.available_formats():
+            return "soundfile", _decode_soundfile
+    except (ImportError, OSError):
+        pass
+    if shutil.which("ffmpeg"):
+        return "ffmpeg", _decode_ffmpeg
+    return None, None
+
+
+_decoder = None
+
+
+def decoder_name():
+    """Name des gefundenen Decoders oder None (wird einmal pro Prozess ermittelt)."""
+    global _decoder
+    if _decoder is None:
+        _decoder = _find_decoder()
+    return _decoder[0]
+
+
+def decode_audio(path, seconds=DEFAULT_SECONDS):
+    """Die ersten `seconds` Sekunden als Mono-float32 und die Abtastrate."""
+    if decoder_name() is None:
+        raise DecoderUnavailable("Kein Audio-Decoder gefunden (miniaudio, soundfile oder ffmpeg)")
+    samples, sample_rate = _decoder[1](path, seconds)
+    if samples.size == 0:
+        raise ValueError(f"{path}: keine Audiodaten")
+    return samples, sample_rate
+
+
+def power_spectrogram(samples, sample_rate):
+    """Leistungsspektrum (Frames x Frequenzen) mit halber Fensterüberlappung und die Fensterlänge."""
+    n_fft = 1 << max(6, int(np.ceil(np.log2(sample_rate * WINDOW_SECONDS))))
+    hop = n_fft // 2
+    if samples.size < n_fft:
+        samples = np.pad(samples, (0, n_fft - samples.size))
+    count = 1 + (samples.size - n_fft) // hop
+    frames = samples[np.arange(count)[:, None] * hop + np.arange(n_fft)]
+    spectrum = np.fft.rfft(frames * np.hanning(n_fft).astype(np.float32), axis=1)
+    return spectrum.real ** 2 + spectrum.imag ** 2, n_fft
+
+
+def render(samples, sample_rate, size, freq_range=DEFAULT_RANGE):
+    """Spektrogramm als RGB-Bild in genau `size` (Breite, Höhe) für den Frequenzbereich (von, bis) in Hz."""
+    width, height = size
+    power, n_fft = power_spectrogram(samples, sample_rate)
+
+    # Zeitachse: eine Spalte pro Pixel, Maximum über die Frames jeder Spalte
+    count = power.shape[0]
+    starts = (np.arange(width) * count) // width
+    if count >= width:
+        power = np.maximum.reduceat(power, starts, axis=0)
+    else:
+        power = power[starts]
+
+    # Frequenzachse: oben die höchste Frequenz
+    low, high = freq_range
+    high = min(high, sample_rate / 2)
+    low = min(max(0, low), high)
+    freqs = np.linspace(high, low, height)
+    rows = np.clip(np.round(freqs * n_fft / sample_rate).astype(int), 0, power.shape[1] - 1)
+    power = power[:, rows].T
+
+    db = 10 * np.log10(power + 1e-12)
+    top = db.max()
+    scaled = np.clip((db - (top - DYNAMIC_RANGE_DB)) / DYNAMIC_RANGE_DB, 0.0, 1.0)
+    pixels = (255 * (1.0 - scaled)).astype(np.uint8)  # laut = dunkel
+    return Image.fromarray(pixels, "L").convert("RGB")
+
+
+def render_file(path, size, freq_range=DEFAULT_RANGE, seconds=DEFAULT_SECONDS):
+    """Dekodiert die Audiodatei und gibt ihr Spektrogramm in `size` zurück."""
+    samples, sample_rate = decode_audio(path, seconds)
+    return render(samples, sample_rate, size, freq_range)
@@ -1,6 +1,5 @@
 import flet as ft
 import os
-import pandas as pd
 import http.server
 import socketserver
 import threading
@@ -8,14 +7,25 @@ from functools import partial
 import sqlite3
 import json
 import random
-import vlc
-import aiohttp
 import shutil
-import requests
-from bs4 import BeautifulSoup
 import numpy as np
-import seaborn as sns
 import matplotlib.pyplot as plt
+from endpoints import WIKIPEDIA_API
+from audio_player import get_player
+from audio_store import get_audio_store
+from cache_manager import MB, get_cache_manager
+from image_cache_worker import ImageCacheWorker
+from image_derivatives import derivative_rel_path
+from image_manifest import get_manifest
+from prefetch_queue import DEFAULT_DEPTH, PrefetchQueue
+from round_media import build_round_bundle, image_data_uri
+from sampling_policy import DEFAULT_AFFINITY, DEFAULT_MIN_NOVELTY, get_sampling_policy
+from display_resolution import get_resolution_policy
+from sonogram_service import get_sonogram_service
+from spectrogram import FREQUENCY_RANGES
+from species_catalog import get_catalog
+from wiki_images import WikipediaClient, cache_species_images
+from xeno_canto import async_get_random_recording, get_service, is_known_empty, start_warm_up
 
 
 
@@ -28,6 +38,9 @@ class AppState:
     def __init__(self):
         self.theme_mode = ft.ThemeMode.LIGHT  # Start mit Light
         self.active_list_name = ""
+        self.species_catalog = None
+        self.image_manifest = get_manifest()  # bird_cache/manifest.json einmal beim Start laden
+        self.cache_manager = get_cache_manager().start()  # Speicherbudget für bird_cache (LRU)
 
 
 
@@ -72,43 +85,29 @@ class AppState:
         conn.close()
 
     def load_species_csv(self, path="Europ_Species_3.csv"):
-        df = pd.read_csv(path, encoding="utf-8-sig")
-        self.species_df = df
-        self.latin_to_german = dict(zip(df["Wissenschaftlich"], df["Deutsch"]))
+        # Gemeinsamer Katalog: wird pro Prozess nur einmal geladen, Sichten entstehen lazy
+        self.species_catalog = get_catalog(path)
+        self.latin_to_german = self.species_catalog.latin_to_german
 
     def lookup_species(self, species_input):
         """
-        Sucht in self.species_df nach einem passenden Eintrag in den Spalten
+        Sucht im Artenkatalog nach einem passenden Eintrag in den Spalten
         'Deutsch', 'Wissenschaftlich', 'Englisch'. Gibt ein Dictionary zurück
         oder None, falls kein Treffer.
         """
-        if self.species_df is None:
-            print("[WARN] species_df wurde noch nicht geladen.")
+        if self.species_catalog is None:
+            print("[WARN] Artenkatalog wurde noch nicht geladen.")
             return None
 
-        species_input_norm = species_input.strip().lower().replace("+", " ").encode("utf-8").decode("utf-8")
-
-        print(f"[DEBUG] Suche nach normalisierter Art: {species_input_norm}")
-
-        for _, row in self.species_df.iterrows():
-            for col in ["Deutsch", "Wissenschaftlich", "Englisch"]:
-                val = str(row[col]).strip().lower().replace("+", " ").encode("utf-8").decode("utf-8")
-
-                if val == species_input_norm:
-                    return {
-                        "Deutsch": row["Deutsch"],
-                        "Wissenschaftlich": row["Wissenschaftlich"],
-                        "Englisch": row["Englisch"],
-                        "display_language": col
-                    }
-
-        print(f"[WARN] Art '{species_input}' wurde nicht gefunden!")
-        return None
+        mapping = self.species_catalog.lookup(species_input)
+        if mapping is None:
+            print(f"[WARN] Art '{species_input}' wurde nicht gefunden!")
+        return mapping
 
     def convert_species_list(self, species_str):
         """
         Wandelt eine komma-getrennte Liste von Arten in ein Mapping um.
-        Nutzt self.lookup_species() und self.species_df.
+        Nutzt self.lookup_species() und den Artenkatalog.
         """
         print(f"[DEBUG] Eingehender species_str: {species_str}")
 
@@ -396,13 +395,12 @@ class MainMenu(BasePage):
     def shuffle_and_start_quiz(self, e):
         print("[DEBUG] Quiz starten: Wähle 10 zufällige Arten")
 
-        df = self.app_state.species_df
-        if df is None:
-            print("[ERROR] species_df wurde nicht geladen.")
+        catalog = self.app_state.species_catalog
+        if catalog is None:
+            print("[ERROR] Artenkatalog wurde nicht geladen.")
             return
 
-        num_species = min(10, len(df))
-        random_species = df.sample(n=num_species)["Deutsch"].tolist()
+        random_species = catalog.sample(10)
 
         species_list_str = ", ".join(random_species)
         print("[DEBUG] Zufällige Arten:", species_list_str)
@@ -426,6 +424,10 @@ class MainMenu(BasePage):
 
 
 class Settings(BasePage):
+    # Auswahl für Länge und Qualität (Wert in settings.json -> Anzeige)
+    MAX_LENGTH_OPTIONS = {0: "Beliebige Länge", 15: "bis 15 s", 30: "bis 30 s", 60: "bis 1 min", 120: "bis 2 min"}
+    MIN_QUALITY_OPTIONS = {"": "Beliebige Qualität", "A": "nur A", "B": "mind. B", "C": "mind. C", "D": "mind. D"}
+
     def __init__(self, page, app_state):
         super().__init__(page, app_state)
 
@@ -519,9 +521,39 @@ class Settings(BasePage):
             ]
         )
 
+        # Länge und Qualität gehen als len_lt:/q:-Filter direkt in die xeno-canto-Abfrage
+        self.max_length_dropdown = ft.Dropdown(
+            label="Max. Länge",
+            value="0",
+            options=[ft.dropdown.Option(key=str(seconds), text=text) for seconds, text in self.MAX_LENGTH_OPTIONS.items()],
+            expand=True
+        )
+        self.min_quality_dropdown = ft.Dropdown(
+            label="Mindestqualität",
+            value="",
+            options=[ft.dropdown.Option(key=level, text=text) for level, text in self.MIN_QUALITY_OPTIONS.items()],
+            expand=True
+        )
+
+        quality_row = ft.Row(
+            spacing=20,
+            vertical_alignment=ft.CrossAxisAlignment.CENTER,
+            controls=[
+                self.max_length_dropdown,
+                self.min_quality_dropdown
+            ]
+        )
+
         # Switches als Instanzvariablen:
         self.images_switch = ft.Switch(label="Bilder anzeigen", value=False)
         self.spectrogram_switch = ft.Switch(label="Spektrogramm anzeigen", value=True)
+        # Frequenzbereich der Spektrogramme (wirkt, wenn sie lokal aus dem Audio gerechnet werden)
+        self.spectrogram_range_dropdown = ft.Dropdown(
+            label="Frequenzbereich Spektrogramm",
+            value=next(iter(FREQUENCY_RANGES)),
+            options=[ft.dropdown.Option(name) for name in FREQUENCY_RANGES],
+            width=300
+        )
 
         #Menu button erstellen
         menu_button = self.build_species_menu()
@@ -565,6 +597,7 @@ class Settings(BasePage):
                     # Zeile mit Radiogruppe + Dropdown und Zeile für Lifestage/Geschlecht
                     sound_row,
                     lifestage_row,
+                    quality_row,
 
                     # Divider
                     ft.Container(
@@ -575,6 +608,7 @@ class Settings(BasePage):
                     ),
                     # Zwei Switches
                     self.spectrogram_switch,
+                    self.spectrogram_range_dropdown,
                     self.images_switch,
 
 
@@ -748,6 +782,9 @@ class Settings(BasePage):
             "show_spectrogram": self.spectrogram_switch.value,
             "Lifestage": lifestage_value,
             "Geschlecht": sex_value,
+            "max_length": int(self.max_length_dropdown.value or 0),
+            "min_quality": self.min_quality_dropdown.value or "",
+            "spectrogram_range": list(FREQUENCY_RANGES[self.spectrogram_range_dropdown.value]),
             "list_name": self.app_state.active_list_name
         }
 
@@ -766,20 +803,25 @@ class Settings(BasePage):
 
 
 class Game(BasePage):
+    SONOGRAM_DISPLAY_SIZE = (480, 160)  # logische Pixel von media_image (Sonogramm und Artbild)
+
     def __init__(self, page, app_state):
         super().__init__(page, app_state)
 
         self.answer_submitted = False
         self.selected_species = []
         self.current_audio = None
+        self.current_recording = None
+        self.current_media = {}
         self.correct_species = None
         self.player = None
-        self.api_cache = {}
         self.round = 1
+        self.unavailable_species = set()  # Arten ohne Aufnahmen mit den gewählten Filtern
+        self.species_button_map = {}
         self.session_id = self.app_state.get_last_session_id() + 1
         self.page.session.set("session_id", self.session_id)
 
-        self.wikipedia_api = "https://en.wikipedia.org/w/api.php"
+        self.wikipedia_api = WIKIPEDIA_API
         self.headers = {
             "User-Agent": "BirdQuizBot/1.0 (Python Script for Bird Sound Quiz)"
         }
@@ -800,8 +842,28 @@ class Game(BasePage):
         self.build_layout()
         self.load_settings()
         self.update_species_buttons()
-        if self.show_images:
-            self.cache_bird_images(self.selected_species)
+        self.start_warm_up()
+        # Clip-Fenster: von langen Aufnahmen nur die ersten N Sekunden laden (0 = ganze Datei)
+        get_audio_store().set_clip_window(self.clip_seconds)
+        # Spektrogramme aus dem lokalen Audio rechnen (Frequenzbereich aus den Einstellungen)
+        get_sonogram_service().set_local_rendering(self.local_spectrogram, self.spectrogram_range)
+        # Medien in der Auflösung laden, die media_image tatsächlich zeigt (DPI-Faktor aus den Einstellungen)
+        policy = get_resolution_policy().configure(self.display_scale, image_height=self.SONOGRAM_DISPLAY_SIZE[1])
+        self.sonogram_size = policy.device_size(self.SONOGRAM_DISPLAY_SIZE)
+        # Vorliebe für schon lokal gespeicherte Aufnahmen (mit Mindestanteil neuer Aufnahmen)
+        get_sampling_policy().configure(self.cache_affinity, self.min_novelty, require_sonogram=self.show_spectrogram)
+        # Ein Producer-Thread hält bis zu prefetch_depth Runden bereit und füllt automatisch nach
+        self.prefetch = PrefetchQueue(self.produce_round, depth=self.prefetch_depth, name="round-prefetch")
+        if self.selected_species:
+            self.prefetch.start()
+        # Bild-Cache im Hintergrund; wird erst nach der ersten angezeigten Runde gestartet
+        self.image_cache = ImageCacheWorker(
+            self.selected_species, self.cache_bird_images,
+            progress=lambda done, total, species, ok: print(
+                f"[INFO] Bild-Cache {done}/{total}: {species} {'bereit' if ok else 'kein Bild'}")
+        )
+        # Arten dieses Spiels werden nicht aus dem bird_cache verdrängt
+        self.app_state.cache_manager.set_pinned(self.selected_species)
         self.start_new_round()
         self.update()
 
@@ -809,8 +871,8 @@ class Game(BasePage):
         # Sonogram & Bild
         self.media_image = ft.Image(
             src="data:image/png;base64,iVBORw0KGgoAAAANSUhEUgAAAAEAAAABCAYAAAAfFcSJAAAADElEQVR42mP8/5+hHgAHggJ/PFC2GAAAAABJRU5ErkJggg==",
-            width=480,
-            height=160,
+            width=self.SONOGRAM_DISPLAY_SIZE[0],
+            height=self.SONOGRAM_DISPLAY_SIZE[1],
             fit=ft.ImageFit.CONTAIN,
             border_radius=5
         )
@@ -823,7 +885,7 @@ class Game(BasePage):
         self.audio_button = ft.OutlinedButton(
             text="Repeat Audio",
             icon=ft.Icons.VOLUME_UP,
-            on_click=self.play_audio
+            on_click=self.repeat_audio
         )
         self.next_button = ft.ElevatedButton("Next", icon=ft.Icons.ARROW_FORWARD, width=200, on_click=self.next_round)
         self.skip_button = ft.ElevatedButton("Skip", icon=ft.Icons.SKIP_NEXT, width=200, on_click=self.skip_round)
@@ -876,6 +938,15 @@ class Game(BasePage):
             self.show_spectrogram = settings.get("show_spectrogram", False)
             self.selected_lifestage = settings.get("Lifestage", "")
             self.selected_sex = settings.get("Geschlecht", "")
+            self.max_length = settings.get("max_length", 0)
+            self.min_quality = settings.get("min_quality", "")
+            self.prefetch_depth = settings.get("prefetch_depth", DEFAULT_DEPTH)
+            self.clip_seconds = settings.get("clip_seconds", 0)
+            self.local_spectrogram = settings.get("local_spectrogram", True)
+            self.spectrogram_range = settings.get("spectrogram_range")
+            self.display_scale = settings.get("display_scale", 1.0)
+            self.cache_affinity = settings.get("cache_affinity", DEFAULT_AFFINITY)
+            self.min_novelty = settings.get("min_novelty", DEFAULT_MIN_NOVELTY)
             self.app_state.active_list_name = settings.get("list_name", "")
         else:
             self.species_mapping = {}
@@ -885,11 +956,21 @@ class Game(BasePage):
             self.show_spectrogram = False
             self.selected_lifestage = ""
             self.selected_sex = ""
+            self.max_length = 0
+            self.min_quality = ""
+            self.prefetch_depth = DEFAULT_DEPTH
+            self.clip_seconds = 0
+            self.local_spectrogram = True
+            self.spectrogram_range = None
+            self.display_scale = 1.0
+            self.cache_affinity = DEFAULT_AFFINITY
+            self.min_novelty = DEFAULT_MIN_NOVELTY
             self.app_state.active_list_name = ""
 
     def update_species_buttons(self):
         self.species_buttons_container.controls.clear()
         buttons = []
+        self.species_button_map = {}
         for sci in self.selected_species:
             display_name = self.species_mapping.get(sci, sci)
             btn = ft.OutlinedButton(
@@ -897,6 +978,7 @@ class Game(BasePage):
                 on_click=lambda e, s=sci: self.check_answer(s)
             )
             buttons.append(btn)
+            self.species_button_map[sci] = btn
 
         # In Zeilen gruppieren
         row = []
@@ -910,6 +992,37 @@ class Game(BasePage):
             rows.append(ft.Row(controls=row, alignment=ft.MainAxisAlignment.CENTER))
         self.species_buttons_container.controls = rows
 
+    def start_warm_up(self):
+        """Lädt die Metadaten aller gewählten Arten parallel vor (die erste Runde wartet nur auf ihre Art)."""
+        def progress(done, total, species, ok):
+            print(f"[INFO] Warm-up {done}/{total}: {species} {'OK' if ok else 'ohne Aufnahmen' if ok is False else 'Fehler'}")
+            if ok is False:
+                self.mark_unavailable(species)
+            if self.loading_overlay.visible:
+                self.loading_overlay.content.controls[1].value = f"Neue Recordings werden geladen... ({done}/{total} Arten)"
+                self.page.update()
+
+        self.warm_up = start_warm_up(
+            self.selected_species, *self.recording_filters(), progress=progress
+        )
+
+    def available_species(self):
+        pool = [s for s in self.selected_species if s not in self.unavailable_species]
+        return pool or self.selected_species
+
+    def mark_unavailable(self, scientific):
+        """Schließt eine Art ohne passende Aufnahmen von den Runden aus und kennzeichnet ihren Button."""
+        if scientific in self.unavailable_species:
+            return
+        self.unavailable_species.add(scientific)
+        print(f"[INFO] Keine Aufnahmen für {scientific} mit den gewählten Filtern – Art wird übersprungen.")
+        btn = self.species_button_map.get(scientific)
+        if btn is not None:
+            # Text bleibt unverändert (check_answer vergleicht ihn), nur Icon und Tooltip kennzeichnen
+            btn.icon = ft.Icons.VOLUME_OFF
+            btn.tooltip = "Keine Aufnahmen mit den gewählten Filtern"
+            self.page.update()
+
     def start_new_round(self):
         if not self.selected_species:
             self.feedback_text.value = "Keine Arten ausgewählt!"
@@ -917,12 +1030,16 @@ class Game(BasePage):
             self.page.update()
             return
 
-        def update_ui(recording):
+        def update_ui(next_data):
+            recording = next_data["recording"] if next_data else None
+            media = (next_data or {}).get("media") or {}
             if recording:
-                self.current_audio = recording["audio_url"]
+                # Audio kommt beim Abspielen aus dem lokalen Speicher (audio_store.py), das Sonogramm vorbereitet
+                self.current_recording = recording
+                self.current_media = media
                 self.correct_species = recording["correct_species"]
                 if self.show_spectrogram and recording.get("sonogram_url"):
-                    self.fetch_and_display_sonogram(recording["sonogram_url"], self.media_image)
+                    self.fetch_and_display_sonogram(media.get("sonogram_src") or recording["sonogram_url"], self.media_image)
                 self.play_audio()
                 self.copyright_info.tooltip = recording.get("copyright_info", "")
             else:
@@ -931,73 +1048,89 @@ class Game(BasePage):
 
             self.hide_loading()
             self.page.update()
+            if self.show_images:
+                self.image_cache.start()  # einmal pro Spiel, weitere Aufrufe werden ignoriert
 
-        # 👇 Zeige nur den Ladebildschirm, wenn kein Prefetch da ist
-        if not hasattr(self, "prefetched_recording") or self.prefetched_recording is None:
-            self.show_loading("Neue Recordings werden geladen...")
-
-        # Wenn ein Recording vorab geladen wurde, benutze das direkt:
-        if hasattr(self, "prefetched_recording") and self.prefetched_recording:
-            rec = self.prefetched_recording
-            self.prefetched_recording = None  # Direkt verbrauchen
-            update_ui(rec)
-            self.prefetch_next_round()  # nächsten schon vorbereiten
+        # Wenn eine Runde vorab geladen wurde, benutze sie direkt (die Warteschlange füllt selbst nach)
+        next_data = self.prefetch.get_nowait()
+        if next_data is not None:
+            update_ui(next_data)
         else:
-            # Wenn keins da: Async laden und danach UI aktualisieren
+            # 👇 Ladebildschirm nur, wenn noch keine Runde bereitliegt (bis die Metadaten da sind)
+            self.show_loading("Neue Recordings werden geladen...")
             self.page.run_task(self.load_recording_async).add_done_callback(
-                lambda fut: (
-                    update_ui(fut.result()),
-                    self.prefetch_next_round()
-                )
+                lambda fut: update_ui(fut.result())
             )
 
     async def load_recording_async(self):
-        scientific = random.choice(self.selected_species)
-        return await self.async_get_random_recording(scientific)
-
-    async def async_get_random_recording(self, scientific):
-        key = (scientific, self.sound_type, self.selected_sex, self.selected_lifestage)
-        if key in self.api_cache:
-            data = self.api_cache[key]
-        else:
-            query = f"{scientific}"
-            if self.sound_type:
-                query += f'+type:"{self.sound_type}"'
-            if self.selected_sex:
-                query += f'+sex:"{self.selected_sex}"'
-            if self.selected_lifestage:
-                query += f'+stage:"{self.selected_lifestage}"'
-
-            url = f"https://www.xeno-canto.org/api/2/recordings?query={query}"
-            async with aiohttp.ClientSession() as session:
-                async with session.get(url) as response:
-                    data = await response.json()
-                    self.api_cache[key] = data
-        recs = data.get("recordings", [])
-        if not recs:
-            return None
-        rec = random.choice(recs)
-        return {
-            "audio_url": rec.get("file"),
-            "sonogram_url": "https:" + rec.get("sono", {}).get("med", "") if rec.get("sono", {}).get("med") else None,
-            "correct_species": scientific,
-            "copyright_info": f"Recorded by {rec.get('rec', '')} | Licensed under: https:{rec.get('lic', '')}"
-        }
-
-    def prefetch_next_round(self):
-        async def fetch():
-            scientific = random.choice(self.selected_species)
+        """
+        Noch keine fertige Runde (z.B. die erste): nicht auf Audio, Sonogramm und Artbild des
+        Producers warten, sondern nur die Metadaten auflösen – VLC streamt die URL (source_for lädt
+        im Hintergrund mit), das Sonogramm kommt über fetch_and_display_sonogram.
+        """
+        rec = await self.fetch_round_recording(random.choice(self.available_species()))
+        return {"recording": rec, "media": {}}
+
+    def produce_round(self):
+        # Läuft im Producer-Thread der PrefetchQueue: Metadaten, Audio, Sonogramm und Artbild vorab laden
+        rec = get_service().run(self.fetch_round_recording(random.choice(self.available_species())))
+        media = build_round_bundle(rec, rec["correct_species"] if rec else "", sonogram=self.show_spectrogram,
+                                   image=self.show_images, sonogram_size=self.sonogram_size)
+        if media["sonogram"] is not None:
+            media["sonogram_src"] = image_data_uri(media["sonogram"])
+        if media["answer_image"] is not None:
+            # Fertig skaliertes Derivat als data:-URI, check_answer muss nichts mehr laden
+            media["answer_image_src"] = image_data_uri(media["answer_image"]["image"], "JPEG")
+        return {"recording": rec, "media": media}
+
+    async def fetch_round_recording(self, scientific):
+        """
+        Lädt eine Aufnahme; hat die Art mit den Filtern keine Aufnahmen, wird sie
+        ausgeschlossen und eine andere gezogen, statt die Runde zu verschenken.
+        """
+        for _ in range(len(self.selected_species)):
             rec = await self.async_get_random_recording(scientific)
-            self.prefetched_recording = rec
+            if rec is not None or not is_known_empty(scientific, *self.recording_filters()):
+                return rec
+            self.mark_unavailable(scientific)
+            pool = self.available_species()
+            if scientific in pool:
+                break  # alle Arten sind leer
+            scientific = random.choice(pool)
+        return None
 
-        self.page.run_task(fetch)
+    def recording_filters(self):
+        """Alle Filter der xeno-canto-Abfragen dieses Spiels (Reihenfolge wie in xeno_canto.py)."""
+        return self.sound_type, self.selected_sex, self.selected_lifestage, self.max_length, self.min_quality
+
+    async def async_get_random_recording(self, scientific):
+        # Läuft auf der Hintergrund-Loop mit der gemeinsamen Session (xeno_canto.py)
+        return await get_service().run_async(
+            async_get_random_recording(scientific, *self.recording_filters())
+        )
 
     def play_audio(self, e=None):
+        if self.current_recording:
+            # Lokale Datei, sobald vorhanden – auch für REPEAT; sonst streamt VLC die URL
+            self.current_audio = get_audio_store().source_for(self.current_recording)
         if self.current_audio:
-            if self.player:
-                self.player.stop()
-            self.player = vlc.MediaPlayer(self.current_audio)
-            threading.Thread(target=self.player.play, daemon=True).start()
+            # Gemeinsamer VLC-Player (audio_player.py): nur das Medium wird getauscht, play() blockiert nicht
+            self.player = get_player().play(self.current_audio)
+            self.preload_next_audio()
+
+    def repeat_audio(self, e=None):
+        if self.current_recording:
+            self.current_audio = get_audio_store().source_for(self.current_recording, count=False)
+        if self.current_audio:
+            self.player = get_player().replay(self.current_audio)  # lokale Datei aus dem Speicher
+
+    def preload_next_audio(self):
+        """Lässt VLC das Audio der nächsten vorgeladenen Runde schon analysieren."""
+        upcoming = self.prefetch.peek()
+        if upcoming and upcoming.get("recording"):
+            path = get_audio_store().local_path(upcoming["recording"])
+            if path:
+                get_player().preload(path)
 
     def check_answer(self, selected):
         if self.player:
@@ -1024,9 +1157,13 @@ class Game(BasePage):
             self.feedback_text.color = "red"
 
         if self.show_images:
-            url = self.load_bird_image(self.correct_species)
-            self.media_image.src = url
-            metadata = self.load_image_metadata(self.correct_species)
+            metadata = self.current_media.get("answer_image")
+            if metadata is not None:
+                self.media_image.src = self.current_media["answer_image_src"]  # im Bundle vorbereitet
+            else:
+                # Bild war beim Vorladen noch nicht im bird_cache
+                self.media_image.src = self.load_bird_image(self.correct_species)
+                metadata = self.load_image_metadata(self.correct_species)
             self.copyright_info.tooltip = f"Picture by: {metadata.get('author', '')} | {metadata.get('license', '')}"
         self.page.update()
 
@@ -1071,123 +1208,45 @@ class Game(BasePage):
 
     def fetch_and_display_sonogram(self, url, image_control: ft.Image):
         try:
+            if not url.startswith("data:"):
+                # Variante passend zur Anzeigegröße; liegt sie schon im bird_cache, kommt sie vom
+                # lokalen HTTP-Server, sonst lädt der Client die URL und der Dienst legt sie für später ab
+                url = get_resolution_policy().sonogram_url(url, self.sonogram_size)
+                service = get_sonogram_service()
+                path = service.cached_path(url)
+                if path:
+                    url = f"http://localhost:8000/sonograms/{os.path.basename(path)}"
+                else:
+                    service.fill_async(url)
             image_control.src = url
             image_control.update()
         except Exception as e:
             print(f"[ERROR] Sonogram konnte nicht geladen werden: {e}")
 
-    def cache_bird_images(self, species_list):
-        os.makedirs("bird_cache", exist_ok=True)
-        for species in species_list:
-            safe_name = species.replace("+", "_").replace(" ", "_").lower()
-            cache_dir = os.path.join("bird_cache", safe_name)
-            metadata_file = os.path.join(cache_dir, "metadata.json")
-            image_file = os.path.join(cache_dir, "image_0.jpg")
-
-            if os.path.exists(metadata_file):
-                print(f"[INFO] Bereits im Cache: {species}")
-                continue
-
-            if os.path.exists(cache_dir):
-                shutil.rmtree(cache_dir)
-            os.makedirs(cache_dir, exist_ok=True)
-
-            # Artikel finden
-            search_params = {
-                "action": "query",
-                "list": "search",
-                "srsearch": f"{species} +bird -chimp -ape -Pan",
-                "format": "json"
-            }
-
-            try:
-                resp = requests.get(self.wikipedia_api, headers=self.headers, params=search_params)
-                data = resp.json()
-                results = data.get("query", {}).get("search", [])
-                if not results:
-                    continue
-                page_title = results[0]["title"]
-            except Exception as e:
-                print(f"[ERROR] Suche für {species}: {e}")
-                continue
-
-            # Bild abrufen
-            image_params = {
-                "action": "query",
-                "prop": "pageimages",
-                "titles": page_title,
-                "piprop": "thumbnail|name",
-                "pithumbsize": 800,
-                "format": "json"
-            }
-
-            try:
-                img_data = requests.get(self.wikipedia_api, headers=self.headers, params=image_params).json()
-                pages = img_data.get("query", {}).get("pages", {})
-                thumb = next(iter(pages.values()), {}).get("thumbnail", {}).get("source", None)
-                page_img_name = next(iter(pages.values()), {}).get("pageimage", None)
-                if not thumb or not page_img_name:
-                    continue
-            except Exception as e:
-                print(f"[ERROR] Bildfehler {species}: {e}")
-                continue
-
-            try:
-                image = requests.get(thumb)
-                with open(image_file, "wb") as f:
-                    f.write(image.content)
-            except Exception as e:
-                print(f"[ERROR] Download für {species} fehlgeschlagen: {e}")
-                continue
-
-            # Lizenzinfo abrufen
-            file_name = "File:" + page_img_name
-            license_params = {
-                "action": "query",
-                "titles": file_name,
-                "prop": "imageinfo",
-                "iiprop": "url|extmetadata",
-                "format": "json"
-            }
+    def cache_bird_images(self, species_list, on_cached=None):
+        # Wikipedia-Abfragen gebündelt für die ganze Liste (siehe wiki_images.py)
+        cache_species_images(species_list, on_cached=on_cached,
+                             client=WikipediaClient(self.wikipedia_api, self.headers))
 
+    def load_bird_image(self, species: str) -> str:
+        entry = get_manifest().get(species)
+        path = entry["path"] if entry else species.replace("+", "_").replace(" ", "_").lower() + "/image_0.jpg"
+        if entry:
             try:
-                license_resp = requests.get(self.wikipedia_api, headers=self.headers, params=license_params)
-                license_data = license_resp.json()
-                pages = license_data.get("query", {}).get("pages", {})
-                image_info = next(iter(pages.values()), {}).get("imageinfo", [{}])[0]
-                author_html = image_info.get("extmetadata", {}).get("Artist", {}).get("value", "")
-                license = image_info.get("extmetadata", {}).get("LicenseShortName", {}).get("value", "")
-                photo_author = BeautifulSoup(author_html, "html.parser").text
+                path = derivative_rel_path(species) or path  # vorskaliertes _h300-Derivat statt des Originals
             except Exception as e:
-                photo_author = "Unbekannt"
-                license = "Unbekannt"
-
-            metadata = [{
-                "filename": os.path.basename(image_file),
-                "license": license,
-                "author": photo_author
-            }]
-
-            with open(metadata_file, "w", encoding="utf-8") as f:
-                json.dump(metadata, f, ensure_ascii=False, indent=2)
-
-    def load_bird_image(self, species: str) -> str:
-        safe_name = species.replace("+", "_").replace(" ", "_").lower()
-        return f"http://localhost:8000/{safe_name}/image_0.jpg"
+                print(f"[WARN] Derivat für '{species}' nicht verfügbar, nutze das Original: {e}")
+        return f"http://localhost:8000/{path}"
 
     def load_image_metadata(self, species: str) -> dict:
-        safe_name = species.replace("+", "_").replace(" ", "_").lower()
-        metadata_file = os.path.join("bird_cache", safe_name, "metadata.json")
-        if os.path.exists(metadata_file):
-            try:
-                with open(metadata_file, "r", encoding="utf-8") as f:
-                    data = json.load(f)
-                return data[0] if data else {}
-            except Exception as e:
-                print(f"[ERROR] Metadata-Fehler bei {species}: {e}")
-        return {"license": "Unbekannt", "author": "Unbekannt"}
+        # Aus dem Bild-Manifest im Speicher – kein Dateizugriff
+        return get_manifest().get(species) or {"license": "Unbekannt", "author": "Unbekannt"}
 
     def on_destroy(self):
+        self.prefetch.stop()
+        self.image_cache.stop()
+        self.app_state.cache_manager.set_pinned([])
+        self.warm_up.cancel()
         if self.player:
             print("[INFO] Audio gestoppt beim Verlassen der Spielseite.")
             self.player.stop()
@@ -1728,6 +1787,8 @@ class Results(BasePage):
         return species_accuracy
 
     def plot_confusion_matrix(self, save_path="matrix_plot.png"):
+        import pandas as pd  # erst für die Statistik laden (Start ohne pandas)
+        import seaborn as sns
         print(f"[DEBUG] Erstelle Confusion Matrix für Session-ID {self.session_id}")
 
         # 🔹 Lade alle Ergebnisse aus der aktuellen Session
@@ -1998,6 +2059,8 @@ class Results(BasePage):
             self.update()
             return
 
+        import pandas as pd
+
         df = pd.DataFrame(rows, columns=["session_id", "accuracy", "total"])
         df = df.sort_values("session_id").reset_index(drop=True)
         df["plot_x"] = range(len(df))
@@ -2089,6 +2152,8 @@ class Results(BasePage):
             self.update()
             return
 
+        import pandas as pd
+
         df = pd.DataFrame(rows, columns=["session_id", "correct", "total"])
         df["accuracy"] = (df["correct"] / df["total"] * 100).round(0)
         df = df.sort_values(by="session_id").reset_index(drop=True)
@@ -2267,6 +2332,18 @@ class Overallsettings(BasePage):
                                                    on_click=lambda e: self.delete_entire_image_cache())
                         )
                     ),
+                    ft.ExpansionPanel(
+                        header=ft.Container(
+                            alignment=ft.alignment.center,
+                            padding=10,
+                            content=ft.Text(
+                                "Speicherplatz (Cache)",
+                                style="titleMedium"
+                            )
+                        ),
+                        bgcolor=ft.Colors.PRIMARY_CONTAINER,
+                        content=self.build_cache_area()
+                    ),
                     ft.ExpansionPanel(
                         header=ft.Container(
                             alignment=ft.alignment.center,
@@ -2332,11 +2409,79 @@ class Overallsettings(BasePage):
         if os.path.exists(cache_dir):
             try:
                 shutil.rmtree(cache_dir)
+                get_manifest().clear()
                 print("[INFO] Gesamter Bilder-Cache erfolgreich gelöscht.")
             except Exception as e:
                 print(f"[ERROR] Fehler beim Löschen des Bild-Caches: {e}")
         else:
             print("[INFO] Kein Cache-Ordner vorhanden – nichts zu löschen.")
+        self.refresh_cache_stats()
+
+    CACHE_BUDGET_OPTIONS_MB = [100, 250, 500, 1000, 2000, 5000]
+    CACHE_SUBTREE_NAMES = {"images": "Bilder", "audio": "Audio", "sonograms": "Sonogramme"}
+
+    def build_cache_area(self):
+        manager = self.app_state.cache_manager
+        budget_mb = round(manager.budget / MB)
+        options = sorted(set(self.CACHE_BUDGET_OPTIONS_MB) | {budget_mb})
+        self.cache_budget_dropdown = ft.Dropdown(
+            label="Maximale Größe von bird_cache",
+            value=str(budget_mb),
+            options=[ft.dropdown.Option(key=str(mb), text=f"{mb} MB") for mb in options],
+            on_change=self.cache_budget_changed,
+            width=250
+        )
+        self.cache_stats_text = ft.Text()
+        self.refresh_cache_stats(update=False)
+        return ft.Container(
+            padding=20,
+            content=ft.Column(
+                spacing=10,
+                controls=[
+                    self.cache_budget_dropdown,
+                    self.cache_stats_text,
+                    ft.TextButton("Aktualisieren", icon=ft.Icons.REFRESH,
+                                  on_click=lambda e: self.refresh_cache_stats())
+                ]
+            )
+        )
+
+    def refresh_cache_stats(self, update=True):
+        if not hasattr(self, "cache_stats_text"):
+            return
+        manager = self.app_state.cache_manager
+        manager.scan()
+        stats = manager.stats()
+        lines = [f"Belegt: {stats['total_bytes'] / MB:.1f} MB von {stats['budget_bytes'] / MB:.0f} MB "
+                 f"({stats['units']} Einträge)"]
+        for subtree, size in sorted(stats["by_subtree"].items()):
+            lines.append(f"  {self.CACHE_SUBTREE_NAMES.get(subtree, subtree)}: {size / MB:.1f} MB")
+        lines.append(f"Angeheftet (laufendes Spiel): {stats['pinned']} Arten")
+        lines.append(f"Verdrängt seit Programmstart: {stats['evicted_units']} Einträge, "
+                     f"{stats['evicted_bytes'] / MB:.1f} MB")
+        audio = get_audio_store().stats()
+        lines.append(f"Audio lokal abgespielt: {audio['hit_rate']:.0%} "
+                     f"({audio['hits']} von {audio['hits'] + audio['misses']}), "
+                     f"{audio['downloads']} Downloads")
+        player = get_player().stats()
+        if player["median_time_to_audio"] is not None:
+            lines.append(f"Zeit bis zum Ton (Median): {player['median_time_to_audio'] * 1000:.0f} ms "
+                         f"über {player['plays']} Wiedergaben")
+        sonograms = get_sonogram_service().stats()
+        lines.append(f"Sonogramme: {sonograms['local_renders']} lokal gerechnet, {sonograms['memory_hits']} aus dem Speicher, "
+                     f"{sonograms['disk_hits']} von der Platte, {sonograms['downloads']} Downloads")
+        policy = get_sampling_policy().stats()
+        lines.append(f"Runden mit lokaler Aufnahme: {policy['cached_rate']:.0%} "
+                     f"(Vorliebe {policy['affinity']:.0%}, mind. {policy['min_novelty']:.0%} neue Aufnahmen)")
+        self.cache_stats_text.value = "\n".join(lines)
+        if update:
+            self.cache_stats_text.update()
+
+    def cache_budget_changed(self, e):
+        self.app_state.cache_manager.set_budget(int(self.cache_budget_dropdown.value) * MB)
+        self.page.snack_bar = ft.SnackBar(ft.Text("Cache-Budget gespeichert!"))
+        self.page.snack_bar.open = True
+        self.page.update()
 
     def save_user_lists(self):
         lists = {
@@ -2467,6 +2612,8 @@ def main(page: ft.Page):
     app_state.init_database()
     app_state.load_species_csv()
     app_state.start_local_http_server()
+    # Gemeinsame xeno-canto-Session starten und Verbindung vorwärmen, bevor die erste Runde läuft
+    get_service().prewarm()
 
 
 
@@ -0,0 +1,310 @@
+"""
+Artbilder von Wikipedia für den bird_cache – mit gebündelten API-Abfragen.
+
+Bisher kostete jede Art drei Wikipedia-Abfragen nacheinander (list=search,
+prop=pageimages, prop=imageinfo). Die MediaWiki-API nimmt aber bis zu 50 Titel
+pro Abfrage und löst mit redirects=1 wissenschaftliche Namen direkt auf den
+Artikel auf (z.B. "Parus major" -> "Great tit"). Für eine ganze Artenliste sind
+deshalb nur noch nötig:
+  1) pageimages + redirects für alle wissenschaftlichen Namen (je 50 pro Abfrage)
+  2) imageinfo/extmetadata für alle Bilddateien (je 50 pro Abfrage)
+Nur Arten, deren Name nicht direkt auflöst, fallen auf die alte Suche zurück.
+
+cache_species_images() erledigt den kompletten Ablauf für die Frontends
+(Abfragen, Thumbnail-Download, Eintrag im Bild-Manifest) und wird von deren
+cache_bird_images() aufgerufen. Die Thumbnails werden parallel in einem
+Thread-Pool über eine gemeinsame requests.Session (Keep-Alive, begrenzte
+Verbindungen pro Host) geladen und gestreamt auf die Platte geschrieben;
+im selben Worker entstehen auch die vorskalierten Derivate (image_derivatives.py).
+Die Thumbnail-Größe (pithumbsize) richtet sich nach der Anzeigehöhe der Artbilder
+und dem Skalierungsfaktor der Anzeige (display_resolution.py), statt fest 800px
+zu laden und danach auf 300px zu verkleinern.
+"""
+import os
+import shutil
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import requests
+from PIL import Image
+from requests.adapters import HTTPAdapter
+
+from app_paths import BIRD_CACHE_DIR, species_cache_dir
+from cache_manager import get_cache_manager
+from display_resolution import get_resolution_policy
+from endpoints import WIKIPEDIA_API
+from image_derivatives import make_derivatives
+from image_manifest import get_manifest
+
+BATCH_SIZE = 50  # Maximum der MediaWiki-API für titles= (ohne Bot-Rechte)
+TIMEOUT = (5, 20)  # (Verbindungsaufbau, Lesen) in Sekunden
+DOWNLOAD_WORKERS = 6  # parallele Thumbnail-Downloads = Verbindungen pro Host
+
+HEADERS = {
+    "User-Agent": "BirdQuizBot/1.0 (Python Script for Bird Sound Quiz)"
+}
+
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def shared_session():
+    """Prozessweit geteilte Session für Wikipedia/Wikimedia mit Keep-Alive und begrenztem Pool."""
+    global _session
+    with _session_lock:
+        if _session is None:
+            _session = requests.Session()
+            _session.headers.update(HEADERS)
+            adapter = HTTPAdapter(pool_connections=4, pool_maxsize=DOWNLOAD_WORKERS, pool_block=True)
+            _session.mount("https://", adapter)
+            _session.mount("http://", adapter)
+    return _session
+
+
+def _chunks(items, size=BATCH_SIZE):
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+
+def species_title(species):
+    """'parus+major' -> 'Parus major' (so wie der Artikel bzw. die Weiterleitung heißt)."""
+    name = " ".join(species.replace("+", " ").replace("_", " ").split())
+    return name[:1].upper() + name[1:]
+
+
+class WikipediaClient:
+    """Zählt die API-Abfragen mit (api_calls), damit sich die Bündelung nachprüfen lässt."""
+
+    def __init__(self, api=None, headers=None, session=None):
+        self.api = api or WIKIPEDIA_API
+        self.session = session or shared_session()
+        self.headers = headers or HEADERS
+        self.api_calls = 0
+
+    def get(self, url, **kwargs):
+        return self.session.get(url, headers=self.headers, timeout=TIMEOUT, **kwargs)
+
+    def query(self, **params):
+        """
+        Eine action=query-Abfrage inklusive aller continue-Folgeseiten.
+        Gibt (pages, title_map) zurück: pages nach Titel, title_map bildet angefragte
+        Titel über normalized/redirects auf den endgültigen Titel ab.
+        """
+        params = dict(params, action="query", format="json")
+        pages = {}
+        title_map = {}
+        cont = {}
+        while True:
+            self.api_calls += 1
+            response = self.get(self.api, params={**params, **cont})
+            response.raise_for_status()
+            data = response.json()
+            query = data.get("query", {})
+            for entry in query.get("normalized", []) + query.get("redirects", []):
+                title_map[entry["from"]] = entry["to"]
+            for page in query.get("pages", {}).values():
+                # Bei continue kommen Seiten mehrfach, jeweils mit weiteren Feldern
+                pages.setdefault(page.get("title"), {}).update(page)
+            if "continue" not in data:
+                break
+            cont = data["continue"]
+        return pages, title_map
+
+    @staticmethod
+    def final_title(title, title_map):
+        seen = set()
+        while title in title_map and title not in seen:
+            seen.add(title)
+            title = title_map[title]
+        return title
+
+    def search_title(self, species):
+        """Alte Volltextsuche als Rückfall für Namen ohne direkten Artikel/Weiterleitung."""
+        term = species.replace("+", " ").replace("_", " ").lower()
+        self.api_calls += 1
+        response = self.get(self.api, params={
+            "action": "query",
+            "list": "search",
+            "srsearch": f"{term} +bird -chimp -ape -Pan",
+            "format": "json"
+        })
+        response.raise_for_status()
+        results = response.json().get("query", {}).get("search", [])
+        return results[0]["title"] if results else None
+
+    def page_images(self, titles, thumb_size):
+        """Titel -> {"title", "thumbnail_url", "file_name"} (nur Seiten mit Bild), in 50er-Bündeln."""
+        result = {}
+        titles = list(dict.fromkeys(titles))
+        for batch in _chunks(titles):
+            pages, title_map = self.query(
+                titles="|".join(batch), redirects=1, prop="pageimages",
+                piprop="thumbnail|name", pithumbsize=thumb_size, pilimit=BATCH_SIZE
+            )
+            for title in batch:
+                page = pages.get(self.final_title(title, title_map))
+                if not page or "missing" in page:
+                    continue
+                thumb = page.get("thumbnail", {}).get("source")
+                page_image = page.get("pageimage")
+                if thumb and page_image:
+                    result[title] = {"title": page["title"], "thumbnail_url": thumb, "file_name": "File:" + page_image}
+        return result
+
+    def file_licenses(self, file_names):
+        """Dateititel -> {"license", "author"} (author als HTML wie von der API), in 50er-Bündeln."""
+        result = {}
+        file_names = list(dict.fromkeys(file_names))
+        for batch in _chunks(file_names):
+            pages, title_map = self.query(titles="|".join(batch), prop="imageinfo", iiprop="extmetadata")
+            for file_name in batch:
+                page = pages.get(self.final_title(file_name, title_map), {})
+                info = (page.get("imageinfo") or [{}])[0]
+                ext = info.get("extmetadata", {})
+                result[file_name] = {
+                    "license": ext.get("LicenseShortName", {}).get("value", ""),
+                    "author": ext.get("Artist", {}).get("value", ""),
+                }
+        return result
+
+    def lookup_images(self, species_list, thumb_size=None):
+        """
+        Art -> {"title", "thumbnail_url", "file_name", "license", "author"} für alle Arten,
+        zu denen ein Bild gefunden wurde. Ohne thumb_size passend zur Anzeigehöhe der Artbilder.
+        """
+        thumb_size = thumb_size or get_resolution_policy().answer_thumb_size()
+        titles = {species: species_title(species) for species in species_list}
+        found = self.page_images(titles.values(), thumb_size)
+
+        # Rückfall: Volltextsuche für Namen, die nicht direkt aufgelöst wurden
+        retry = []
+        for species in species_list:
+            if titles[species] in found:
+                continue
+            try:
+                title = self.search_title(species)
+            except Exception as e:
+                print(f"[ERROR] Suche für '{species}': {e}")
+                continue
+            if title and title != titles[species]:
+                titles[species] = title
+                retry.append(title)
+        if retry:
+            found.update(self.page_images(retry, thumb_size))
+
+        images = {}
+        for species in species_list:
+            if titles[species] in found:
+                images[species] = dict(found[titles[species]])
+        licenses = self.file_licenses([info["file_name"] for info in images.values()])
+        for info in images.values():
+            info.update(licenses.get(info["file_name"], {"license": "", "author": ""}))
+        return images
+
+
+def cache_species_images(species_list, on_cached=None, client=None, workers=DOWNLOAD_WORKERS):
+    """
+    Füllt bird_cache/<art>/image_0.jpg + den Manifest-Eintrag für alle noch nicht gecachten Arten.
+    on_cached(species, ok) wird nach jeder Art im aufrufenden Thread aufgerufen,
+    in der Reihenfolge, in der die Downloads fertig werden.
+    """
+    os.makedirs(BIRD_CACHE_DIR, exist_ok=True)
+    manifest = get_manifest()
+    pending = []
+    for species in dict.fromkeys(species_list):
+        if manifest.has(species):
+            print(f"[INFO] Bilder für '{species}' sind bereits gecached.")
+        else:
+            pending.append(species)
+    if not pending:
+        return
+
+    client = client or WikipediaClient()
+    try:
+        images = client.lookup_images(pending)
+    except Exception as e:
+        print(f"[ERROR] Wikipedia-Abfrage für {len(pending)} Arten fehlgeschlagen: {e}")
+        images = {}
+    print(f"[INFO] Bild-Metadaten für {len(pending)} Arten mit {client.api_calls} API-Abfragen geladen.")
+
+    try:
+        _download_images(client, pending, images, on_cached, workers)
+    finally:
+        manifest.save()
+        get_cache_manager().request_check()  # neue Dateien -> Budget prüfen
+
+
+def _download_images(client, pending, images, on_cached, workers):
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="thumbnail") as pool:
+        futures = {}
+        for species in pending:
+            info = images.get(species)
+            if info is None:
+                print(f"[WARN] Kein Wikipedia-Bild für '{species}' gefunden.")
+                if on_cached:
+                    on_cached(species, False)
+                continue
+            futures[pool.submit(_store_image, client, species, info)] = species
+
+        for future in as_completed(futures):
+            try:
+                ok = future.result()
+            except Exception as e:
+                print(f"[ERROR] Bild für '{futures[future]}' speichern: {e}")
+                ok = False
+            if on_cached:
+                on_cached(futures[future], ok)
+
+
+def download_file(client, url, path):
+    """Streamt url nach path (über eine .part-Datei, damit nie ein halbes Bild liegen bleibt)."""
+    tmp_path = path + ".part"
+    with client.get(url, stream=True) as r:
+        if r.status_code != 200:
+            print(f"[ERROR] Download des Bildes von {url} fehlgeschlagen, Code={r.status_code}")
+            return False
+        try:
+            with open(tmp_path, "wb") as f:
+                for chunk in r.iter_content(chunk_size=65536):
+                    f.write(chunk)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+    os.replace(tmp_path, path)
+    return True
+
+
+def _store_image(client, species, info):
+    cache_dir = species_cache_dir(species)
+    image_file = os.path.join(cache_dir, "image_0.jpg")
+
+    # Existierenden (unvollständigen) Ordner löschen und neu anlegen
+    if os.path.exists(cache_dir):
+        shutil.rmtree(cache_dir)
+    os.makedirs(cache_dir, exist_ok=True)
+
+    try:
+        if not download_file(client, info["thumbnail_url"], image_file):
+            return False
+    except Exception as e:
+        print(f"[ERROR] Thumbnail für '{species}' herunterladen: {e}")
+        return False
+
+    try:
+        with Image.open(image_file) as im:  # liest nur den Header
+            width, height = im.size
+    except Exception as e:
+        print(f"[ERROR] Thumbnail für '{species}' ist kein lesbares Bild: {e}")
+        return False
+
+    # Autor als Klartext, damit die Anzeige kein HTML mehr parsen muss
+    get_manifest().put(species, image_file, width, height, info.get("license", ""), info.get("author", ""))
+    get_cache_manager().touch(species)
+    try:
+        make_derivatives(species)
+    except Exception as e:
+        print(f"[WARN] Derivat für '{species}' konnte nicht erzeugt werden: {e}")
+    print(f"[OK] Bild und Metadaten für '{species}' in {image_file} gespeichert.")
+    return True
@@ -0,0 +1,559 @@
+"""
+Gemeinsamer xeno-canto-Client für alle Frontends.
+
+Statt für jede Runde per asyncio.run() eine neue Event-Loop und eine neue
+aiohttp.ClientSession (neue TCP- und TLS-Verbindung) aufzubauen, läuft hier
+EINE Event-Loop in einem Hintergrund-Thread mit EINER gepoolten Session.
+Die Session wird beim Programmstart vorgewärmt (DNS + TLS), damit schon die
+erste Runde eine offene Verbindung vorfindet.
+
+Aufrufe aus Tk-Threads:     get_random_recording(...)  (blockierend) oder service.submit(coro)
+Aufrufe aus flet-Tasks:     await service.run_async(coro)
+"""
+import asyncio
+import atexit
+import random
+import threading
+import time
+from collections import OrderedDict
+
+import aiohttp
+
+import endpoints
+from endpoints import absolute_url
+from recording_store import RecordingPage, length_seconds
+from response_cache import ResponseCache
+from sampling_policy import get_sampling_policy
+
+XENO_CANTO_API = endpoints.XENO_CANTO_API
+
+# Hosts, zu denen beim Start schon eine Verbindung aufgebaut wird
+PREWARM_URLS = [XENO_CANTO_API]
+
+HEADERS = {
+    "User-Agent": "BirdQuizBot/1.0 (Python Script for Bird Sound Quiz)"
+}
+
+# Qualitätsstufen von xeno-canto, beste zuerst
+QUALITY_LEVELS = "ABCDE"
+
+# Schneller In-Memory-Cache vor dem persistenten ResponseCache (Schlüssel: normalisierte Query + Seite,
+# Werte: kompakte RecordingPage-Objekte statt der vollständigen JSON-Antwort, siehe recording_store.py).
+# LRU; nach der TTL des ResponseCache läuft ein Treffer wieder über Platte/Revalidierung.
+api_cache = OrderedDict()
+_memory_expires = {}  # Key -> time.monotonic(), ab dem der Eintrag im Speicher veraltet ist
+MAX_MEMORY_ENTRIES = 200
+
+
+class AsyncService:
+    """
+    Besitzt eine langlebige Event-Loop in einem Daemon-Thread und eine
+    gepoolte aiohttp.ClientSession, die nur auf dieser Loop benutzt wird.
+    submit() ist thread-sicher und kann aus jedem Thread aufgerufen werden.
+    """
+
+    def __init__(self, limit=20, limit_per_host=6, timeout=20):
+        self.limit = limit
+        self.limit_per_host = limit_per_host
+        self.timeout = timeout
+        self.loop = None
+        self._session = None
+        self._thread = None
+        self._started = threading.Event()
+        self._lock = threading.Lock()
+
+    def start(self):
+        """Startet die Hintergrund-Loop (mehrfacher Aufruf ist unkritisch)."""
+        with self._lock:
+            if self._thread is not None:
+                return self
+            self.loop = asyncio.new_event_loop()
+            self._thread = threading.Thread(target=self._run_loop, name="xeno-canto-loop", daemon=True)
+            self._thread.start()
+        self._started.wait()
+        return self
+
+    def _run_loop(self):
+        asyncio.set_event_loop(self.loop)
+        self.loop.call_soon(self._started.set)
+        self.loop.run_forever()
+
+    async def get_session(self):
+        """Die gemeinsame Session (wird beim ersten Zugriff auf der Service-Loop angelegt)."""
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=self.limit,
+                limit_per_host=self.limit_per_host,
+                ttl_dns_cache=600,
+                keepalive_timeout=60,
+            )
+            self._session = aiohttp.ClientSession(
+                connector=connector,
+                headers=HEADERS,
+                timeout=aiohttp.ClientTimeout(total=self.timeout),
+            )
+        return self._session
+
+    def submit(self, coro):
+        """
+        Führt die Coroutine auf der Service-Loop aus (thread-sicher).
+        Gibt ein concurrent.futures.Future zurück.
+        """
+        self.start()
+        return asyncio.run_coroutine_threadsafe(coro, self.loop)
+
+    def run(self, coro, timeout=None):
+        """Blockierende Variante von submit() für Threads ohne eigene Loop (z.B. Tk)."""
+        return self.submit(coro).result(timeout)
+
+    async def run_async(self, coro):
+        """
+        Für Aufrufer mit eigener Loop (z.B. flet page.run_task): führt die Coroutine
+        auf der Service-Loop aus und wartet darauf, ohne die aufrufende Loop zu blockieren.
+        """
+        return await asyncio.wrap_future(self.submit(coro))
+
+    def prewarm(self):
+        """Baut im Hintergrund schon DNS-Auflösung und TLS-Verbindung zu xeno-canto auf."""
+        return self.submit(self._prewarm())
+
+    async def _prewarm(self):
+        session = await self.get_session()
+        for url in PREWARM_URLS:
+            try:
+                async with session.head(url) as response:
+                    await response.release()
+                print(f"[INFO] Verbindung zu {url} vorgewärmt.")
+            except Exception as e:
+                print(f"[WARN] Vorwärmen von {url} fehlgeschlagen: {e}")
+
+    def close(self):
+        """Schließt Session und Loop (z.B. beim Programmende)."""
+        if self.loop is None or not self.loop.is_running():
+            return
+        if self._session is not None and not self._session.closed:
+            try:
+                self.run(self._session.close(), timeout=5)
+            except Exception:
+                pass
+        self.loop.call_soon_threadsafe(self.loop.stop)
+
+
+_service = None
+_service_lock = threading.Lock()
+
+
+def get_service():
+    """Liefert den prozessweit geteilten AsyncService (wird beim ersten Aufruf gestartet)."""
+    global _service
+    with _service_lock:
+        if _service is None:
+            _service = AsyncService().start()
+            atexit.register(_service.close)
+    return _service
+
+
+_response_cache = None
+
+
+def get_response_cache():
+    """Persistenter Antwort-Cache auf der Platte (wird beim ersten Zugriff geöffnet)."""
+    global _response_cache
+    if _response_cache is None:
+        _response_cache = ResponseCache()
+    return _response_cache
+
+
+def normalize_filter(value):
+    return (value or "").strip().lower()
+
+
+def normalize_max_length(value):
+    """Höchstlänge in Sekunden (0 = beliebig)."""
+    try:
+        return max(0, int(value or 0))
+    except (TypeError, ValueError):
+        return 0
+
+
+def normalize_quality(value):
+    """Mindestqualität "A" bis "D" ("" = beliebig; "E" schränkt nichts ein)."""
+    value = (value or "").strip().upper()
+    return value if value in QUALITY_LEVELS[:-1] else ""
+
+
+def query_key(species, record_type="", sex_type="", lifestage_type="", max_length=0, min_quality=""):
+    """
+    Normalisierter Cache-Schlüssel aus allen Filtern der Query. Länge und Qualität hängen
+    nur an, wenn sie gesetzt sind – so bleiben die Schlüssel bereits gecachter Queries gültig.
+    """
+    key = (
+        species.strip().lower().replace(" ", "+"),
+        normalize_filter(record_type),
+        normalize_filter(sex_type),
+        normalize_filter(lifestage_type),
+    )
+    max_length = normalize_max_length(max_length)
+    min_quality = normalize_quality(min_quality)
+    if max_length or min_quality:
+        key += (max_length, min_quality)
+    return key
+
+
+def build_query_url(species, record_type="", sex_type="", lifestage_type="", page=1, max_length=0, min_quality=""):
+    species_q, type_q, sex_q, stage_q = query_key(species, record_type, sex_type, lifestage_type)[:4]
+    type_query = f'+type:"{type_q}"' if type_q else ""  # API erwartet Kleinbuchstaben
+    sex_query = f'+sex:"{sex_q}"' if sex_q else ""
+    lifestage_query = f'+stage:"{stage_q}"' if stage_q else ""
+    max_length = normalize_max_length(max_length)
+    length_query = f"+len_lt:{max_length + 1}" if max_length else ""  # höchstens max_length Sekunden
+    min_quality = normalize_quality(min_quality)
+    if min_quality == QUALITY_LEVELS[0]:
+        quality_query = f"+q:{min_quality}"
+    elif min_quality:
+        # q_gt:X = besser als X, also alle Stufen bis einschließlich min_quality
+        quality_query = f"+q_gt:{QUALITY_LEVELS[QUALITY_LEVELS.index(min_quality) + 1]}"
+    else:
+        quality_query = ""
+    page_query = f"&page={page}" if page > 1 else ""
+    return (f"{XENO_CANTO_API}?query={species_q}{type_query}{sex_query}{lifestage_query}"
+            f"{length_query}{quality_query}{page_query}")
+
+
+def matches_constraints(rec, max_length=0, min_quality=""):
+    """
+    Clientseitige Prüfung von Länge und Qualität einer Recording. Greift, wenn die API
+    einen Filter nicht anwendet oder ältere Einträge aus dem Cache kommen.
+    Unbekannte Länge gilt als passend, fehlende Bewertung ("no score") nicht.
+    """
+    max_length = normalize_max_length(max_length)
+    if max_length and length_seconds(rec.length) > max_length:
+        return False
+    min_quality = normalize_quality(min_quality)
+    if min_quality:
+        quality = (rec.quality or "").strip().upper()
+        if quality not in QUALITY_LEVELS or QUALITY_LEVELS.index(quality) > QUALITY_LEVELS.index(min_quality):
+            return False
+    return True
+
+
+class ApiError(RuntimeError):
+    """xeno-canto hat mit einem Fehler geantwortet (HTTP-Status oder "error" im JSON)."""
+
+
+async def fetch_json(url):
+    """
+    Lädt die JSON-Antwort. HTTP-Fehler (z.B. 503, 429) und Fehlerantworten der API werfen
+    eine Exception, statt als leere Ergebnisliste gecached zu werden.
+    """
+    session = await get_service().get_session()
+    async with session.get(url) as response:
+        response.raise_for_status()
+        data = await response.json(content_type=None)
+    if not isinstance(data, dict) or "error" in data:
+        message = data.get("message") or data.get("error") if isinstance(data, dict) else data
+        raise ApiError(f"Fehlerantwort von xeno-canto für {url}: {message}")
+    return data
+
+
+def recording_to_round(rec, species):
+    """Wandelt eine Recording (recording_store.py) in das Runden-Dictionary der Frontends um."""
+    audio_url = rec.file
+    sonogram_url = absolute_url(rec.sono_med, XENO_CANTO_API)
+    rec_value = rec.rec
+    lic_value = rec.lic
+    combined_info = ""
+    if rec_value:
+        combined_info += f"Recorded by {rec_value}"
+    if lic_value:
+        if combined_info:
+            combined_info += " | "
+        combined_info += f" licensed under: {absolute_url(lic_value, XENO_CANTO_API)}"
+    return {"id": rec.id, "audio_url": audio_url, "sonogram_url": sonogram_url, "correct_species": species,
+            "copyright_info": combined_info, "length": rec.length}
+
+
+def remember(key, data, fresh=True):
+    """
+    Legt eine Antwort im In-Memory-Cache ab (LRU: die am längsten nicht benutzten
+    Einträge fliegen zuerst raus). fresh=False: schon veraltet, der nächste Treffer revalidiert.
+    """
+    api_cache[key] = data
+    api_cache.move_to_end(key)
+    _memory_expires[key] = time.monotonic() + get_response_cache().ttl if fresh else 0.0
+    while len(api_cache) > MAX_MEMORY_ENTRIES:
+        old_key, _ = api_cache.popitem(last=False)
+        _memory_expires.pop(old_key, None)
+
+
+def memory_get(key):
+    """(RecordingPage, is_fresh) aus dem Speicher oder (None, False); ein Treffer zählt für die LRU-Reihenfolge."""
+    data = api_cache.get(key)
+    if data is None:
+        return None, False
+    api_cache.move_to_end(key)
+    return data, time.monotonic() < _memory_expires.get(key, 0.0)
+
+
+# Keys, die gerade im Hintergrund neu geladen werden (stale-while-revalidate)
+_revalidating = set()
+
+# Queries (ohne Seite), für die xeno-canto keine einzige Aufnahme liefert (negativer Cache).
+# Wird nicht wie api_cache begrenzt, damit leere Kombinationen nie erneut abgefragt werden.
+_empty_queries = set()
+
+# Laufende Netz-Abrufe pro Key: gleichzeitige Anfragen (Warm-up, Runde, Prefetch) teilen sich einen Abruf
+_inflight = {}
+
+
+def _note_result(key, page):
+    """
+    Merkt sich erste Seiten mit numRecordings == 0 als "keine Aufnahmen" für diese
+    Filterkombination. Fehlerantworten kommen hier nie an (fetch_json wirft).
+    """
+    if key[-1] != 1:
+        return
+    if page.recordings:
+        _empty_queries.discard(key[:-1])
+    elif page.num_recordings == 0:
+        _empty_queries.add(key[:-1])
+
+
+def is_known_empty(species, record_type="", sex_type="", lifestage_type="", max_length=0, min_quality=""):
+    """True, wenn für diese Art mit diesen Filtern bekanntermaßen keine Aufnahmen existieren."""
+    return query_key(species, record_type, sex_type, lifestage_type, max_length, min_quality) in _empty_queries
+
+
+def check_page_data(data, url):
+    """Nur vollständige Ergebnisseiten werden gecached (sonst ApiError)."""
+    if not isinstance(data.get("recordings"), list) or "numRecordings" not in data:
+        raise ApiError(f"Unerwartete Antwort von xeno-canto für {url}: {sorted(data)}")
+
+
+async def _fetch_and_store(key, url):
+    data = await fetch_json(url)
+    check_page_data(data, url)  # vor remember/put: nie eine Fehlerseite für die TTL ablegen
+    page = RecordingPage.from_api(data)
+    _note_result(key, page)
+    remember(key, page)
+    # Auch auf der Platte nur die kompakte Form ablegen
+    await asyncio.to_thread(get_response_cache().put, key, page.to_api())
+    return page
+
+
+async def fetch_and_store(key, url):
+    """Lädt die Antwort aus dem Netz; läuft für den Key schon ein Abruf, wird auf diesen gewartet."""
+    task = _inflight.get(key)
+    if task is None:
+        task = asyncio.ensure_future(_fetch_and_store(key, url))
+        _inflight[key] = task
+        task.add_done_callback(lambda _: _inflight.pop(key, None))
+    # shield: bricht ein Wartender ab, läuft der gemeinsame Abruf für die anderen weiter
+    return await asyncio.shield(task)
+
+
+async def _revalidate(key, url):
+    try:
+        await fetch_and_store(key, url)
+        print(f"[INFO] Cache-Eintrag im Hintergrund aktualisiert: {key}")
+    except Exception as e:
+        print(f"[WARN] Hintergrund-Aktualisierung für {key} fehlgeschlagen: {e}")
+    finally:
+        _revalidating.discard(key)
+
+
+async def get_query_data(species, record_type="", sex_type="", lifestage_type="", page=1, max_length=0,
+                         min_quality=""):
+    """
+    Liefert eine Seite der API-Antwort zur Query als RecordingPage: erst aus dem Speicher, dann von der Platte,
+    sonst aus dem Netz. Veraltete (stale) Einträge werden sofort zurückgegeben und
+    parallel im Hintergrund erneuert – auch Einträge im Speicher laufen nach der TTL ab,
+    damit eine lange Sitzung nicht ewig dieselbe Antwort sieht. Jede Seite wird einzeln gecached.
+    """
+    key = query_key(species, record_type, sex_type, lifestage_type, max_length, min_quality) + (page,)
+    cached, is_fresh = memory_get(key)
+    if is_fresh:
+        return cached
+
+    url = build_query_url(species, record_type, sex_type, lifestage_type, page, max_length, min_quality)
+    data, is_fresh = await asyncio.to_thread(get_response_cache().get, key)
+    if data is not None:
+        page = RecordingPage.from_api(data)
+        _note_result(key, page)
+        remember(key, page, is_fresh)
+        if not is_fresh and key not in _revalidating:
+            _revalidating.add(key)
+            asyncio.ensure_future(_revalidate(key, url))
+        return page
+
+    try:
+        return await fetch_and_store(key, url)
+    except Exception as e:
+        if cached is None:
+            raise
+        # Netz gerade nicht erreichbar: die veraltete Seite aus dem Speicher tut es noch
+        print(f"[WARN] Aktualisierung für {key} fehlgeschlagen, nutze die Seite aus dem Speicher: {e}")
+        return cached
+
+
+async def sample_recording(species, record_type="", sex_type="", lifestage_type="", max_length=0, min_quality=""):
+    """
+    Zieht eine gleichverteilt zufällige Aufnahme über ALLE Ergebnisseiten der Query.
+
+    Die erste Seite liefert numRecordings und numPages. Daraus wird ein zufälliger
+    Index über alle Aufnahmen gezogen und nur die Seite geladen, auf der er liegt
+    (höchstens ein zusätzlicher Abruf; jede Seite wird beim ersten Bedarf gecached).
+    Länge und Qualität gehen als len_lt:/q:-Filter in die Query; passt die gezogene
+    Aufnahme trotzdem nicht (siehe matches_constraints), wird unter den passenden
+    Aufnahmen der bereits geladenen Seiten gewählt. Zum Schluss darf die
+    Auswahl-Strategie (sampling_policy.py) auf eine schon lokal gespeicherte
+    Aufnahme aus dem geladenen Index ausweichen.
+    Gibt eine Recording zurück oder None, wenn es keine (passenden) Aufnahmen gibt.
+    """
+    filters = (record_type, sex_type, lifestage_type)
+    constraints = (max_length, min_quality)
+    if is_known_empty(species, *filters, *constraints):
+        return None  # negativ gecached: kein Abruf nötig
+    first = await get_query_data(species, *filters, 1, *constraints)
+    first_recordings = first.recordings
+    if not first_recordings:
+        return None
+
+    num_pages = first.num_pages
+    num_recordings = first.num_recordings
+    if num_pages == 1 or num_recordings <= len(first_recordings):
+        rec = random.choice(first_recordings)
+        recordings = first_recordings
+    else:
+        per_page = len(first_recordings)  # die erste Seite ist bei mehreren Seiten immer voll
+        index = random.randrange(num_recordings)
+        page, offset = divmod(index, per_page)
+        page += 1
+        if page == 1:
+            rec, recordings = first_recordings[offset], first_recordings
+        else:
+            try:
+                data = await get_query_data(species, *filters, min(page, num_pages), *constraints)
+                recordings = data.recordings
+            except Exception as e:
+                print(f"[WARN] Seite {page} für {species} konnte nicht geladen werden: {e}")
+                recordings = []
+            if offset < len(recordings):
+                rec = recordings[offset]
+            else:
+                # Ergebnisliste hat sich seit der ersten Seite geändert: auf vorhandene Daten ausweichen
+                recordings = recordings or first_recordings
+                rec = random.choice(recordings)
+
+    if not matches_constraints(rec, *constraints):
+        # Clientseitiger Filter über die geladenen Seiten (API hat len/q nicht angewandt)
+        candidates = [r for r in recordings if matches_constraints(r, *constraints)]
+        if not candidates and recordings is not first_recordings:
+            candidates = [r for r in first_recordings if matches_constraints(r, *constraints)]
+        if not candidates:
+            if num_pages == 1:
+                # Keine einzige passende Aufnahme: wie eine leere Antwort negativ cachen
+                _empty_queries.add(query_key(species, *filters, *constraints))
+            return None
+        rec = random.choice(candidates)
+
+    pool = [r for r in loaded_recordings(species, *filters, *constraints, num_pages=num_pages)
+            if matches_constraints(r, *constraints)]
+    return get_sampling_policy().choose(rec, pool)
+
+
+def loaded_recordings(species, record_type="", sex_type="", lifestage_type="", max_length=0, min_quality="",
+                      num_pages=1):
+    """Alle Aufnahmen der Query aus den Seiten, die schon im Speicher liegen (ohne Abruf)."""
+    key = query_key(species, record_type, sex_type, lifestage_type, max_length, min_quality)
+    recordings = []
+    for page in range(1, num_pages + 1):
+        data = api_cache.get(key + (page,))
+        if data is not None:
+            recordings.extend(data.recordings)
+    return recordings
+
+
+async def warm_up(species_list, record_type="", sex_type="", lifestage_type="", max_length=0, min_quality="",
+                  concurrency=4, progress=None):
+    """
+    Lädt die Metadaten (erste Ergebnisseite) aller Arten der Liste parallel vor,
+    höchstens `concurrency` gleichzeitig. Danach treffen die Runden einen heißen Cache.
+    Dient zugleich als Verfügbarkeits-Check: Arten ohne passende Aufnahmen landen im
+    negativen Cache (siehe is_known_empty) und können vom Frontend ausgeschlossen werden.
+
+    progress(done, total, species, ok) wird nach jeder Art aufgerufen – auf der
+    Service-Loop, Frontends müssen UI-Updates also selbst in ihren Thread holen.
+    Gibt ein Dictionary Art -> ok zurück: True (Aufnahmen vorhanden bzw. weitere Seiten
+    nicht geprüft), False (keine Aufnahmen mit diesen Filtern) oder None (Abruf
+    fehlgeschlagen, Verfügbarkeit unbekannt).
+    """
+    species_list = list(dict.fromkeys(species_list))
+    semaphore = asyncio.Semaphore(concurrency)
+    total = len(species_list)
+    done = 0
+    results = {}
+
+    async def warm_one(species):
+        nonlocal done
+        async with semaphore:
+            try:
+                data = await get_query_data(species, record_type, sex_type, lifestage_type, 1,
+                                            max_length, min_quality)
+                # Passt auf Seite 1 nichts, können spätere Seiten trotzdem passende Aufnahmen
+                # haben – das prüft erst sample_recording; sicher leer ist nur eine einzige Seite
+                results[species] = bool(data.recordings) and (
+                    data.num_pages > 1
+                    or any(matches_constraints(rec, max_length, min_quality) for rec in data.recordings))
+            except Exception as e:
+                print(f"[WARN] Warm-up für {species} fehlgeschlagen: {e}")
+                results[species] = None
+        done += 1
+        if progress:
+            try:
+                progress(done, total, species, results[species])
+            except Exception as e:
+                print(f"[WARN] Fortschritts-Callback fehlgeschlagen: {e}")
+
+    await asyncio.gather(*(warm_one(species) for species in species_list))
+    print(f"[INFO] Warm-up abgeschlossen: {sum(1 for ok in results.values() if ok)}/{total} Arten mit Aufnahmen.")
+    return results
+
+
+def start_warm_up(species_list, record_type="", sex_type="", lifestage_type="", max_length=0, min_quality="",
+                  concurrency=4, progress=None):
+    """
+    Startet warm_up() im Hintergrund und kehrt sofort zurück (concurrent.futures.Future).
+    Eine Runde, die währenddessen ihre Art abfragt, hängt sich an den laufenden Abruf an
+    und muss nicht auf die ganze Liste warten. future.cancel() bricht das Warm-up ab.
+    """
+    return get_service().submit(
+        warm_up(species_list, record_type, sex_type, lifestage_type, max_length, min_quality, concurrency, progress)
+    )
+
+
+async def async_get_random_recording(species, record_type="", sex_type="", lifestage_type="", max_length=0,
+                                     min_quality=""):
+    """
+    Führt die API-Abfrage über die gemeinsame Session durch (mit Speicher- und Platten-Cache)
+    und wählt eine zufällige Aufnahme über alle Ergebnisseiten.
+    Muss auf der Service-Loop laufen (über get_service().submit/run/run_async).
+    """
+    rec = await sample_recording(species, record_type, sex_type, lifestage_type, max_length, min_quality)
+    if rec is None:
+        return None
+    return recording_to_round(rec, species)
+
+
+def get_random_recording(species, record_type="", sex_type="", lifestage_type="", max_length=0, min_quality=""):
+    """
+    Synchrone Wrapper-Funktion für Threads ohne eigene Event-Loop.
+    Nutzt die gemeinsame Hintergrund-Loop statt asyncio.run().
+    """
+    try:
+        return get_service().run(
+            async_get_random_recording(species, record_type, sex_type, lifestage_type, max_length, min_quality)
+        )
+    except Exception as e:
+        print(f"Error in get_random_recording: {e}")
+        return None